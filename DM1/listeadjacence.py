@@ -4,6 +4,7 @@
 sont identifiés par de simples naturels (0, 1, 2, ..., n-1)."""
 
 import bisect 
+from array import array
 
 class ListeAdjacence(object):
     def __init__(self, num = 0):
@@ -506,6 +507,165 @@ class ListeAdjacence(object):
         
         return []
 
+    def vers_csr(self):
+        """
+        Renvoie (sommets, debut, voisins, poids) : le graphe au format CSR,
+        dans des tableaux du module array (que numpy lit sans copie). Les
+        voisins du sommet i sont voisins[debut[i]:debut[i + 1]], et tous les
+        poids valent 1.
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+        >>> G._liste_adjacence
+        [[1, 2], [0, 2], [0, 1, 2]]
+
+        >>> sommets, debut, voisins, poids = G.vers_csr()
+        >>> sommets, debut, voisins
+        ([0, 1, 2], array('q', [0, 2, 4, 7]), array('q', [1, 2, 0, 2, 0, 1, 2]))
+
+        >>> ListeAdjacence().vers_csr()
+        ([], array('q', [0]), array('q'), array('d'))
+        """
+        debut, voisins = array('q', [0]), array('q')
+
+        for liste in self._liste_adjacence:
+            voisins.extend(liste)
+            debut.append(len(voisins))
+
+        return self.sommets(), debut, voisins, array('d', [1]) * len(voisins)
+
+    def vers_tableaux(self):
+        """
+        Renvoie (sommets, origines, extremites, poids) : chaque arête {i, j}
+        une fois, avec origines[k] = i <= extremites[k] = j.
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+        >>> G.vers_tableaux()
+        ([0, 1, 2], array('q', [0, 0, 1, 2]), array('q', [1, 2, 2, 2]), array('d', [1.0, 1.0, 1.0, 1.0]))
+        """
+        sommets, debut, voisins, _ = self.vers_csr()
+        origines, extremites = array('q'), array('q')
+
+        for i in sommets:
+            for k in range(debut[i], debut[i + 1]):
+                if i <= voisins[k]:
+                    origines.append(i)
+                    extremites.append(voisins[k])
+
+        return sommets, origines, extremites, array('d', [1]) * len(origines)
+
+    def vers_dense(self):
+        """
+        Renvoie (sommets, matrice) : la matrice d'adjacence de taille n * n,
+        rangée ligne par ligne dans un tableau du module array.
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2)])
+        >>> G.vers_dense()
+        ([0, 1, 2], array('d', [0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 0.0]))
+        """
+        sommets, debut, voisins, _ = self.vers_csr()
+        n = len(sommets)
+        matrice = array('d', [0]) * (n * n)
+
+        for i in sommets:
+            for k in range(debut[i], debut[i + 1]):
+                matrice[i * n + voisins[k]] = 1
+
+        return sommets, matrice
+
+    def triangles_par_sommet(self):
+        """
+        Renvoie la liste du nombre de triangles auxquels appartient chaque
+        sommet (les boucles sont ignorées). Chaque arête est orientée vers
+        son extrémité de plus haut rang (le rang est le degré, puis le numéro
+        à degré égal) : un sommet a alors au plus O(racine de m) successeurs.
+        Chaque triangle est trouvé une seule fois, depuis son sommet de plus
+        petit rang u et chaque successeur v de u, par l'intersection des
+        listes triées des successeurs de u et de v. Le tout est en O(m^1,5).
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 3), (3, 0), (3, 4), (4, 4)])
+        >>> G.triangles_par_sommet()
+        [2, 1, 2, 1, 0]
+
+        >>> ListeAdjacence(2).triangles_par_sommet()
+        [0, 0]
+        """
+        n = self.nombre_sommets()
+        degres = [len(self._liste_adjacence[u]) - (u in self._liste_adjacence[u]) for u in range(n)]
+
+        # Les listes d'adjacence sont triées : les listes de successeurs le restent
+        successeurs = [
+            [v for v in self._liste_adjacence[u] if (degres[u], u) < (degres[v], v)]
+            for u in range(n)
+        ]
+
+        res = [0] * n
+
+        for u in range(n):
+            for v in successeurs[u]:
+                for w in intersection_triee(successeurs[u], successeurs[v]):
+                    res[u] += 1
+                    res[v] += 1
+                    res[w] += 1
+
+        return res
+
+    def nombre_triangles(self):
+        """
+        Renvoie le nombre de triangles du graphe.
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 3), (3, 0), (3, 4), (4, 4)])
+        >>> G.nombre_triangles()
+        2
+        """
+        return sum(self.triangles_par_sommet()) // 3
+
+    def coefficients_clustering(self):
+        """
+        Renvoie la liste des coefficients de clustering locaux : pour chaque
+        sommet, la proportion des paires de ses voisins qui sont reliées
+        entre elles (0 s'il a moins de deux voisins).
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 3), (3, 0), (3, 4), (4, 4)])
+        >>> [round(c, 3) for c in G.coefficients_clustering()]
+        [0.667, 1.0, 0.667, 0.333, 0.0]
+        """
+        res = []
+
+        for u, t in enumerate(self.triangles_par_sommet()):
+            d = len(self._liste_adjacence[u]) - (u in self._liste_adjacence[u])
+            res.append(2 * t / (d * (d - 1)) if d >= 2 else 0.0)
+
+        return res
+
+    def transitivite(self):
+        """
+        Renvoie la transitivité du graphe : la proportion des chemins de
+        deux arêtes dont les extrémités sont reliées, soit trois fois le
+        nombre de triangles divisé par le nombre de ces chemins (0 s'il n'y
+        en a pas).
+
+        >>> G = ListeAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 3), (3, 0), (3, 4), (4, 4)])
+        >>> G.transitivite()
+        0.6
+
+        >>> ListeAdjacence(3).transitivite()
+        0.0
+        """
+        chemins = 0
+
+        for u in range(self.nombre_sommets()):
+            d = len(self._liste_adjacence[u]) - (u in self._liste_adjacence[u])
+            chemins += d * (d - 1) // 2
+
+        return sum(self.triangles_par_sommet()) / chemins if chemins > 0 else 0.0
+
 def export_dot(graphe):
     """
     Renvoie une chaîne encodant le graphe au format dot.
@@ -567,6 +727,82 @@ def export_dot(graphe):
 
     return res + "}"
 
+def intersection_triee(a, b):
+    """
+    Renvoie la liste triée des éléments communs aux listes triées a et b, en
+    les parcourant ensemble (fusion) en O(len(a) + len(b)).
+
+    >>> intersection_triee([1, 3, 4, 7, 9], [2, 3, 7, 8, 9])
+    [3, 7, 9]
+
+    >>> intersection_triee([], [1, 2])
+    []
+    """
+    res = []
+    i, j = 0, 0
+
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            res.append(a[i])
+            i += 1
+            j += 1
+
+    return res
+
+def depuis_tableaux(sommets, origines, extremites, poids=None):
+    """
+    Renvoie le graphe sur len(sommets) sommets dont les arêtes relient
+    origines[k] et extremites[k] (les poids sont ignorés). Les tableaux
+    peuvent être des listes, des tableaux du module array ou de numpy.
+
+    >>> G = depuis_tableaux([0, 1, 2, 3], [0, 1], [1, 3])
+    >>> G._liste_adjacence
+    [[1], [0, 3], [], [1]]
+    """
+    G = ListeAdjacence(len(sommets))
+    for k in range(len(origines)):
+        G.ajouter_arete(int(origines[k]), int(extremites[k]))
+    return G
+
+def depuis_csr(sommets, debut, voisins, poids=None):
+    """
+    Renvoie le graphe donné au format CSR (cf. ListeAdjacence.vers_csr).
+
+    >>> G = ListeAdjacence()
+    >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+    >>> depuis_csr(*G.vers_csr())._liste_adjacence == G._liste_adjacence
+    True
+    """
+    origines = [i for i in range(len(sommets)) for _ in range(debut[i], debut[i + 1])]
+    return depuis_tableaux(sommets, origines, voisins, poids)
+
+def depuis_dense(sommets, matrice):
+    """
+    Renvoie le graphe de matrice d'adjacence 'matrice' (rangée ligne par
+    ligne, ou liste de lignes) : chaque valeur non nulle est une arête, et
+    0 signifie « pas d'arête » (une matrice de poids où 0 est un poids
+    valide doit passer par depuis_tableaux).
+
+    >>> G = ListeAdjacence()
+    >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+    >>> depuis_dense(*G.vers_dense())._liste_adjacence == G._liste_adjacence
+    True
+    >>> depuis_dense([0, 1], [[0, 3], [3, 0]])._liste_adjacence
+    [[1], [0]]
+    """
+    n = len(sommets)
+    par_lignes = n > 0 and len(matrice) == n and hasattr(matrice[0], '__len__')
+    G = ListeAdjacence(n)
+    for i in range(n):
+        for j in range(i, n):
+            if (matrice[i][j] if par_lignes else matrice[i * n + j]):
+                G.ajouter_arete(i, j)
+    return G
+
 def main():
     import doctest
     doctest.testmod()
@@ -5,6 +5,8 @@ Implémentation d'un graphe à l'aide d'une matrice d'adjacence. Les n sommets
 sont identifiés par de simples naturels (0, 1, 2, ..., n-1).
 """
 
+from array import array
+
 class MatriceAdjacence(object):
     def __init__(self, num = 0):
         """Initialise un graphe sans arêtes sur num sommets.
@@ -486,6 +488,232 @@ class MatriceAdjacence(object):
 
         return res
 
+    def vers_csr(self):
+        """
+        Renvoie (sommets, debut, voisins, poids) : le graphe au format CSR,
+        dans des tableaux du module array (que numpy lit sans copie). Les
+        voisins du sommet i sont voisins[debut[i]:debut[i + 1]], et tous les
+        poids valent 1.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+        >>> G._matrice_adjacence
+        [[0, 1, 1], [1, 0, 1], [1, 1, 1]]
+
+        >>> sommets, debut, voisins, poids = G.vers_csr()
+        >>> sommets, debut, voisins
+        ([0, 1, 2], array('q', [0, 2, 4, 7]), array('q', [1, 2, 0, 2, 0, 1, 2]))
+
+        >>> MatriceAdjacence().vers_csr()
+        ([], array('q', [0]), array('q'), array('d'))
+        """
+        debut, voisins = array('q', [0]), array('q')
+
+        for ligne in self._matrice_adjacence:
+            voisins.extend(j for j, valeur in enumerate(ligne) if valeur)
+            debut.append(len(voisins))
+
+        return self.sommets(), debut, voisins, array('d', [1]) * len(voisins)
+
+    def vers_tableaux(self):
+        """
+        Renvoie (sommets, origines, extremites, poids) : chaque arête {i, j}
+        une fois, avec origines[k] = i <= extremites[k] = j.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+        >>> G.vers_tableaux()
+        ([0, 1, 2], array('q', [0, 0, 1, 2]), array('q', [1, 2, 2, 2]), array('d', [1.0, 1.0, 1.0, 1.0]))
+        """
+        sommets, debut, voisins, _ = self.vers_csr()
+        origines, extremites = array('q'), array('q')
+
+        for i in sommets:
+            for k in range(debut[i], debut[i + 1]):
+                if i <= voisins[k]:
+                    origines.append(i)
+                    extremites.append(voisins[k])
+
+        return sommets, origines, extremites, array('d', [1]) * len(origines)
+
+    def vers_dense(self):
+        """
+        Renvoie (sommets, matrice) : la matrice d'adjacence de taille n * n,
+        rangée ligne par ligne dans un tableau du module array.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2)])
+        >>> G.vers_dense()
+        ([0, 1, 2], array('d', [0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 0.0]))
+        """
+        sommets, debut, voisins, _ = self.vers_csr()
+        n = len(sommets)
+        matrice = array('d', [0]) * (n * n)
+
+        for i in sommets:
+            for k in range(debut[i], debut[i + 1]):
+                matrice[i * n + voisins[k]] = 1
+
+        return sommets, matrice
+
+    def lignes_binaires(self):
+        """
+        Renvoie les lignes de la matrice sous forme d'entiers : le bit j de
+        la ligne i vaut 1 si l'arête {i, j} existe.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (3, 3)])
+        >>> [bin(ligne) for ligne in G.lignes_binaires()]
+        ['0b10', '0b101', '0b10', '0b1000']
+        """
+        # Chaque ligne de 0 et de 1, renversée, devient l'écriture en base 2 de l'entier
+        chiffres = bytes.maketrans(b"\x00\x01", b"01")
+        res = []
+
+        for ligne in self._matrice_adjacence:
+            res.append(int(bytes(ligne[::-1]).translate(chiffres) or b"0", 2))
+
+        return res
+
+    def fermeture_transitive(self):
+        """
+        Renvoie les lignes binaires (cf. lignes_binaires) de la fermeture
+        transitive : le bit j de la ligne i vaut 1 s'il existe un chemin d'au
+        moins une arête de i à j. C'est l'algorithme de Warshall, où chaque
+        ligne est mise à jour d'un bloc par un OU entre entiers.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (3, 4)])
+        >>> [indices_bits(ligne) for ligne in G.fermeture_transitive()]
+        [[0, 1, 2], [0, 1, 2], [0, 1, 2], [3, 4], [3, 4]]
+
+        >>> MatriceAdjacence(2).fermeture_transitive()
+        [0, 0]
+        """
+        lignes = self.lignes_binaires()
+
+        for k in range(len(lignes)):
+            bit, ligne_k = 1 << k, lignes[k]
+            for i in range(len(lignes)):
+                if lignes[i] & bit:
+                    lignes[i] |= ligne_k
+
+        return lignes
+
+    def nombre_marches(self, k):
+        """
+        Renvoie la matrice (liste de lignes) des nombres de marches de
+        longueur k : la case (i, j) compte les suites de k arêtes qui mènent
+        de i à j. La puissance k de la matrice est calculée par exponentiation
+        rapide ; chaque ligne est rangée dans un seul entier, par champs assez
+        larges pour ne jamais déborder, si bien qu'un produit ne coûte que n²
+        multiplications d'un nombre par une ligne entière.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0)])
+        >>> G.nombre_marches(2)
+        [[2, 1, 1], [1, 2, 1], [1, 1, 2]]
+
+        >>> G.nombre_marches(5)[0]
+        [10, 11, 11]
+
+        >>> G.nombre_marches(0)
+        [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+
+        >>> G.nombre_marches(-1)
+        Traceback (most recent call last):
+        ...
+        ValueError: longueur de marche négative : -1
+        """
+        if k < 0:
+            raise ValueError("longueur de marche négative : " + str(k))
+
+        n = self.nombre_sommets()
+        degre_max = max([sum(ligne) for ligne in self._matrice_adjacence] + [1])
+        # Aucune case de A^k ne dépasse degre_max^k
+        largeur = (degre_max ** k).bit_length() + 1
+        masque = (1 << largeur) - 1
+
+        def produit(P, Q):
+            res = []
+            for ligne in P:
+                somme, j = 0, 0
+                while ligne:
+                    case = ligne & masque
+                    if case:
+                        somme += case * Q[j]
+                    ligne >>= largeur
+                    j += 1
+                res.append(somme)
+            return res
+
+        puissance = [sum(case << (j * largeur) for j, case in enumerate(ligne)) for ligne in self._matrice_adjacence]
+        res = [1 << (i * largeur) for i in range(n)]
+
+        while k > 0:
+            if k & 1:
+                res = produit(res, puissance)
+            k >>= 1
+            if k > 0:
+                puissance = produit(puissance, puissance)
+
+        return [[(ligne >> (j * largeur)) & masque for j in range(n)] for ligne in res]
+
+    def accessibles(self, sommet, k, lignes=None):
+        """
+        Renvoie la liste des sommets à au plus k arêtes du sommet donné (lui
+        compris) : son vecteur ligne est multiplié k fois par la matrice I + A
+        en logique booléenne, chaque produit étant un OU des lignes binaires
+        des sommets atteints à l'étape précédente. Pour plusieurs requêtes sur
+        le même graphe, on peut passer les lignes binaires (cf.
+        lignes_binaires), calculées une seule fois, au lieu de les refaire à
+        chaque appel.
+
+        >>> G = MatriceAdjacence()
+        >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 3), (5, 5)])
+        >>> G.accessibles(0, 2)
+        [0, 1, 2]
+
+        >>> G.accessibles(3, 10)
+        [0, 1, 2, 3]
+
+        >>> G.accessibles(4, 1)
+        [4]
+
+        >>> G.accessibles(6, 1)
+        []
+
+        >>> lignes = G.lignes_binaires()
+        >>> [G.accessibles(s, 1, lignes) for s in range(4)]
+        [[0, 1], [0, 1, 2], [1, 2, 3], [2, 3]]
+
+        >>> G.accessibles(0, -1)
+        Traceback (most recent call last):
+        ...
+        ValueError: longueur de marche négative : -1
+        """
+        if k < 0:
+            raise ValueError("longueur de marche négative : " + str(k))
+
+        if not self.contient_sommet(sommet):
+            return []
+
+        if lignes is None:
+            lignes = self.lignes_binaires()
+        atteints = frontiere = 1 << sommet
+
+        for _ in range(k):
+            suivants = 0
+            for j in indices_bits(frontiere):
+                suivants |= lignes[j]
+
+            frontiere = suivants & ~atteints
+            if not frontiere:
+                break
+            atteints |= frontiere
+
+        return indices_bits(atteints)
+
 def export_dot(graphe):
     """
     Renvoie une chaîne encodant le graphe au format dot.
@@ -546,6 +774,75 @@ def export_dot(graphe):
 
     return res + "}"
 
+def indices_bits(entier):
+    """
+    Renvoie la liste croissante des positions des bits à 1 de l'entier.
+
+    >>> indices_bits(0b101001)
+    [0, 3, 5]
+
+    >>> indices_bits(0)
+    []
+    """
+    res = []
+
+    while entier:
+        bit = entier & -entier
+        res.append(bit.bit_length() - 1)
+        entier ^= bit
+
+    return res
+
+def depuis_tableaux(sommets, origines, extremites, poids=None):
+    """
+    Renvoie le graphe sur len(sommets) sommets dont les arêtes relient
+    origines[k] et extremites[k] (les poids sont ignorés). Les tableaux
+    peuvent être des listes, des tableaux du module array ou de numpy.
+
+    >>> G = depuis_tableaux([0, 1, 2, 3], [0, 1], [1, 3])
+    >>> G._matrice_adjacence
+    [[0, 1, 0, 0], [1, 0, 0, 1], [0, 0, 0, 0], [0, 1, 0, 0]]
+    """
+    G = MatriceAdjacence(len(sommets))
+    for k in range(len(origines)):
+        G.ajouter_arete(int(origines[k]), int(extremites[k]))
+    return G
+
+def depuis_csr(sommets, debut, voisins, poids=None):
+    """
+    Renvoie le graphe donné au format CSR (cf. MatriceAdjacence.vers_csr).
+
+    >>> G = MatriceAdjacence()
+    >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+    >>> depuis_csr(*G.vers_csr())._matrice_adjacence == G._matrice_adjacence
+    True
+    """
+    origines = [i for i in range(len(sommets)) for _ in range(debut[i], debut[i + 1])]
+    return depuis_tableaux(sommets, origines, voisins, poids)
+
+def depuis_dense(sommets, matrice):
+    """
+    Renvoie le graphe de matrice d'adjacence 'matrice' (rangée ligne par
+    ligne, ou liste de lignes) : chaque valeur non nulle est une arête, et
+    0 signifie « pas d'arête » (une matrice de poids où 0 est un poids
+    valide doit passer par depuis_tableaux).
+
+    >>> G = MatriceAdjacence()
+    >>> G.ajouter_aretes([(0, 1), (1, 2), (2, 0), (2, 2)])
+    >>> depuis_dense(*G.vers_dense())._matrice_adjacence == G._matrice_adjacence
+    True
+    >>> depuis_dense([0, 1], [[0, 3], [3, 0]])._matrice_adjacence
+    [[0, 1], [1, 0]]
+    """
+    n = len(sommets)
+    par_lignes = n > 0 and len(matrice) == n and hasattr(matrice[0], '__len__')
+    G = MatriceAdjacence(n)
+    for i in range(n):
+        for j in range(i, n):
+            if (matrice[i][j] if par_lignes else matrice[i * n + j]):
+                G.ajouter_arete(i, j)
+    return G
+
 def main():
     import doctest
     doctest.testmod()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from array import array
+
 class Graphe(object):
     def __init__(self):
         """
@@ -131,6 +133,127 @@ class Graphe(object):
                     return poids
         return 0
 
+    def vers_csr(self):
+        """Renvoie (sommets, debut, voisins, poids) : le graphe au format CSR,
+        dans des tableaux du module array (que numpy lit sans copie). Les
+        voisins de sommets[i] sont voisins[debut[i]:debut[i + 1]] (indices
+        dans 'sommets', croissants) ; entre deux sommets reliés plusieurs
+        fois, on garde le plus petit poids.
+
+        >>> G = Graphe()
+        >>> G.ajouter_aretes([('a', 'b', 3), ('b', 'c', 1), ('a', 'b', 2)])
+        >>> G.vers_csr()
+        (['a', 'b', 'c'], array('q', [0, 1, 3, 4]), array('q', [1, 0, 2, 1]), array('d', [2.0, 2.0, 1.0, 1.0]))
+        """
+        sommets = list(self.dictionnaire)
+        indices = { s: i for i, s in enumerate(sommets) }
+        debut, voisins, poids = array('q', [0]), array('q'), array('d')
+
+        for u in sommets:
+            poids_voisins = dict()
+            for v, p in self.dictionnaire[u]:
+                j = indices[v]
+                poids_voisins[j] = min(p, poids_voisins.get(j, p))
+            for j in sorted(poids_voisins):
+                voisins.append(j)
+                poids.append(poids_voisins[j])
+            debut.append(len(voisins))
+
+        return sommets, debut, voisins, poids
+
+    def vers_tableaux(self):
+        """Renvoie (sommets, origines, extremites, poids) : chaque arête une
+        fois, de sommets[origines[k]] à sommets[extremites[k]] avec
+        origines[k] <= extremites[k].
+
+        >>> G = Graphe()
+        >>> G.ajouter_aretes([('a', 'b', 3), ('b', 'c', 1), ('a', 'b', 2)])
+        >>> G.vers_tableaux()
+        (['a', 'b', 'c'], array('q', [0, 1]), array('q', [1, 2]), array('d', [2.0, 1.0]))
+        """
+        sommets, debut, voisins, poids = self.vers_csr()
+        origines, extremites, poids_aretes = array('q'), array('q'), array('d')
+        for i in range(len(sommets)):
+            for k in range(debut[i], debut[i + 1]):
+                if i <= voisins[k]:
+                    origines.append(i)
+                    extremites.append(voisins[k])
+                    poids_aretes.append(poids[k])
+        return sommets, origines, extremites, poids_aretes
+
+    def vers_dense(self):
+        """Renvoie (sommets, matrice) : la matrice d'adjacence pondérée, de
+        taille n * n rangée ligne par ligne (0 sans arête : une arête de
+        poids 0 n'y apparaît pas, cf. depuis_dense).
+
+        >>> G = Graphe()
+        >>> G.ajouter_aretes([('a', 'b', 3), ('b', 'c', 1), ('a', 'b', 2)])
+        >>> G.vers_dense()
+        (['a', 'b', 'c'], array('d', [0.0, 2.0, 0.0, 2.0, 0.0, 1.0, 0.0, 1.0, 0.0]))
+        """
+        sommets, debut, voisins, poids = self.vers_csr()
+        n = len(sommets)
+        matrice = array('d', [0]) * (n * n)
+        for i in range(n):
+            for k in range(debut[i], debut[i + 1]):
+                matrice[i * n + voisins[k]] = poids[k]
+        return sommets, matrice
+
+def depuis_tableaux(sommets, origines, extremites, poids=None):
+    """Renvoie le Graphe des sommets donnés dont les arêtes relient
+    sommets[origines[k]] et sommets[extremites[k]], de poids poids[k] (1 si
+    les poids ne sont pas donnés).
+
+    >>> G = depuis_tableaux(['a', 'b', 'c', 'd'], [0, 1], [1, 3])
+    >>> sorted(G.aretes()), sorted(G.sommets())
+    ([('a', 'b', 1), ('b', 'd', 1)], ['a', 'b', 'c', 'd'])
+    >>> sorted(depuis_tableaux(['a', 'b'], [0], [1], [0]).aretes())
+    [('a', 'b', 0)]
+    """
+    G = Graphe()
+    G.ajouter_sommets(sommets)
+    for k in range(len(origines)):
+        G.ajouter_arete(sommets[origines[k]], sommets[extremites[k]], 1 if poids is None else poids[k])
+    return G
+
+def depuis_csr(sommets, debut, voisins, poids=None):
+    """Renvoie le Graphe donné au format CSR (cf. Graphe.vers_csr).
+
+    >>> G = Graphe()
+    >>> G.ajouter_aretes([('a', 'b', 2), ('b', 'c', 1), ('c', 'c', 4)])
+    >>> depuis_csr(*G.vers_csr()).aretes() == G.aretes()
+    True
+    """
+    origines = [i for i in range(len(sommets)) for _ in range(debut[i], debut[i + 1])]
+    return depuis_tableaux(sommets, origines, voisins, poids)
+
+def depuis_dense(sommets, matrice):
+    """Renvoie le Graphe de matrice d'adjacence 'matrice' (rangée ligne par
+    ligne, ou liste de lignes) : chaque valeur non nulle est le poids d'une
+    arête. Comme 0 signifie « pas d'arête », une arête de poids 0 est
+    perdue : il faut alors passer par depuis_tableaux ou depuis_csr.
+
+    >>> G = Graphe()
+    >>> G.ajouter_aretes([('a', 'b', 2), ('b', 'c', 1), ('c', 'c', 4)])
+    >>> depuis_dense(*G.vers_dense()).aretes() == G.aretes()
+    True
+    >>> sorted(depuis_dense(['a', 'b'], [[0, 5], [5, 0]]).aretes())
+    [('a', 'b', 5)]
+    >>> G = depuis_tableaux(['a', 'b'], [0], [1], [0])
+    >>> depuis_dense(*G.vers_dense()).aretes()
+    set()
+    """
+    n = len(sommets)
+    par_lignes = n > 0 and len(matrice) == n and hasattr(matrice[0], '__len__')
+    G = Graphe()
+    G.ajouter_sommets(sommets)
+    for i in range(n):
+        for j in range(i, n):
+            valeur = matrice[i][j] if par_lignes else matrice[i * n + j]
+            if valeur:
+                G.ajouter_arete(sommets[i], sommets[j], valeur)
+    return G
+
 ##################################################################################################
 
 class Tas(object):
@@ -200,10 +323,17 @@ class Tas(object):
 
 class UnionFind(object):
     """Implémentation de la structure de données Union-Find."""
-    def __init__(self, ensemble):
+    def __init__(self, ensemble, compter=False):
         """Initialisation des structures de données nécessaires."""
         self.parents = dict()
         self.ranks = dict()
+        # Nombre d'appels à find et de raccourcissements de chemin, pour l'instrumentation : ils ne sont
+        # comptés que si compter est vrai (find est alors remplacée par find_comptee), sinon find ne fait
+        # rien de plus
+        self.nombre_find = 0
+        self.nombre_compressions = 0
+        if compter:
+            self.find = self.find_comptee
 
         for s in ensemble:
             self.parents[s] = s
@@ -216,6 +346,18 @@ class UnionFind(object):
         
         return self.parents[element]
 
+    def find_comptee(self, element):
+        """Cf. find, en comptant les appels et les raccourcissements de chemin."""
+        self.nombre_find += 1
+
+        if (element != self.parents[element]):
+            racine = self.find(self.parents[element])
+            if racine != self.parents[element]:
+                self.parents[element] = racine
+                self.nombre_compressions += 1
+        
+        return self.parents[element]
+
     def union(self, premier, second):
         """Fusionne les classes contenant les deux éléments donnés."""
         i = self.find(premier)
@@ -232,14 +374,24 @@ class UnionFind(object):
 
 ##################################################################################################
 
-def acpm_kruskal(G):
-    foret = type(G)()
-    classes = UnionFind(list(G.sommets())) 
+def graphe_vide(G):
+    """Renvoie un graphe vide du même type que G, ou un Graphe si G est en lecture seule (sans
+    ajouter_arete, comme le GraphePartage du projet)."""
+    return type(G)() if hasattr(G, "ajouter_arete") else Graphe()
+
+def acpm_kruskal(G, compteurs=None):
+    foret = graphe_vide(G)
+    classes = UnionFind(list(G.sommets()), compteurs is not None) 
 
     for u, v, p in sorted(G.aretes(), key=lambda tuple:tuple[2]):
         if classes.find(u) != classes.find(v):
             foret.ajouter_arete(u, v, p)
             classes.union(classes.find(u), classes.find(v))
+
+    # 'compteurs' est un objet qui a une méthode incrementer(nom, valeur), cf. instrumentation.py dans le projet
+    if compteurs is not None:
+        compteurs.incrementer("union_find.find", classes.nombre_find)
+        compteurs.incrementer("union_find.compressions", classes.nombre_compressions)
     
     return foret
 
@@ -250,19 +402,29 @@ def stocker_aretes_valides(G, u, S, hors_arbre):
         if hors_arbre[v]:
             S.inserer((G.poids_arete(u, v), u, v))
 
-def extraire_arete_sure(S, hors_arbre):
+def extraire_arete_sure(S, hors_arbre, compteurs=None):
+    perimees = 0
+
     while S.pas_vide():
         p, u, v = S.extraire_minimum()
 
         if hors_arbre[u] != hors_arbre[v]:
-            return u, v, p
+            break
+
+        # Les deux extrémités sont déjà dans l'arbre : l'entrée du tas est périmée
+        perimees += 1
+    else:
+        u, v, p = None, None, float('inf')
+
+    if compteurs is not None and perimees > 0:
+        compteurs.incrementer("prim.entrees_perimees", perimees)
 
-    return None, None, float('inf')
+    return u, v, p
 
 ################################
 
-def acpm_prim(G, depart):
-    arbre = type(G)()
+def acpm_prim(G, depart, compteurs=None):
+    arbre = graphe_vide(G)
     arbre.ajouter_sommet(depart)
     
     hors_arbre = dict()
@@ -274,7 +436,7 @@ def acpm_prim(G, depart):
     stocker_aretes_valides(G, depart, candidates, hors_arbre)
 
     while True:
-        u, v, p = extraire_arete_sure(candidates, hors_arbre)
+        u, v, p = extraire_arete_sure(candidates, hors_arbre, compteurs)
 
         if u == None:
             return arbre
@@ -290,9 +452,9 @@ def acpm_prim(G, depart):
 
 ################################
 
-def fcpm_prim(G):
+def fcpm_prim(G, compteurs=None):
     depart = list(G.sommets())[0]
-    arbre = type(G)()
+    arbre = graphe_vide(G)
     arbre.ajouter_sommet(depart)
     
     hors_arbre = dict()
@@ -305,7 +467,7 @@ def fcpm_prim(G):
     nouvelle_boucle = False # Pour savoir si on doit relancer le while depuis le début (lorsqu'on relance la boucle sur un nouveau sommet)
     
     while True:
-        u, v, p = extraire_arete_sure(candidates, hors_arbre)
+        u, v, p = extraire_arete_sure(candidates, hors_arbre, compteurs)
 
         if u == None:
             all_false = True
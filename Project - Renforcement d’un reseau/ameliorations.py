@@ -2,18 +2,34 @@
 # -*- coding: utf-8 -*-
 
 from graphe import *
+from centralite import *
+from distances import *
+from itineraires import *
+from profilage import *
+from instrumentation import *
+from index_noms import *
+from flots import *
+from composantes import composantes_connexes, par_composante
+from excentricites import excentricites_extremes
 from math import inf
 from os import listdir
 from os.path import isfile, join
+from contextlib import nullcontext, redirect_stdout
+from io import StringIO
 import argparse
+import csv
+import json
+import sys
 
 ######################################################################################################
 
-def charger_donnees(graphe, fichier):
+def lire_donnees(fichier, dossier="./donnees/"):
+    stations = []
+    connexions = []
     ajoute_sommet = False
     ajouter_arete = False
 
-    with open("./donnees/" + fichier, "r") as file:
+    with open(join(dossier, fichier), "r") as file:
         for ligne in file:
             if ("stations" in ligne):
                 ajoute_sommet = True
@@ -27,16 +43,32 @@ def charger_donnees(graphe, fichier):
             
             if ajoute_sommet:
                 ligne = ligne.split(':')
-                graphe.ajouter_sommet(int(ligne[0]))
-                graphe.ajouter_nom(int(ligne[0]), ligne[1].replace('\n', ''))
+                stations.append((int(ligne[0]), ligne[1].replace('\n', '')))
 
             elif ajouter_arete:
                 ligne = ligne.split('/')
-                graphe.ajouter_arete(int(ligne[0]), int(ligne[1]), fichier.replace(".txt", ''))
+                # Le 3ème champ d'une connexion (s'il existe) est le temps de trajet entre les 2 stations
+                connexions.append((int(ligne[0]), int(ligne[1]), int(ligne[2]) if len(ligne) > 2 else None))
+
+    return stations, connexions
+
+def charger_donnees(graphe, fichier, dossier="./donnees/", profileur=None):
+    with phase(profileur, "lecture " + fichier):
+        stations, connexions = lire_donnees(fichier, dossier)
+
+    with phase(profileur, "construction du graphe"):
+        for s, nom in stations:
+            graphe.ajouter_sommet(s)
+            graphe.ajouter_nom(s, nom)
+
+        for u, v, temps in connexions:
+            graphe.ajouter_arete(u, v, fichier.replace(".txt", ''))
+            if temps is not None:
+                graphe.ajouter_temps(u, v, temps)
 
 ######################################################################################################
 
-def numerotations(G):
+def numerotations(G, compteurs=None):
     debut = dict()
     parent = dict()
     ancetre = dict()
@@ -48,46 +80,64 @@ def numerotations(G):
 
     instant = 0
 
-    def numerotation_recursive(s):
-        nonlocal debut
-        nonlocal parent
-        nonlocal ancetre
+    # Parcours en profondeur avec une pile explicite (au lieu d'appels récursifs) pour ne pas dépasser la limite
+    # de récursion de Python sur les grands réseaux. Chaque élément de la pile contient un sommet et l'itérateur
+    # sur ses voisins restant à visiter, ce qui donne exactement le même parcours que la version récursive.
+    def numerotation_iterative(racine):
         nonlocal instant
 
         instant += 1
-        debut[s] = ancetre[s] = instant
+        debut[racine] = ancetre[racine] = instant
+        pile = [(racine, iter(G.voisins(racine)))]
 
-        for t, _ in G.voisins(s):
-            if debut[t]:
-                if parent[s] != t:
-                    ancetre[s] = min(ancetre[s], debut[t])
-            
+        while pile:
+            s, voisins = pile[-1]
+
+            for t, _ in voisins:
+                if debut[t]:
+                    if parent[s] != t:
+                        ancetre[s] = min(ancetre[s], debut[t])
+
+                else:
+                    parent[t] = s
+                    instant += 1
+                    debut[t] = ancetre[t] = instant
+                    pile.append((t, iter(G.voisins(t))))
+                    break
+
+            # Si on a visité tous les voisins de 's', on remonte vers son parent
             else:
-                parent[t] = s
-                numerotation_recursive(t)
-                ancetre[s] = min(ancetre[s], ancetre[t])
+                pile.pop()
+                if pile:
+                    ancetre[pile[-1][0]] = min(ancetre[pile[-1][0]], ancetre[s])
     
     if (G.nombre_sommets() > 0):
         # # La racine choisit sera toujours le 1er sommet de G.sommets(). Pour varier les résultats, on peut choisir de façon aléatoire la racine dans G.sommets() de cette façon :
         # import random
-        # numerotation_recursive(random.choice(tuple(G.sommets())))
-        numerotation_recursive(next(iter(G.sommets())))
+        # numerotation_iterative(random.choice(tuple(G.sommets())))
+        numerotation_iterative(next(iter(G.sommets())))
 
     for v in G.sommets():
         if debut[v] == 0:
-            numerotation_recursive(v)
+            numerotation_iterative(v)
+
+    # Chaque liste de voisins est parcourue exactement une fois : on compte les arêtes examinées après coup
+    if compteurs is not None:
+        compteurs.incrementer("numerotations.sommets_visites", len(debut))
+        compteurs.incrementer("numerotations.aretes_examinees", sum(len(G.voisins(s)) for s in debut))
 
     return debut, parent, ancetre
 
 ######################################################################################################
 
-def points_articulation(G):
-    debut, parent, ancetre = numerotations(G)
+def points_articulation(G, compteurs=None):
+    debut, parent, ancetre = numerotations(G, compteurs)
     articulations = set()
     racines = { r for r in parent if parent[r] == None}
 
+    # Les connexions parallèles (une par ligne) vers un même enfant ne comptent qu'une fois
     def degre_sortant(s, parent, G):
-        return sum(1 for v, _ in G.voisins(s) if parent[v] == s)
+        return len({ v for v, _ in G.voisins(s) if parent[v] == s })
 
     for depart in racines:
         if degre_sortant(depart, parent, G) >= 2:
@@ -101,8 +151,8 @@ def points_articulation(G):
 
 ######################################################################################################
 
-def ponts(G):
-    debut, parent, ancetre = numerotations(G)
+def ponts(G, compteurs=None):
+    debut, parent, ancetre = numerotations(G, compteurs)
     ponts = set()
     
     for v in G.sommets():
@@ -113,9 +163,52 @@ def ponts(G):
 
 ######################################################################################################
 
-def amelioration_ponts(G):
+def impact_fermetures(G, compteurs=None):
+    debut, parent, ancetre = numerotations(G, compteurs)
+    impacts = dict()
+    enfants = { s: [] for s in debut }
+    taille = { s: 1 for s in debut }
+    racine = dict()
+
+    # Les valeurs de 'debut' vont de 1 à n sans trou : on range les sommets par instant de découverte sans avoir besoin de trier
+    ordre = [None] * (len(debut) + 1)
+    for s in debut:
+        ordre[debut[s]] = s
+
+    # Dans l'ordre de découverte, le parent est toujours traité avant ses descendants : on récupère la racine de chaque sommet
+    for s in ordre[1:]:
+        if parent[s] is None:
+            racine[s] = s
+        else:
+            racine[s] = racine[parent[s]]
+            enfants[parent[s]].append(s)
+
+    # Dans l'ordre inverse, les descendants sont traités avant leur parent : on calcule la taille de chaque sous-arbre
+    for s in reversed(ordre[1:]):
+        if parent[s] is not None:
+            taille[parent[s]] += taille[s]
+
+    nombre_composantes = sum(1 for s in parent if parent[s] is None)
+
+    # Si on ferme 's', chaque descendant 'd' tel que ancetre[d] >= debut[s] se retrouve coupé avec tout son sous-arbre
+    # (pour une racine, tous ses descendants le sont), et le reste de la composante forme un dernier morceau
+    for s in ordre[1:]:
+        if parent[s] is None:
+            morceaux = [taille[d] for d in enfants[s]]
+        else:
+            morceaux = [taille[d] for d in enfants[s] if ancetre[d] >= debut[s]]
+            morceaux.append(taille[racine[s]] - 1 - sum(morceaux))
+
+        impacts[s] = (nombre_composantes - 1 + len(morceaux), sorted(morceaux, reverse=True))
+
+    return impacts
+
+######################################################################################################
+
+def amelioration_ponts(G, compteurs=None):
     feuilles = []
-    ponts_G = ponts(G)
+    ponts_G = ponts(G, compteurs)
+    expansions = 0
 
     # Si on a qu'1 seul pont, on relie une des extremités du pont à un des descendants de l'autre extremité
     if len(ponts_G) == 1:
@@ -132,6 +225,7 @@ def amelioration_ponts(G):
         return []
 
     def est_une_feuille(p0, p1, ponts, G):
+        nonlocal expansions
         sommets = set()
         sommets.add(p0)
         
@@ -139,6 +233,10 @@ def amelioration_ponts(G):
             nouveaux_sommets = set()
             
             # Pour chaque sommet dans 'sommets', on ajoute ses voisins dans 'nouveaux_sommets' s'il n'est pas déjà dans 'sommets' et qu'il est différent de p1 (= l'autre extremité du pont (p0, p1))
+            # On compte les sommets de chaque niveau exploré, seulement si on a des compteurs
+            if compteurs is not None:
+                expansions += len(sommets)
+
             for s in sommets:
                 for v, _ in G.voisins(s):
                     if (v != p1) and (v not in sommets):
@@ -163,16 +261,20 @@ def amelioration_ponts(G):
         if est_une_feuille(p1, p0, ponts_G, G):
             feuilles.append(p1)
 
+    if compteurs is not None:
+        compteurs.incrementer("feuilles.tests", 2 * len(ponts_G))
+        compteurs.incrementer("feuilles.expansions", expansions)
+
     # Puis on relie chaque feuille à la feuille suivante dans la liste de "feuilles", et on renvoie cette nouvelle liste
     return [[feuilles[i], feuilles[i + 1]] for i in range(len(feuilles) - 1)]
 
 ######################################################################################################
 
-def amelioration_points_articulation(G):
+def amelioration_points_articulation(G, compteurs=None):
     aretes = []
     articulations = dict()
     articulations_triees = dict()
-    debut, parent, ancetre = numerotations(G)
+    debut, parent, ancetre = numerotations(G, compteurs)
     racines = { r for r in parent if parent[r] == None}
 
     # Ajoute les points d'articulations et leur(s) descendant(s) qui provoque(nt) le point d'articulation dans le dictionnaire 'articulations' (clé = point d'articulation, valeur = le set du (des) descendant(s))
@@ -239,19 +341,178 @@ def amelioration_points_articulation(G):
 
 ######################################################################################################
 
-def charger_ligne(G, type, lignes):
+def feuilles_ponts(G, compteurs=None):
+    """Renvoie la liste des composantes 2-arête-connexes feuilles de G (celles qui ne sont reliées au reste
+    que par un seul pont), sous forme de couples (stations, pont) où pont = (p, q) avec p dans la composante."""
+    ponts_G = ponts(G, compteurs)
+    coupees = { (u, v) for u, v in ponts_G } | { (v, u) for u, v in ponts_G }
+    composante = dict()
+    composantes = []
+
+    # Les composantes 2-arête-connexes sont les composantes connexes de G privé de ses ponts
+    for s in G.sommets():
+        if s not in composante:
+            composante[s] = len(composantes)
+            file = [s]
+            for u in file:
+                for v, _ in G.voisins(u):
+                    if v not in composante and (u, v) not in coupees:
+                        composante[v] = composante[s]
+                        file.append(v)
+            composantes.append(file)
+
+    ponts_composante = [[] for _ in composantes]
+    for u, v in ponts_G:
+        ponts_composante[composante[u]].append((u, v))
+        ponts_composante[composante[v]].append((v, u))
+
+    return [(composantes[c], ponts_composante[c][0]) for c in range(len(composantes)) if len(ponts_composante[c]) == 1]
+
+def feuilles_articulations(G, compteurs=None):
+    """Renvoie la liste des blocs (composantes 2-connexes) feuilles de G, ceux qui ne contiennent qu'un seul
+    point d'articulation, sous forme de couples (stations, articulation) où stations est la liste de leurs
+    stations autres que ce point d'articulation."""
+    debut, parent, ancetre = numerotations(G, compteurs)
+    racines = { r for r in parent if parent[r] is None }
+    articulations = { r for r in racines if len({ v for v, _ in G.voisins(r) if parent[v] == r }) >= 2 }
+    articulations |= { parent[v] for v in parent if parent[v] is not None and parent[v] not in racines and ancetre[v] >= debut[parent[v]] }
+
+    ordre = [None] * (len(debut) + 1)
+    for s in debut:
+        ordre[debut[s]] = s
+
+    # Dans l'ordre de découverte, un sommet ouvre un nouveau bloc (rattaché à son parent) si son sous-arbre ne
+    # remonte pas au-dessus de son parent, et appartient sinon au bloc de son parent
+    bloc = dict()
+    rattachement = []
+    for s in ordre[1:]:
+        p = parent[s]
+        if p is not None:
+            if ancetre[s] >= debut[p]:
+                bloc[s] = len(rattachement)
+                rattachement.append(p)
+            else:
+                bloc[s] = bloc[p]
+
+    membres = [[p] for p in rattachement]
+    for s in bloc:
+        membres[bloc[s]].append(s)
+
+    feuilles = []
+    for stations in membres:
+        coupures = [s for s in stations if s in articulations]
+        if len(coupures) == 1:
+            feuilles.append(([s for s in stations if s != coupures[0]], coupures[0]))
+
+    return feuilles
+
+def relier_feuilles(adjacence, feuilles):
+    """Renvoie les arêtes (a, b, coût) d'un arbre couvrant de poids minimal du graphe complet des distances
+    entre les feuilles (chacune étant un ensemble de stations), a et b étant les stations les plus proches
+    de deux feuilles. L'arbre est calculé par la méthode de Mehlhorn : un seul Dijkstra depuis toutes les
+    feuilles à la fois partage les stations entre les feuilles les plus proches, chaque connexion entre deux
+    parts donne un chemin entre leurs feuilles, et on garde l'arbre couvrant minimal de ces chemins (Kruskal),
+    qui est aussi celui du graphe complet des distances. Il n'y a qu'un arbre par composante connexe."""
+    feuille = { s: i for i, stations in enumerate(feuilles) for s in stations }
+    distance, origine = dijkstra_sources(adjacence, feuille)
+
+    candidats = []
+    for u in distance:
+        for v, poids in adjacence[u].items():
+            if feuille[origine[u]] < feuille[origine[v]]:
+                candidats.append((distance[u] + poids + distance[v], origine[u], origine[v]))
+    candidats.sort(key=lambda candidat: candidat[0])
+
+    representant = list(range(len(feuilles)))
+    def trouver(i):
+        while representant[i] != i:
+            representant[i] = representant[representant[i]]
+            i = representant[i]
+        return i
+
+    aretes = []
+    for cout, a, b in candidats:
+        i, j = trouver(feuille[a]), trouver(feuille[b])
+        if i != j:
+            representant[i] = j
+            aretes.append((a, b, cout))
+
+    return aretes
+
+def amelioration_ponts_economique(G, compteurs=None, cout="temps"):
+    """Comme amelioration_ponts, mais en choisissant des arêtes de faible coût : le coût d'une arête est le
+    temps de trajet (cout="temps") ou le nombre de connexions (cout="sauts") entre ses extrémités dans le
+    réseau actuel. Relier toutes les feuilles par un arbre (cf. relier_feuilles) élimine tous les ponts :
+    chaque pont sépare des feuilles que l'arbre relie. Cet arbre est l'ensemble de coût minimal parmi ceux
+    qui relient toutes les feuilles, en particulier moins cher que toute chaîne de feuilles.
+
+    Renvoie les arêtes, leur coût total et un minorant du coût de n'importe quelle solution : chaque feuille
+    doit être reliée à une station hors de la feuille, donc au moins au-delà de son pont, et une arête sert
+    au plus à deux feuilles."""
+    adjacence = G.adjacence(ponderee=(cout == "temps"))
+    feuilles = feuilles_ponts(G, compteurs)
+    aretes = []
+    total = 0
+
+    for a, b, c in relier_feuilles(adjacence, [stations for stations, _ in feuilles]):
+        # Seul cas où les deux stations sont déjà voisines : deux feuilles reliées par un pont (aucune autre
+        # composante entre elles). On remplace alors une extrémité par la station la plus proche de sa feuille.
+        if b in adjacence[a]:
+            stations_a = next(stations for stations, _ in feuilles if a in stations)
+            stations_b = next(stations for stations, _ in feuilles if b in stations)
+            if len(stations_b) == 1 and len(stations_a) == 1:
+                continue
+            if len(stations_b) == 1:
+                a, b, stations_b = b, a, stations_a
+
+            distance = dijkstra(adjacence, b)
+            b_proche = min((s for s in stations_b if s != b), key=lambda s: distance[s])
+            c += distance[b_proche]
+            b = b_proche
+
+        aretes.append([a, b])
+        total += c
+
+    minorant = sum(adjacence[p][q] for _, (p, q) in feuilles) / 2
+    return aretes, total, minorant
+
+def amelioration_points_articulation_economique(G, compteurs=None, cout="temps"):
+    """Comme amelioration_points_articulation, mais en choisissant des arêtes de faible coût (cf.
+    amelioration_ponts_economique). Les feuilles sont les blocs qui ne contiennent qu'un point d'articulation,
+    privés de celui-ci : les relier toutes par un arbre (sans passer par aucun point d'articulation) élimine
+    tous les points d'articulation, car chacun sépare des feuilles que l'arbre relie.
+
+    Renvoie les arêtes, leur coût total et un minorant du coût de n'importe quelle solution : chaque feuille
+    doit être reliée à une station hors du bloc, et tout chemin qui en sort passe par son point d'articulation."""
+    adjacence = G.adjacence(ponderee=(cout == "temps"))
+    feuilles = feuilles_articulations(G, compteurs)
+    arbre = relier_feuilles(adjacence, [stations for stations, _ in feuilles])
+    aretes = [[a, b] for a, b, _ in arbre]
+    total = sum(c for _, _, c in arbre)
+
+    minorant = 0
+    for stations, articulation in feuilles:
+        dedans = set(stations)
+        minorant += min(poids for v, poids in adjacence[articulation].items() if v in dedans)
+        minorant += min(poids for v, poids in adjacence[articulation].items() if v not in dedans)
+
+    return aretes, total, minorant / 2
+
+######################################################################################################
+
+def charger_ligne(G, type, lignes, dossier="./donnees/", profileur=None):
     # Si on veut charger toutes les lignes
     if lignes == []:
         print("Chargement de toutes les lignes de " + type.lower() + " ...", end = '')
 
         if type == "METRO":
-            fichiers = [f for f in listdir("./donnees/") if isfile(join("./donnees/", f)) and f[0:5] == "METRO"]
+            fichiers = [f for f in listdir(dossier) if isfile(join(dossier, f)) and f[0:5] == "METRO"]
 
         elif type == "RER":
-            fichiers = [f for f in listdir("./donnees/") if isfile(join("./donnees/", f)) and f[0:3] == "RER"]
+            fichiers = [f for f in listdir(dossier) if isfile(join(dossier, f)) and f[0:3] == "RER"]
 
         for f in fichiers:
-            charger_donnees(G, f)
+            charger_donnees(G, f, dossier, profileur)
 
         print(" terminé.")
 
@@ -264,8 +525,8 @@ def charger_ligne(G, type, lignes):
         for ligne in reversed(lignes):
             station = type + "_" + ligne + ".txt"
 
-            if isfile(join("./donnees", station)):
-                charger_donnees(G, station)
+            if isfile(join(dossier, station)):
+                charger_donnees(G, station, dossier, profileur)
 
             else:
                 lignes.remove(ligne)
@@ -277,76 +538,404 @@ def charger_ligne(G, type, lignes):
 
 ######################################################################################################
 
-def afficher_lignes_stations(G):
-    print("\nLe réseau contient les " + str(G.nombre_sommets()) + " stations suivantes:\n")
-    for s in sorted(map(G.nom_sommet_et_num, G.sommets())):
-        print(s)
+def document_json(nom, enregistrements, informations=None):
+    """Renvoie le document JSON (sous forme de dictionnaire) des enregistrements d'une analyse, avec les
+    informations qui concernent l'analyse entière (durée d'un itinéraire, erreur d'une estimation...)."""
+    return dict({ "analyse": nom }, **(informations or {}), nombre=len(enregistrements), resultats=enregistrements)
+
+def ecrire_enregistrements(nom, enregistrements, colonnes, format, en_tete, ligne_texte, sortie=None, informations=None):
+    """Écrit les enregistrements (dictionnaires déjà triés) d'une analyse en une seule écriture sur 'sortie'
+    (sys.stdout par défaut), au format "texte" (en-tête puis une ligne par enregistrement), "json", "ndjson"
+    (un objet JSON par ligne) ou "csv". Les 'informations' (cf. document_json) sont écrites dans le document
+    json, et répétées sur chaque ligne en ndjson.
+    En json, 'sortie' peut aussi être une liste, à laquelle on ajoute le document au lieu de l'écrire :
+    toutes les analyses demandées forment ainsi un seul document (cf. main)."""
+    if format == "json" and isinstance(sortie, list):
+        sortie.append(document_json(nom, enregistrements, informations))
+        return
+
+    sortie = sys.stdout if sortie is None else sortie
+
+    if format == "texte":
+        contenu = en_tete + "\n" + "".join(ligne_texte(i, e) + "\n" for i, e in enumerate(enregistrements, 1))
+
+    elif format == "json":
+        contenu = json.dumps(document_json(nom, enregistrements, informations), ensure_ascii=False, indent=4) + "\n"
+
+    elif format == "ndjson":
+        contenu = "".join(json.dumps(dict(analyse=nom, **(informations or {}), **e), ensure_ascii=False) + "\n" for e in enregistrements)
+
+    elif format == "csv":
+        # Les listes (tailles des morceaux) sont écrites dans une seule cellule, séparées par des espaces
+        tampon = StringIO()
+        ecrivain = csv.writer(tampon, lineterminator="\n")
+        ecrivain.writerow(colonnes)
+        ecrivain.writerows([" ".join(map(str, e[c])) if isinstance(e[c], list) else e[c] for c in colonnes] for e in enregistrements)
+        contenu = tampon.getvalue()
+
+    else:
+        raise ValueError("format inconnu : " + str(format))
+
+    sortie.write(contenu)
+
+def enregistrements_aretes(G, aretes):
+    """Renvoie les enregistrements d'une liste d'arêtes, chaque arête étant orientée pour que sa 1ère station
+    soit la 1ère dans l'ordre alphabétique, triés par nom de 1ère station."""
+    noms = G.noms_sommets
+    enregistrements = []
+
+    for u, v in aretes:
+        if noms[u] > noms[v]:
+            u, v = v, u
+        enregistrements.append({ "id1": u, "station1": noms[u], "id2": v, "station2": noms[v] })
+
+    enregistrements.sort(key=lambda e: e["station1"])
+    return enregistrements
+
+def ligne_arete(i, e):
+    return "\t - " + e["station1"] + " -- " + e["station2"]
 
 ######################################################################################################
 
-def afficher_articulations(G):
-    articulations_G = list(points_articulation(G))
+def enregistrements_lignes_stations(G, sommets=None):
+    noms = G.noms_sommets
+    enregistrements = [{ "id": s, "station": noms[s] } for s in (G.sommets() if sommets is None else sommets)]
+    enregistrements.sort(key=lambda e: e["station"] + ' (' + str(e["id"]) + ')')
+    return enregistrements
 
-    print("\nLe réseau contient les " + str(len(articulations_G)) + " points d'articulation suivants:")
+def afficher_lignes_stations(G, sommets=None, format="texte", sortie=None):
+    enregistrements = enregistrements_lignes_stations(G, sommets)
+    ecrire_enregistrements("stations", enregistrements, ["id", "station"], format,
+                           "\nLe réseau contient les " + str(len(enregistrements)) + " stations suivantes:\n",
+                           lambda i, e: e["station"] + ' (' + str(e["id"]) + ')', sortie)
 
-    i = 1
-    for s in sorted(articulations_G, key=lambda s: G.nom_sommet(s)):
-        print("\t" + str(i) + " : " + G.nom_sommet(s))
-        i += 1
+######################################################################################################
+
+def enregistrements_articulations(G, articulations_G=None):
+    noms = G.noms_sommets
+    enregistrements = [{ "id": s, "station": noms[s] } for s in (points_articulation(G) if articulations_G is None else articulations_G)]
+    enregistrements.sort(key=lambda e: e["station"])
+    return enregistrements
+
+def afficher_articulations(G, articulations_G=None, format="texte", sortie=None):
+    enregistrements = enregistrements_articulations(G, articulations_G)
+    ecrire_enregistrements("points_articulation", enregistrements, ["id", "station"], format,
+                           "\nLe réseau contient les " + str(len(enregistrements)) + " points d'articulation suivants:",
+                           lambda i, e: "\t" + str(i) + " : " + e["station"], sortie)
 
 ######################################################################################################
 
-def afficher_ponts(G):
-    ponts_G = list(ponts(G))
+def enregistrements_impact_fermetures(G, impacts=None):
+    if impacts is None:
+        impacts = impact_fermetures(G)
+    noms = G.noms_sommets
+    enregistrements = []
+
+    # L'impact d'une fermeture est le nombre de stations qui ne sont plus reliées au plus grand morceau restant
+    for s, (composantes, morceaux) in impacts.items():
+        stations_coupees = sum(morceaux) - max(morceaux) if morceaux else 0
+        if stations_coupees > 0:
+            enregistrements.append({ "id": s, "station": noms[s], "stations_coupees": stations_coupees,
+                                     "composantes": composantes, "morceaux": morceaux })
+
+    enregistrements.sort(key=lambda e: (-e["stations_coupees"], e["station"]))
+    return enregistrements
+
+def afficher_impact_fermetures(G, impacts=None, format="texte", sortie=None):
+    enregistrements = enregistrements_impact_fermetures(G, impacts)
+    ecrire_enregistrements("impact_fermetures", enregistrements, ["id", "station", "stations_coupees", "composantes", "morceaux"], format,
+                           "\nLe réseau contient les " + str(len(enregistrements)) + " stations suivantes dont la fermeture déconnecte le réseau:",
+                           lambda i, e: "\t" + str(i) + " : " + e["station"] + " (" + str(e["stations_coupees"]) + " stations coupées, "
+                                        + str(e["composantes"]) + " composantes de tailles " + str(e["morceaux"]) + ")", sortie)
 
-    # On trie les noms de couple de chaque pont pour mettre en 1ère position le 1er pont 
-    for i in range(len(ponts_G)):
-        if G.nom_sommet(ponts_G[i][0]) > G.nom_sommet(ponts_G[i][1]):
-            ponts_G[i] = ponts_G[i][1], ponts_G[i][0]
+######################################################################################################
 
-    print("\nLe réseau contient les " + str(len(ponts_G)) + " ponts suivants:")
+def enregistrements_ponts(G, ponts_G=None):
+    return enregistrements_aretes(G, ponts(G) if ponts_G is None else ponts_G)
+
+def afficher_ponts(G, ponts_G=None, format="texte", sortie=None):
+    enregistrements = enregistrements_ponts(G, ponts_G)
+    ecrire_enregistrements("ponts", enregistrements, ["id1", "station1", "id2", "station2"], format,
+                           "\nLe réseau contient les " + str(len(enregistrements)) + " ponts suivants:", ligne_arete, sortie)
 
-    for pont in sorted(ponts_G, key=lambda pont: G.nom_sommet(pont[0])):
-        print("\t - " + G.nom_sommet(pont[0]) + " -- " +  G.nom_sommet(pont[1]))
-        
 ######################################################################################################
 
-def afficher_ameliorer_articulations(G):
-    # print("\nAVANT : Nombre de points d'articulations", len(points_articulation(G)))
-    aretes = amelioration_points_articulation(G)
-    
-    # Pour chaque couple d'arete, on trie les noms pour mettre en 1ère position la 1ère station dans l'ordre alphabétique  
-    for i in range(len(aretes)):
-        if G.nom_sommet(aretes[i][0]) > G.nom_sommet(aretes[i][1]):
-            aretes[i] = aretes[i][1], aretes[i][0]
-    
-    print("\nOn peut éliminer tous les points d'articulation du réseau en rajoutant les " + str(len(aretes)) + " arêtes suivantes:")
-    for arete in sorted(aretes, key=lambda arete: G.nom_sommet(arete[0])):
-        print("\t - " + G.nom_sommet(arete[0]) + " -- " +  G.nom_sommet(arete[1]))
-        # G.ajouter_arete(arete[0], arete[1], None)
-    
-    # print("\nAPRES : Nombre de points d'articulations", len(points_articulation(G)))
+def enregistrements_ameliorer_articulations(G, aretes=None):
+    return enregistrements_aretes(G, amelioration_points_articulation(G) if aretes is None else aretes)
+
+def afficher_ameliorer_articulations(G, aretes=None, format="texte", sortie=None):
+    enregistrements = enregistrements_ameliorer_articulations(G, aretes)
+    ecrire_enregistrements("amelioration_points_articulation", enregistrements, ["id1", "station1", "id2", "station2"], format,
+                           "\nOn peut éliminer tous les points d'articulation du réseau en rajoutant les " + str(len(enregistrements)) + " arêtes suivantes:",
+                           ligne_arete, sortie)
 
 ######################################################################################################
 
-def afficher_ameliorer_ponts(G):
-    # print("\nAVANT : Nombre de ponts", len(ponts(G)))
-    aretes = amelioration_ponts(G)
+def enregistrements_ameliorer_ponts(G, aretes=None):
+    return enregistrements_aretes(G, amelioration_ponts(G) if aretes is None else aretes)
 
-    # Pour chaque couple d'arete, on trie les noms pour mettre en 1ère position la 1ère station dans l'ordre alphabétique
-    for i in range(len(aretes)):
-        if G.nom_sommet(aretes[i][0]) > G.nom_sommet(aretes[i][1]):
-            aretes[i] = aretes[i][1], aretes[i][0]
-    
-    print("\nOn peut éliminer tous les ponts du réseau en rajoutant les "+ str(len(aretes)) + " arêtes suivantes:")
-    for arete in sorted(aretes, key=lambda arete: G.nom_sommet(arete[0])):
-        print("\t - " + G.nom_sommet(arete[0]) + " -- " +  G.nom_sommet(arete[1]))
-        # G.ajouter_arete(arete[0], arete[1], None)
-        
-    # print("\nAPRES : Nombre de ponts", len(ponts(G)))
+def afficher_ameliorer_ponts(G, aretes=None, format="texte", sortie=None):
+    enregistrements = enregistrements_ameliorer_ponts(G, aretes)
+    ecrire_enregistrements("amelioration_ponts", enregistrements, ["id1", "station1", "id2", "station2"], format,
+                           "\nOn peut éliminer tous les ponts du réseau en rajoutant les " + str(len(enregistrements)) + " arêtes suivantes:",
+                           ligne_arete, sortie)
+
+######################################################################################################
+
+def centralites_principales(G, echantillon, nombre, processus=None):
+    """Renvoie les 'nombre' stations et connexions les plus centrales de G (centralité d'intermédiarité
+    pondérée par les temps de trajet), avec l'erreur maximale de l'estimation si elle est faite sur un
+    échantillon de sources."""
+    if echantillon is None:
+        sommets, aretes = centralite_intermediarite(G, ponderee=True, processus=processus)
+        erreur = 0.0
+    else:
+        sommets, aretes, erreur = centralite_intermediarite_approchee(G, echantillon, ponderee=True, processus=processus)
+
+    noms = G.noms_sommets
+    return {
+        "echantillon": echantillon,
+        "erreur": erreur,
+        "stations": [{ "id": s, "station": noms[s], "centralite": sommets[s] }
+                     for s in sorted(sommets, key=lambda s: (-sommets[s], noms[s]))[:nombre]],
+        "connexions": [{ "id1": u, "station1": noms[u], "id2": v, "station2": noms[v], "centralite": aretes[(u, v)] }
+                       for u, v in sorted(aretes, key=lambda arete: -aretes[arete])[:nombre]],
+    }
+
+def enregistrements_centralite(G, centralites):
+    """Renvoie les enregistrements des stations puis des connexions les plus centrales (cf.
+    centralites_principales), distinguées par leur "type"."""
+    return ([{ "type": "station", "id1": e["id"], "station1": e["station"], "id2": None, "station2": None, "centralite": e["centralite"] }
+             for e in centralites["stations"]]
+            + [dict({ "type": "connexion" }, **e) for e in centralites["connexions"]])
+
+def afficher_centralite(G, centralites=None, format="texte", sortie=None, processus=None, echantillon=None, nombre=10):
+    if centralites is None:
+        centralites = centralites_principales(G, echantillon, nombre, processus)
+
+    if format != "texte":
+        ecrire_enregistrements("centralite", enregistrements_centralite(G, centralites), ["type", "id1", "station1", "id2", "station2", "centralite"],
+                               format, None, None, sortie, { "echantillon": centralites["echantillon"], "erreur": centralites["erreur"] })
+        return
+
+    if centralites["echantillon"] is None:
+        lignes = ["\nCentralité d'intermédiarité (pondérée par les temps de trajet):"]
+    else:
+        lignes = ["\nCentralité d'intermédiarité estimée sur " + str(centralites["echantillon"]) + " sources (erreur maximale "
+                  + str(round(centralites["erreur"], 1)) + " avec 95% de confiance):"]
+
+    lignes.append("\nLes " + str(len(centralites["stations"])) + " stations les plus centrales:")
+    for i, e in enumerate(centralites["stations"], 1):
+        lignes.append("\t" + str(i) + " : " + e["station"] + " (" + str(round(e["centralite"], 1)) + ")")
+
+    lignes.append("\nLes " + str(len(centralites["connexions"])) + " connexions les plus centrales:")
+    for e in centralites["connexions"]:
+        lignes.append("\t - " + e["station1"] + " -- " + e["station2"] + " (" + str(round(e["centralite"], 1)) + ")")
+
+    (sys.stdout if sortie is None else sortie).write("".join(ligne + "\n" for ligne in lignes))
 
 ######################################################################################################
 
+def stations_inconnues(G, stations):
+    """Affiche un message d'erreur (sur la sortie d'erreur) pour chaque station inconnue de G, et renvoie
+    vrai s'il y en a."""
+    inconnues = [s for s in stations if not G.contient_sommet(s)]
+    for s in inconnues:
+        print("Station inconnue : " + str(s) + " (les identifiants sont donnés par --liste-stations).", file=sys.stderr)
+    return len(inconnues) > 0
+
+def temps_trajet_minimal(G, depart, arrivee, processus=None):
+    """Renvoie le temps de trajet minimal entre deux stations, lu dans la matrice en cache (cf.
+    matrice_temps_trajets), ou inf si elles ne sont pas reliées."""
+    with matrice_temps_trajets(G, processus) as matrice:
+        return matrice.temps(depart, arrivee)
+
+def enregistrements_temps_trajet(G, depart, arrivee, temps):
+    noms = G.noms_sommets
+    return [{ "id1": depart, "station1": noms[depart], "id2": arrivee, "station2": noms[arrivee], "temps": None if temps == inf else int(temps) }]
+
+def afficher_temps_trajet(G, depart, arrivee, temps=None, format="texte", sortie=None, processus=None):
+    if temps is None:
+        temps = temps_trajet_minimal(G, depart, arrivee, processus)
+
+    def ligne(i, e):
+        if e["temps"] is None:
+            return G.nom_sommet_et_num(depart) + " et " + G.nom_sommet_et_num(arrivee) + " ne sont pas reliées."
+        return "Temps de trajet entre " + G.nom_sommet_et_num(depart) + " et " + G.nom_sommet_et_num(arrivee) + " : " + str(e["temps"]) + " secondes."
+
+    ecrire_enregistrements("temps_trajet", enregistrements_temps_trajet(G, depart, arrivee, temps), ["id1", "station1", "id2", "station2", "temps"],
+                           format, "", ligne, sortie)
+
+######################################################################################################
+
+def diametres(G, compteurs=None):
+    """Renvoie les excentricités extrêmes de G (cf. excentricites_extremes) en nombre de connexions puis en
+    temps de trajet, ou None si G n'est pas connexe (son diamètre est alors infini)."""
+    try:
+        return [excentricites_extremes(G, ponderee, compteurs) for ponderee in (False, True)]
+    except ValueError:
+        return None
+
+def enregistrements_diametre(G, resultats):
+    """Renvoie un enregistrement par unité de mesure ("connexions" puis "secondes") : diamètre, rayon, les
+    deux stations à distance "diametre", les identifiants des stations du centre et de la périphérie, et
+    le nombre de parcours effectués. Aucun si G n'est pas connexe."""
+    noms = G.noms_sommets
+    enregistrements = []
+    for mesure, resultat in zip(("connexions", "secondes"), resultats or []):
+        u, v = resultat["extremites"]
+        enregistrements.append({ "mesure": mesure, "diametre": resultat["diametre"], "rayon": resultat["rayon"],
+                                 "id1": u, "station1": noms[u], "id2": v, "station2": noms[v],
+                                 "centre": resultat["centre"], "peripherie": resultat["peripherie"], "parcours": resultat["parcours"] })
+    return enregistrements
+
+def afficher_diametre(G, resultats=None, format="texte", sortie=None):
+    if resultats is None:
+        resultats = diametres(G)
+    enregistrements = enregistrements_diametre(G, resultats)
+
+    if format != "texte":
+        ecrire_enregistrements("diametre", enregistrements, ["mesure", "diametre", "rayon", "id1", "station1", "id2", "station2", "centre", "peripherie", "parcours"],
+                               format, None, None, sortie, { "connexe": resultats is not None })
+        return
+
+    if resultats is None:
+        lignes = ["\nLe réseau n'est pas connexe : son diamètre est infini."]
+    else:
+        lignes = []
+        for e in enregistrements:
+            unite = " " + e["mesure"]
+            lignes.append("\nEn " + e["mesure"] + " (" + str(e["parcours"]) + " parcours sur " + str(G.nombre_sommets()) + " stations):")
+            lignes.append("\tDiamètre : " + str(e["diametre"]) + unite + ", entre " + G.nom_sommet_et_num(e["id1"]) + " et " + G.nom_sommet_et_num(e["id2"]))
+            lignes.append("\tStations les plus excentrées : " + ", ".join(G.nom_sommet_et_num(s) for s in e["peripherie"]))
+            lignes.append("\tRayon : " + str(e["rayon"]) + unite + ", centre : " + ", ".join(G.nom_sommet_et_num(s) for s in e["centre"]))
+
+    (sys.stdout if sortie is None else sortie).write("".join(ligne + "\n" for ligne in lignes))
+
+######################################################################################################
+
+def troncons(etapes):
+    """Regroupe les étapes (station, ligne) consécutives d'une même ligne d'un itinéraire, et renvoie la
+    liste des tronçons (ligne, 1ère station, dernière station)."""
+    resultat = []
+    i = 0
+    while i < len(etapes) - 1:
+        j = i
+        while j + 1 < len(etapes) and etapes[j + 1][1] == etapes[i][1]:
+            j += 1
+
+        if j > i:
+            resultat.append((etapes[i][1], etapes[i][0], etapes[j][0]))
+        i = j + 1 if j > i else i + 1
+
+    return resultat
+
+def enregistrements_itineraire(G, itineraire):
+    noms = G.noms_sommets
+    if itineraire is None:
+        return []
+    return [{ "ligne": ligne, "id1": u, "station1": noms[u], "id2": v, "station2": noms[v] } for ligne, u, v in troncons(itineraire[2])]
+
+def afficher_itineraire(G, depart, arrivee, itineraire=None, format="texte", sortie=None, penalite=300, moins_de_correspondances=False):
+    if itineraire is None:
+        itineraire = Planificateur(G, penalite).itineraire(depart, arrivee, moins_de_correspondances)
+
+    if format != "texte":
+        informations = { "id_depart": depart, "id_arrivee": arrivee,
+                         "duree": itineraire[0] if itineraire is not None else None,
+                         "correspondances": itineraire[1] if itineraire is not None else None }
+        ecrire_enregistrements("itineraire", enregistrements_itineraire(G, itineraire), ["ligne", "id1", "station1", "id2", "station2"],
+                               format, None, None, sortie, informations)
+        return
+
+    if itineraire is None:
+        lignes = ["\n" + G.nom_sommet_et_num(depart) + " et " + G.nom_sommet_et_num(arrivee) + " ne sont pas reliées."]
+    else:
+        duree, correspondances, etapes = itineraire
+        lignes = ["\nItinéraire de " + G.nom_sommet(depart) + " à " + G.nom_sommet(arrivee) + " : " + str(duree) + " secondes, "
+                  + str(correspondances) + " correspondance(s)."]
+        lignes += ["\t - " + e["ligne"] + " : " + e["station1"] + " -> " + e["station2"] for e in enregistrements_itineraire(G, itineraire)]
+
+    (sys.stdout if sortie is None else sortie).write("".join(ligne + "\n" for ligne in lignes))
+
+######################################################################################################
+
+def connexite(G, depart, arrivee):
+    """Renvoie les flots maximaux entre deux stations (cf. flot_maximal) : le nombre de chemins sans connexion
+    commune et les connexions qui les séparent, puis le nombre de chemins sans station intermédiaire
+    commune et les stations qui les séparent. KeyError si une des stations n'est pas dans G."""
+    for s in (depart, arrivee):
+        if not G.contient_sommet(s):
+            raise KeyError("station inconnue : " + str(s))
+    return flot_maximal(G, depart, arrivee), flot_maximal(G, depart, arrivee, sommets=True)
+
+def enregistrements_connexite(G, resultat):
+    """Renvoie les enregistrements des connexions puis des stations dont la fermeture sépare les deux
+    stations, distinguées par leur "type"."""
+    noms = G.noms_sommets
+    (_, connexions), (_, stations) = resultat
+    return ([{ "type": "connexion", "id1": u, "station1": noms[u], "id2": v, "station2": noms[v] } for u, v in connexions]
+            + [{ "type": "station", "id1": s, "station1": noms[s], "id2": None, "station2": None } for s in stations])
+
+def afficher_connexite(G, depart, arrivee, resultat=None, format="texte", sortie=None):
+    if resultat is None:
+        resultat = connexite(G, depart, arrivee)
+    (nombre_connexions, connexions), (nombre_stations, stations) = resultat
+
+    if format != "texte":
+        # inf n'existe pas en JSON : c'est le nombre de chemins d'une station vers elle-même, ou sans station commune vers une voisine
+        informations = { "id_depart": depart, "id_arrivee": arrivee,
+                         "chemins_sans_connexion_commune": nombre_connexions if nombre_connexions != inf else None,
+                         "chemins_sans_station_commune": nombre_stations if nombre_stations != inf else None }
+        ecrire_enregistrements("connexite", enregistrements_connexite(G, resultat), ["type", "id1", "station1", "id2", "station2"],
+                               format, None, None, sortie, informations)
+        return
+
+    lignes = ["\nConnexité entre " + G.nom_sommet_et_num(depart) + " et " + G.nom_sommet_et_num(arrivee) + ":"]
+    if nombre_connexions == inf:
+        lignes.append("\tIl s'agit de la même station : aucune fermeture ne la sépare d'elle-même.")
+    else:
+        lignes.append("\t" + str(nombre_connexions) + " chemin(s) sans connexion commune ; fermer ces connexions les sépare:")
+        lignes += ["\t - " + G.nom_sommet(u) + " -- " + G.nom_sommet(v) for u, v in connexions]
+
+        if nombre_stations == inf:
+            lignes.append("\tLes deux stations sont voisines : aucune fermeture d'autres stations ne les sépare.")
+        else:
+            lignes.append("\t" + str(nombre_stations) + " chemin(s) sans station intermédiaire commune ; fermer ces stations les sépare:")
+            lignes += ["\t - " + G.nom_sommet(s) for s in stations]
+
+    (sys.stdout if sortie is None else sortie).write("".join(ligne + "\n" for ligne in lignes))
+
+######################################################################################################
+
+def enregistrements_recherche(G, stations):
+    noms = G.noms_sommets
+    return [{ "id": s, "station": noms[s] } for s in stations]
+
+def afficher_recherche(G, texte, stations=None, format="texte", sortie=None, index=None, limite=10):
+    if stations is None:
+        stations = (IndexNoms(G) if index is None else index).rechercher(texte, limite)
+
+    ecrire_enregistrements("rechercher", enregistrements_recherche(G, stations), ["id", "station"], format,
+                           "\n" + str(len(stations)) + " station(s) trouvée(s) pour \"" + texte + "\":",
+                           lambda i, e: "\t - " + G.nom_sommet_et_num(e["id"]), sortie, { "texte": texte })
+
+######################################################################################################
+
+def entier_positif(texte):
+    """Type argparse des entiers strictement positifs."""
+    valeur = int(texte)
+    if valeur <= 0:
+        raise argparse.ArgumentTypeError("doit être un entier strictement positif : " + texte)
+    return valeur
+
+def entier_positif_ou_nul(texte):
+    """Type argparse des entiers positifs ou nuls."""
+    valeur = int(texte)
+    if valeur < 0:
+        raise argparse.ArgumentTypeError("doit être un entier positif ou nul : " + texte)
+    return valeur
+
 def main():
     parser = argparse.ArgumentParser(description='Programme permettant de charger des stations de metro et rer sous forme de graphe, et d\'afficher les points d\'articulations et ponts de chaque graphe mais également quelles aretes ajouter dans le graphe pour les corriger.')
 
@@ -370,6 +959,18 @@ def main():
                         help = "--articulations : affiche les points d’articulation du réseau qui a été chargé"
                         )
 
+    parser.add_argument('--economique', 
+                        nargs = '?',
+                        const = 'temps',
+                        choices = ['temps', 'sauts'],
+                        help = "--economique [temps|sauts] : avec --ameliorer-ponts et --ameliorer-articulations, choisit des arêtes reliant des stations proches (en temps de trajet par défaut, ou en nombre de connexions) et affiche leur coût total avec un minorant du coût de toute solution"
+                        )
+
+    parser.add_argument('--impact-fermetures', 
+                        action = 'store_true',
+                        help = "--impact-fermetures : affiche, pour chaque station dont la fermeture déconnecte le réseau, le nombre de composantes et la taille des morceaux obtenus, triées par nombre de stations coupées"
+                        )
+
     parser.add_argument('--ponts', 
                         action = 'store_true',
                         help = "--ponts : affiche les ponts du réseau qui a été chargé"
@@ -385,28 +986,209 @@ def main():
                         help = "--ameliorer-ponts : affiche les ponts du réseau qui a été chargé, ainsi que les arêtes à rajouter pour que ces arêtes ne soient plus des ponts"
                         )
 
+    parser.add_argument('--rechercher', 
+                        metavar = 'NOM',
+                        help = "--rechercher nom : affiche les stations (avec leur identifiant) dont le nom correspond, sans tenir compte des accents ni de la casse : nom exact, début de nom ou d'un mot du nom, et sinon les noms les plus ressemblants"
+                        )
+
+    parser.add_argument('--connexite', 
+                        nargs = 2,
+                        type = int,
+                        metavar = ('DEPART', 'ARRIVEE'),
+                        help = "--connexite depart arrivee : affiche le nombre de chemins sans connexion commune et sans station intermédiaire commune entre deux stations, et les connexions ou stations dont la fermeture les sépare (flot maximal, coupe minimale)"
+                        )
+
+    parser.add_argument('--centralite', 
+                        action = 'store_true',
+                        help = "--centralite : affiche les stations et connexions du réseau les plus empruntées par les plus courts chemins (centralité d'intermédiarité pondérée par les temps de trajet)"
+                        )
+
+    parser.add_argument('--diametre', 
+                        action = 'store_true',
+                        help = "--diametre : affiche le diamètre et le rayon du réseau (en nombre de connexions et en temps de trajet), ses stations centrales et les plus excentrées"
+                        )
+
+    parser.add_argument('--echantillon', 
+                        type = entier_positif,
+                        help = "--echantillon k : avec --centralite, estime la centralité à partir de k stations de départ tirées au hasard au lieu de toutes les stations"
+                        )
+
+    parser.add_argument('--temps-trajet', 
+                        nargs = 2,
+                        type = int,
+                        metavar = ('DEPART', 'ARRIVEE'),
+                        help = "--temps-trajet depart arrivee : affiche le temps de trajet minimal entre deux stations (identifiants donnés par --liste-stations). La matrice de tous les temps de trajet est mise en cache dans ./cache/ pour les appels suivants"
+                        )
+
+    parser.add_argument('--itineraire', 
+                        nargs = 2,
+                        type = int,
+                        metavar = ('DEPART', 'ARRIVEE'),
+                        help = "--itineraire depart arrivee : affiche l'itinéraire le plus rapide entre deux stations, ligne par ligne, en comptant une pénalité pour chaque correspondance"
+                        )
+
+    parser.add_argument('--penalite-correspondance', 
+                        type = entier_positif_ou_nul,
+                        default = 300,
+                        help = "--penalite-correspondance s : avec --itineraire, durée en secondes ajoutée à chaque changement de ligne (300 par défaut)"
+                        )
+
+    parser.add_argument('--moins-de-correspondances', 
+                        action = 'store_true',
+                        help = "--moins-de-correspondances : avec --itineraire, minimise d'abord le nombre de correspondances, puis la durée"
+                        )
+
+    parser.add_argument('--format', 
+                        choices = ['texte', 'json', 'csv', 'ndjson'],
+                        default = 'texte',
+                        help = "--format {texte,json,csv,ndjson} : format de sortie des résultats des analyses (texte par défaut). En json, toutes les analyses demandées (et les compteurs au format json) forment un seul document ; en csv, une seule analyse peut être demandée. Hors du format texte, la sortie standard ne contient que les résultats : les messages de chargement, les coûts du mode économique et les autres compteurs sont écrits sur la sortie d'erreur"
+                        )
+
+    parser.add_argument('--processus', 
+                        type = int,
+                        help = "--processus n : répartit les calculs parallélisables sur n processus (les ponts et points d'articulation sont alors calculés par composante connexe, les plus grandes d'abord)"
+                        )
+
+    parser.add_argument('--profile', 
+                        nargs = '?',
+                        const = '-',
+                        metavar = 'FICHIER',
+                        help = "--profile [fichier] : mesure le temps réel, le temps CPU et la mémoire allouée de chaque phase (lecture de chaque fichier, construction du graphe, numérotation, chaque analyse et son affichage), et écrit le rapport JSON dans le fichier donné (sur la sortie d'erreur sinon)"
+                        )
+
+    parser.add_argument('--profile-cprofile', 
+                        metavar = 'FICHIER',
+                        help = "--profile-cprofile fichier : avec --profile, enregistre le profil cProfile de la phase la plus lente dans ce fichier (lisible avec pstats) ; toutes les phases sont alors mesurées sous cProfile, ce qui gonfle leurs temps (\"sous_cprofile\" dans le rapport)"
+                        )
+
+    parser.add_argument('--compteurs', 
+                        choices = ['json', 'prometheus'],
+                        help = "--compteurs {json,prometheus} : affiche à la fin le nombre d'opérations effectuées par les analyses (arêtes examinées par la numérotation, expansions de la recherche des feuilles, etc.) au format choisi"
+                        )
+
     args = parser.parse_args()
+    if args.profile_cprofile and not args.profile:
+        parser.error("--profile-cprofile ne fonctionne qu'avec --profile")
 
-    reseau = Graphe()
-    charger_ligne(reseau, "METRO", args.metro)
-    charger_ligne(reseau, "RER", args.rer)
+    # Un fichier CSV ne contient qu'une table : on ne peut y écrire qu'une analyse
+    demandees = [args.liste_stations, args.ponts, args.articulations, args.impact_fermetures, args.ameliorer_articulations, args.ameliorer_ponts,
+                 args.rechercher, args.connexite, args.centralite, args.diametre, args.temps_trajet, args.itineraire]
+    if args.format == 'csv' and sum(1 for demandee in demandees if demandee) > 1:
+        parser.error("--format csv ne permet qu'une analyse à la fois")
 
-    print("Le réseau contient " + str(reseau.nombre_sommets()) + " sommets" + " et " + str(reseau.nombre_aretes()) + " arêtes.")
+    compteurs = Compteurs({ "metro": " ".join(args.metro or []), "rer": " ".join(args.rer or []) }) if args.compteurs else None
+    profileur = Profileur(cprofile=args.profile_cprofile is not None) if args.profile else None
 
-    if (args.liste_stations):
-        afficher_lignes_stations(reseau)
+    # Dans les formats destinés à d'autres programmes, la sortie standard ne contient que les résultats
+    messages = nullcontext() if args.format == 'texte' else redirect_stdout(sys.stderr)
 
-    if (args.ponts):
-        afficher_ponts(reseau)
+    reseau = Graphe()
+    with messages:
+        charger_ligne(reseau, "METRO", args.metro, profileur=profileur)
+        charger_ligne(reseau, "RER", args.rer, profileur=profileur)
+
+        with phase(profileur, "affichage du résumé"):
+            print("Le réseau contient " + str(reseau.nombre_sommets()) + " sommets" + " et " + str(reseau.nombre_aretes()) + " arêtes.")
+
+    # La numérotation est refaite par chaque analyse : on la mesure à part pour connaître sa part dans leur temps
+    if profileur is not None:
+        with phase(profileur, "numerotations"):
+            numerotations(reseau)
+
+    # En json, les documents de chaque analyse sont écrits ensemble à la fin
+    documents = []
+    sortie = documents if args.format == 'json' else None
+
+    # Les résultats et messages qui n'ont pas d'équivalent dans le format demandé vont sur la sortie d'erreur
+    annexe = sys.stdout if args.format == 'texte' else sys.stderr
+
+    # En mode économique, on garde le coût et le minorant de chaque amélioration pour les afficher ensuite
+    bilans = dict()
+    if args.economique:
+        def economique(nom, fonction):
+            def analyse(G, compteurs):
+                aretes, cout, minorant = fonction(G, compteurs, args.economique)
+                bilans[nom] = (cout, minorant)
+                return aretes
+            return analyse
+
+        ameliorer_articulations = economique("amelioration_points_articulation", amelioration_points_articulation_economique)
+        ameliorer_ponts = economique("amelioration_ponts", amelioration_ponts_economique)
+    else:
+        ameliorer_articulations, ameliorer_ponts = amelioration_points_articulation, amelioration_ponts
+
+    # Sur plusieurs processus, les analyses qui se décomposent par composante connexe sont réparties composante par composante
+    def par_composantes(analyse):
+        if not args.processus or args.processus <= 1:
+            return analyse
+        return lambda G, compteurs: par_composante(G, analyse, args.processus, compteurs)
+
+    # Chaque analyse est calculée puis affichée dans deux phases distinctes
+    analyses = [
+        (args.liste_stations, "liste_stations", lambda G, compteurs: None, afficher_lignes_stations),
+        (args.ponts, "ponts", par_composantes(ponts), afficher_ponts),
+        (args.articulations, "points_articulation", par_composantes(points_articulation), afficher_articulations),
+        (args.impact_fermetures, "impact_fermetures", impact_fermetures, afficher_impact_fermetures),
+        (args.ameliorer_articulations, "amelioration_points_articulation", ameliorer_articulations, afficher_ameliorer_articulations),
+        (args.ameliorer_ponts, "amelioration_ponts", ameliorer_ponts, afficher_ameliorer_ponts),
+        (args.rechercher, "rechercher",
+         lambda G, compteurs: IndexNoms(G).rechercher(args.rechercher, 10),
+         lambda G, resultat, format, sortie: afficher_recherche(G, args.rechercher, resultat, format, sortie)),
+        (args.connexite and not stations_inconnues(reseau, args.connexite), "connexite",
+         lambda G, compteurs: connexite(G, *args.connexite),
+         lambda G, resultat, format, sortie: afficher_connexite(G, *args.connexite, resultat, format, sortie)),
+        (args.centralite, "centralite",
+         lambda G, compteurs: centralites_principales(G, args.echantillon, 10, args.processus),
+         afficher_centralite),
+        (args.diametre, "diametre", diametres, afficher_diametre),
+        (args.temps_trajet and not stations_inconnues(reseau, args.temps_trajet), "temps_trajet",
+         lambda G, compteurs: temps_trajet_minimal(G, *args.temps_trajet, args.processus),
+         lambda G, resultat, format, sortie: afficher_temps_trajet(G, *args.temps_trajet, resultat, format, sortie)),
+        (args.itineraire and not stations_inconnues(reseau, args.itineraire), "itineraire",
+         lambda G, compteurs: Planificateur(G, args.penalite_correspondance).itineraire(*args.itineraire, args.moins_de_correspondances),
+         lambda G, resultat, format, sortie: afficher_itineraire(G, *args.itineraire, resultat, format, sortie)),
+    ]
+
+    for demandee, nom, analyse, affichage in analyses:
+        if demandee:
+            with phase(profileur, nom):
+                resultat = analyse(reseau, compteurs)
+            with phase(profileur, "affichage " + nom):
+                affichage(reseau, resultat, format=args.format, sortie=sortie)
+
+            if nom in bilans:
+                cout, minorant = int(bilans[nom][0]), int(bilans[nom][1])
+                if args.format == 'json':
+                    documents[-1].update(unite=args.economique, cout=cout, minorant=minorant)
+                else:
+                    unite = " secondes" if args.economique == 'temps' else " connexions"
+                    print("Coût total : " + str(cout) + unite + " (toute solution coûte au moins " + str(minorant) + unite + ")", file=annexe)
+
+    if args.format == 'json':
+        document = { "analyses": documents }
+        if args.compteurs == 'json':
+            document["compteurs"] = json.loads(compteurs.en_json())
+        sys.stdout.write(json.dumps(document, ensure_ascii=False, indent=4) + "\n")
+
+    if compteurs is not None and not (args.format == 'json' and args.compteurs == 'json'):
+        if args.compteurs == 'json':
+            print(compteurs.en_json(), file=annexe)
+        else:
+            print(compteurs.en_prometheus(), end = '', file=annexe)
 
-    if (args.articulations):
-        afficher_articulations(reseau)
+    if profileur is not None:
+        profileur.arreter()
+        rapport = profileur.rapport()
 
-    if (args.ameliorer_articulations):
-        afficher_ameliorer_articulations(reseau)
+        if args.profile_cprofile:
+            rapport["cprofile"] = { "phase": profileur.ecrire_cprofile(args.profile_cprofile), "fichier": args.profile_cprofile }
 
-    if (args.ameliorer_ponts):
-        afficher_ameliorer_ponts(reseau)
+        if args.profile == '-':
+            json.dump(rapport, sys.stderr, indent=4)
+            sys.stderr.write("\n")
+        else:
+            with open(args.profile, "w") as fichier:
+                json.dump(rapport, fichier, indent=4)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
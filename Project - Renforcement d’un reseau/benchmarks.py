@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from ameliorations import *
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import dirname, isfile, join, realpath
+from statistics import median
+import argparse
+import json
+import random
+import scenarios
+import sys
+import time
+import tracemalloc
+
+# Les DM sont des scripts indépendants : on les importe depuis leur répertoire
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", "DM1"))
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", "DM2"))
+from listeadjacence import ListeAdjacence
+from matriceadjacence import MatriceAdjacence
+import JohnsonVilayvanh as dm2
+
+######################################################################################################
+
+def graphe_aleatoire(n, m, graine, type_graphe=Graphe):
+    """Renvoie un graphe connexe à n sommets (0, ..., n - 1) et environ m arêtes : un arbre aléatoire,
+    complété par des arêtes tirées au hasard. Les poids sont des entiers entre 1 et 100."""
+    alea = random.Random(graine)
+    G = type_graphe()
+    G.ajouter_sommet(0)
+
+    for v in range(1, n):
+        G.ajouter_arete(alea.randrange(v), v, alea.randint(1, 100))
+
+    for _ in range(max(0, m - (n - 1))):
+        u, v = alea.sample(range(n), 2)
+        G.ajouter_arete(u, v, alea.randint(1, 100))
+
+    return G
+
+def aretes_aleatoires(n, m, graine):
+    alea = random.Random(graine)
+    return [(alea.randrange(n), alea.randrange(n)) for _ in range(m)]
+
+######################################################################################################
+
+def cas_de_mesure():
+    """Renvoie la liste des cas mesurés, sous forme de couples (nom, preparation) où preparation()
+    construit les données (non chronométrée) et renvoie la fonction à chronométrer."""
+    def charger(fichiers):
+        def preparation():
+            def operation():
+                G = Graphe()
+                for f in fichiers:
+                    charger_donnees(G, f)
+            return operation
+        return preparation
+
+    def reseau_complet():
+        G = Graphe()
+        with redirect_stdout(StringIO()):
+            charger_ligne(G, "METRO", [])
+            charger_ligne(G, "RER", [])
+        return G
+
+    def analyse(fonction, construction):
+        def preparation():
+            G = construction()
+            return lambda: fonction(G)
+        return preparation
+
+    def charger_tout():
+        def operation():
+            with redirect_stdout(StringIO()):
+                reseau_complet()
+        return operation
+
+    synthetique = lambda: graphe_aleatoire(500, 650, 1)
+    synthetique_dm2 = lambda: graphe_aleatoire(500, 1500, 2, dm2.Graphe)
+
+    cas = [
+        ("charger_donnees/RER_A", charger(["RER_A.txt"])),
+        ("charger_ligne/tout", charger_tout),
+    ]
+
+    for nom, fonction in [("numerotations", numerotations), ("ponts", ponts),
+                          ("points_articulation", points_articulation),
+                          ("amelioration_ponts", amelioration_ponts),
+                          ("amelioration_points_articulation", amelioration_points_articulation),
+                          ("amelioration_ponts_economique", amelioration_ponts_economique),
+                          ("amelioration_points_articulation_economique", amelioration_points_articulation_economique)]:
+        cas.append((nom + "/reseau", analyse(fonction, reseau_complet)))
+        cas.append((nom + "/synthetique", analyse(fonction, synthetique)))
+
+    # Analyse de chaque ligne séparément, sur des vues du réseau complet (sans rechargement)
+    def vues_lignes():
+        G = reseau_complet()
+        vues = [G.vue_lignes([ligne]) for ligne in G.numeros_lignes]
+        def operation():
+            for vue in vues:
+                ponts(vue)
+                points_articulation(vue)
+        return operation
+
+    # Balayage de scénarios (réseau sans chaque ligne, fermetures aléatoires) dans le processus courant
+    def balayage_scenarios():
+        G = reseau_complet()
+        liste = list(scenarios.scenarios_sans_chaque_ligne(G)) + list(scenarios.scenarios_fermetures_aleatoires(G, 3, 20))
+        def operation():
+            for _ in scenarios.executer_scenarios(G, liste):
+                pass
+        return operation
+
+    cas += [
+        ("vue_lignes/ponts_et_articulations", vues_lignes),
+        ("scenarios/balayage", balayage_scenarios),
+        ("composantes_connexes/synthetique", analyse(composantes_connexes, synthetique)),
+        ("excentricites_extremes/reseau", analyse(excentricites_extremes, reseau_complet)),
+        ("excentricites_extremes/temps", analyse(lambda G: excentricites_extremes(G, ponderee=True), reseau_complet)),
+        ("acpm_kruskal/synthetique", analyse(dm2.acpm_kruskal, synthetique_dm2)),
+        ("acpm_prim/synthetique", analyse(lambda G: dm2.acpm_prim(G, 0), synthetique_dm2)),
+        ("fcpm_prim/synthetique", analyse(dm2.fcpm_prim, synthetique_dm2)),
+    ]
+
+    for nom, classe in [("ListeAdjacence", ListeAdjacence), ("MatriceAdjacence", MatriceAdjacence)]:
+        aretes = aretes_aleatoires(300, 1500, 3)
+
+        def construction(classe=classe, aretes=aretes):
+            def operation():
+                G = classe()
+                G.ajouter_aretes(aretes)
+            return operation
+
+        def requetes(classe=classe, aretes=aretes):
+            G = classe()
+            G.ajouter_aretes(aretes)
+            def operation():
+                G.aretes()
+                G.nombre_aretes()
+                for s in G.sommets():
+                    G.degre(s)
+                    G.voisins(s)
+                for u, v in aretes:
+                    G.contient_arete(u, v)
+            return operation
+
+        def suppressions(classe=classe, aretes=aretes):
+            G = classe()
+            G.ajouter_aretes(aretes)
+            return lambda: G.retirer_sommets(range(0, 300, 3))
+
+        cas += [
+            (nom + "/ajouter_aretes", construction),
+            (nom + "/requetes", requetes),
+            (nom + "/retirer_sommets", suppressions),
+        ]
+
+    return cas
+
+######################################################################################################
+
+def mesurer(preparation, repetitions):
+    """Renvoie le temps minimal et médian (en secondes) de 'repetitions' exécutions, ainsi que le pic de
+    mémoire allouée (en octets) pendant une exécution supplémentaire sous tracemalloc."""
+    temps = []
+    for _ in range(repetitions):
+        operation = preparation()
+        debut = time.perf_counter()
+        operation()
+        temps.append(time.perf_counter() - debut)
+
+    operation = preparation()
+    tracemalloc.start()
+    operation()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return { "temps_min": min(temps), "temps_median": median(temps), "memoire_max": pic }
+
+def lancer(repetitions=5, filtre=None):
+    """Renvoie le dictionnaire des mesures de tous les cas dont le nom contient 'filtre'."""
+    random.seed(0)
+    return {
+        nom: mesurer(preparation, repetitions)
+        for nom, preparation in cas_de_mesure()
+        if filtre is None or filtre in nom
+    }
+
+def comparer(mesures, reference, seuil):
+    """Renvoie la liste des (nom, ancien temps, nouveau temps) des cas dont le temps minimal a augmenté de
+    plus de 'seuil' (0.2 = 20%) par rapport à la référence."""
+    regressions = []
+    for nom in sorted(mesures):
+        if nom in reference:
+            ancien, nouveau = reference[nom]["temps_min"], mesures[nom]["temps_min"]
+            if nouveau > ancien * (1 + seuil):
+                regressions.append((nom, ancien, nouveau))
+    return regressions
+
+######################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Mesure les temps d\'exécution et la mémoire des algorithmes du projet et des DM, sur le réseau de ./donnees/ et sur des graphes synthétiques, et les compare à une référence.')
+
+    parser.add_argument('--repetitions',
+                        type = int,
+                        default = 5,
+                        help = "--repetitions n : nombre d'exécutions chronométrées par cas (5 par défaut)"
+                        )
+
+    parser.add_argument('--filtre',
+                        help = "--filtre texte : ne mesure que les cas dont le nom contient ce texte"
+                        )
+
+    parser.add_argument('--reference',
+                        default = "reference_benchmarks.json",
+                        help = "--reference fichier : fichier JSON des mesures de référence (reference_benchmarks.json par défaut)"
+                        )
+
+    parser.add_argument('--sauvegarder',
+                        action = 'store_true',
+                        help = "--sauvegarder : enregistre les mesures comme nouvelle référence"
+                        )
+
+    parser.add_argument('--seuil',
+                        type = float,
+                        default = 0.2,
+                        help = "--seuil s : signale les cas plus lents que la référence de plus de s (0.2 = 20%% par défaut)"
+                        )
+
+    args = parser.parse_args()
+    mesures = lancer(args.repetitions, args.filtre)
+
+    for nom, mesure in mesures.items():
+        print("{:45} {:10.3f} ms {:10.3f} ms {:12d} octets".format(nom, mesure["temps_min"] * 1000, mesure["temps_median"] * 1000, mesure["memoire_max"]))
+
+    regressions = []
+    if isfile(args.reference):
+        with open(args.reference, "r") as fichier:
+            regressions = comparer(mesures, json.load(fichier), args.seuil)
+
+        print("\n" + str(len(regressions)) + " régression(s) par rapport à " + args.reference)
+        for nom, ancien, nouveau in regressions:
+            print("\t - " + nom + " : " + str(round(ancien * 1000, 3)) + " ms -> " + str(round(nouveau * 1000, 3)) + " ms")
+
+    if args.sauvegarder:
+        with open(args.reference, "w") as fichier:
+            json.dump(mesures, fichier, indent=4, sort_keys=True)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
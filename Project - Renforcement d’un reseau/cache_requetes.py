@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from functools import wraps
+import time
+
+######################################################################################################
+
+class CacheRequetes(object):
+    """Cache LRU des résultats d'analyse d'un graphe. Un résultat est rangé sous la clé (fonction, graphe,
+    version du graphe, arguments) : dès que le graphe est modifié, sa version change et les anciens
+    résultats ne sont plus jamais servis (ils finissent par être évincés). Les résultats sont renvoyés
+    tels quels, sans copie : il ne faut pas les modifier."""
+    def __init__(self, taille_max=128, duree_vie=None, horloge=time.monotonic):
+        """Initialise un cache vide d'au plus 'taille_max' résultats, chacun valable 'duree_vie' secondes
+        (indéfiniment si duree_vie vaut None)."""
+        self.taille_max = taille_max
+        self.duree_vie = duree_vie
+        self.horloge = horloge
+        self.entrees = OrderedDict()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def chercher(self, cle):
+        """Renvoie (True, résultat) si un résultat encore valable est rangé sous 'cle', (False, None) sinon.
+        Les clés sont quelconques (hachables) : le cache peut ainsi servir à d'autres résultats que ceux
+        d'appeler, par exemple les tâches de calcul du serveur (cf. serveur.py)."""
+        if cle in self.entrees:
+            resultat, date = self.entrees[cle]
+            if self.duree_vie is None or self.horloge() - date < self.duree_vie:
+                self.succes += 1
+                self.entrees.move_to_end(cle)
+                return True, resultat
+            del self.entrees[cle]
+
+        self.echecs += 1
+        return False, None
+
+    def ranger(self, cle, resultat):
+        """Range 'resultat' sous 'cle', en évinçant les résultats les moins récemment utilisés au-delà de
+        taille_max."""
+        self.entrees[cle] = (resultat, self.horloge())
+        self.entrees.move_to_end(cle)
+
+        while len(self.entrees) > self.taille_max:
+            self.entrees.popitem(last=False)
+            self.evictions += 1
+
+    def retirer(self, cle, resultat=None):
+        """Retire le résultat rangé sous 'cle' (seulement s'il s'agit de 'resultat', quand il est donné)."""
+        if cle in self.entrees and (resultat is None or self.entrees[cle][0] is resultat):
+            del self.entrees[cle]
+
+    def appeler(self, fonction, G, *arguments):
+        """Renvoie fonction(G, *arguments), en réutilisant le résultat en cache s'il est encore valable."""
+        cle = (fonction, G, G.version, arguments)
+        trouve, resultat = self.chercher(cle)
+
+        if not trouve:
+            resultat = fonction(G, *arguments)
+            self.ranger(cle, resultat)
+
+        return resultat
+
+    def memoriser(self, fonction):
+        """Décorateur : renvoie une version de 'fonction' (de la forme fonction(G, ...)) qui passe par le cache."""
+        @wraps(fonction)
+        def fonction_memorisee(G, *arguments):
+            return self.appeler(fonction, G, *arguments)
+        return fonction_memorisee
+
+    def vider(self):
+        """Retire tous les résultats du cache (les statistiques sont conservées)."""
+        self.entrees.clear()
+
+    def statistiques(self):
+        """Renvoie un dictionnaire contenant le nombre de succès, d'échecs, d'évictions et de résultats en cache."""
+        total = self.succes + self.echecs
+        return {
+            "succes": self.succes,
+            "echecs": self.echecs,
+            "evictions": self.evictions,
+            "taille": len(self.entrees),
+            "taux_succes": self.succes / total if total else 0.0,
+        }
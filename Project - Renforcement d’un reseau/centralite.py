@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+from math import log, sqrt
+import random
+
+######################################################################################################
+
+def parcours_brandes(adjacence, source, ponderee):
+    """Renvoie, depuis 'source', l'ordre des sommets atteints par distance croissante, les prédécesseurs
+    de chaque sommet sur ses plus courts chemins et le nombre de plus courts chemins (sigma)."""
+    ordre = []
+    predecesseurs = { source: [] }
+    sigma = { source: 1 }
+    distance = { source: 0 }
+
+    if not ponderee:
+        file = deque([source])
+
+        while file:
+            u = file.popleft()
+            ordre.append(u)
+
+            for v in adjacence[u]:
+                if v not in distance:
+                    distance[v] = distance[u] + 1
+                    sigma[v] = 0
+                    predecesseurs[v] = []
+                    file.append(v)
+
+                if distance[v] == distance[u] + 1:
+                    sigma[v] += sigma[u]
+                    predecesseurs[v].append(u)
+
+    else:
+        tas = [(0, 0, source)]
+        vus = set()
+        compteur = 0 # Pour ne jamais comparer deux sommets entre eux dans le tas (ils peuvent être de types différents)
+
+        while tas:
+            d, _, u = heappop(tas)
+            if u in vus:
+                continue
+
+            vus.add(u)
+            ordre.append(u)
+
+            for v, poids in adjacence[u].items():
+                if v not in distance or d + poids < distance[v]:
+                    distance[v] = d + poids
+                    sigma[v] = sigma[u]
+                    predecesseurs[v] = [u]
+                    compteur += 1
+                    heappush(tas, (distance[v], compteur, v))
+
+                elif d + poids == distance[v] and v not in vus:
+                    sigma[v] += sigma[u]
+                    predecesseurs[v].append(u)
+
+    return ordre, predecesseurs, sigma
+
+######################################################################################################
+
+def contributions(adjacence, sources, ponderee):
+    """Renvoie la somme des dépendances de Brandes de chaque sommet et de chaque arête pour les sources données."""
+    centralite_sommets = { s: 0.0 for s in adjacence }
+    centralite_aretes = dict()
+
+    for source in sources:
+        ordre, predecesseurs, sigma = parcours_brandes(adjacence, source, ponderee)
+        dependance = { s: 0.0 for s in ordre }
+
+        # On remonte les sommets du plus éloigné au plus proche de la source pour accumuler les dépendances
+        for w in reversed(ordre):
+            for v in predecesseurs[w]:
+                part = sigma[v] / sigma[w] * (1 + dependance[w])
+                dependance[v] += part
+
+                arete = (v, w) if v <= w else (w, v)
+                centralite_aretes[arete] = centralite_aretes.get(arete, 0.0) + part
+
+            if w != source:
+                centralite_sommets[w] += dependance[w]
+
+    return centralite_sommets, centralite_aretes
+
+def contributions_lot(arguments):
+    return contributions(*arguments)
+
+######################################################################################################
+
+def reduire(adjacence, sources, ponderee, processus, facteur):
+    """Répartit les sources entre 'processus' processus, puis additionne les tableaux de dépendances partiels."""
+    centralite_sommets = { s: 0.0 for s in adjacence }
+    centralite_aretes = { (u, v) if u <= v else (v, u): 0.0 for u in adjacence for v in adjacence[u] if u != v }
+
+    if processus is None or processus <= 1:
+        resultats = [contributions(adjacence, sources, ponderee)]
+    else:
+        lots = [(adjacence, sources[i::processus], ponderee) for i in range(processus)]
+        with ProcessPoolExecutor(max_workers=processus) as executeur:
+            resultats = list(executeur.map(contributions_lot, lots))
+
+    for partiel_sommets, partiel_aretes in resultats:
+        for s, valeur in partiel_sommets.items():
+            centralite_sommets[s] += valeur
+        for arete, valeur in partiel_aretes.items():
+            centralite_aretes[arete] += valeur
+
+    # Le graphe n'est pas orienté : chaque paire (s, t) est comptée depuis s et depuis t
+    for s in centralite_sommets:
+        centralite_sommets[s] *= facteur / 2
+    for arete in centralite_aretes:
+        centralite_aretes[arete] *= facteur / 2
+
+    return centralite_sommets, centralite_aretes
+
+######################################################################################################
+
+def centralite_intermediarite(G, ponderee=False, processus=None):
+    """Renvoie la centralité d'intermédiarité exacte (algorithme de Brandes) de chaque station et de chaque
+    connexion de G, sous forme de deux dictionnaires. Si ponderee est vrai, les plus courts chemins tiennent
+    compte des temps de trajet. Les sources sont réparties sur 'processus' processus."""
+    adjacence = G.adjacence(ponderee)
+    return reduire(adjacence, list(adjacence), ponderee, processus, 1)
+
+def centralite_intermediarite_approchee(G, echantillon, ponderee=False, processus=None, risque=0.05, graine=None):
+    """Estime la centralité d'intermédiarité à partir de 'echantillon' sources tirées au hasard. Renvoie les
+    deux dictionnaires de centralité et une borne d'erreur (Hoeffding) valable pour toutes les stations et
+    connexions à la fois avec une probabilité d'au moins 1 - risque."""
+    if echantillon <= 0:
+        raise ValueError("échantillon vide : " + str(echantillon) + " sources")
+
+    adjacence = G.adjacence(ponderee)
+    n = len(adjacence)
+
+    if echantillon >= n:
+        return reduire(adjacence, list(adjacence), ponderee, processus, 1) + (0.0,)
+
+    sources = random.Random(graine).sample(list(adjacence), echantillon)
+    sommets, aretes = reduire(adjacence, sources, ponderee, processus, n / echantillon)
+
+    # La dépendance d'une source envers un sommet ou une arête est comprise entre 0 et n - 1
+    nombre_valeurs = len(sommets) + len(aretes)
+    erreur = n * (n - 1) / 2 * sqrt(log(2 * nombre_valeurs / risque) / (2 * echantillon))
+
+    return sommets, aretes, erreur
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from graphe_partage import graphe_processus, pool_partage
+from instrumentation import Compteurs
+from array import array
+
+######################################################################################################
+
+def composantes_connexes(G):
+    """Renvoie la liste des composantes connexes de G (listes de sommets), de la plus grande à la plus
+    petite. Elles sont calculées en un seul passage sur les arêtes par union-find sur les indices des
+    sommets, stocké dans des tableaux (module array), avec union par taille et compression par moitié."""
+    sommets = list(G.sommets())
+    indices = { s: i for i, s in enumerate(sommets) }
+    n = len(sommets)
+    parent = array('l', range(n))
+    taille = array('l', [1]) * n
+
+    def trouver(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, u in enumerate(sommets):
+        for v, _ in G.voisins(u):
+            j = indices[v]
+            # Chaque arête n'est traitée qu'une fois, depuis sa plus petite extrémité
+            if i < j:
+                a, b = trouver(i), trouver(j)
+                if a != b:
+                    if taille[a] < taille[b]:
+                        a, b = b, a
+                    parent[b] = a
+                    taille[a] += taille[b]
+
+    groupes = dict()
+    for i in range(n):
+        groupes.setdefault(trouver(i), []).append(sommets[i])
+
+    return sorted(groupes.values(), key=len, reverse=True)
+
+######################################################################################################
+
+class VueComposante(object):
+    """Vue d'une composante connexe d'un graphe, sans copie : comme aucune arête ne sort de la composante,
+    les voisins sont ceux du graphe. Elle peut remplacer le graphe dans les fonctions qui ne font que le
+    lire (ponts, points_articulation, etc.)."""
+    def __init__(self, G, sommets):
+        self.G = G
+        self.liste_sommets = sommets
+        self.ensemble_sommets = set(sommets)
+        self.noms_sommets = G.noms_sommets
+
+    def sommets(self):
+        return set(self.ensemble_sommets)
+
+    def voisins(self, sommet):
+        return self.G.voisins(sommet)
+
+    def contient_sommet(self, u):
+        return u in self.ensemble_sommets
+
+    def nombre_sommets(self):
+        return len(self.ensemble_sommets)
+
+    def nom_sommet(self, n):
+        return self.G.nom_sommet(n)
+
+    def nom_sommet_et_num(self, n):
+        return self.G.nom_sommet_et_num(n)
+
+    def temps_trajet(self, u, v):
+        return self.G.temps_trajet(u, v)
+
+    def adjacence(self, ponderee=False):
+        return {
+            u: {v: (self.G.temps_trajet(u, v) if ponderee else 1) for v, _ in self.G.voisins(u)}
+            for u in self.liste_sommets
+        }
+
+######################################################################################################
+
+def lots_composantes(composantes, taille_lot):
+    """Regroupe les composantes (de la plus grande à la plus petite) en lots consécutifs d'au moins
+    'taille_lot' sommets (sauf le dernier) : une grande composante forme un lot à elle seule, les petites
+    sont regroupées pour ne pas payer l'envoi d'une tâche par composante."""
+    lots, lot, total = [], [], 0
+    for composante in composantes:
+        lot.append(composante)
+        total += len(composante)
+        if total >= taille_lot:
+            lots.append(lot)
+            lot, total = [], 0
+    if lot:
+        lots.append(lot)
+    return lots
+
+def fusionner(resultats):
+    """Fusionne les résultats d'une analyse sur chaque composante : union des ensembles, concaténation des
+    listes, réunion des dictionnaires."""
+    if isinstance(resultats[0], (set, frozenset)):
+        return set().union(*resultats)
+    if isinstance(resultats[0], dict):
+        fusion = dict()
+        for resultat in resultats:
+            fusion.update(resultat)
+        return fusion
+    if isinstance(resultats[0], list):
+        return [element for resultat in resultats for element in resultat]
+    raise TypeError("résultats impossibles à fusionner : " + type(resultats[0]).__name__)
+
+def composantes_lot(arguments):
+    analyse, lot, avec_compteurs = arguments
+    compteurs = Compteurs() if avec_compteurs else None
+    resultats = [analyse(VueComposante(graphe_processus(), sommets), compteurs) for sommets in lot]
+    return resultats, compteurs
+
+def par_composante(G, analyse, processus=None, compteurs=None, taille_lot=None):
+    """Renvoie le résultat de analyse(G, compteurs) calculé séparément sur chaque composante connexe de G,
+    réparties sur 'processus' processus, puis fusionné (cf. fusionner). Les plus grandes composantes sont
+    envoyées en premier, et les petites regroupées en lots d'au moins 'taille_lot' sommets (par défaut un
+    quart de la part de chaque processus). 'analyse' doit être une fonction du niveau d'un module. Les
+    processus lisent G dans un segment de mémoire partagée (cf. pool_partage).
+
+    Le résultat est celui de analyse(G) pour les analyses qui se décomposent par composante (ponts,
+    points_articulation) ; les améliorations obtenues ainsi réparent chaque composante séparément, sans
+    relier les composantes entre elles."""
+    composantes = composantes_connexes(G)
+    if not processus or processus <= 1 or len(composantes) < 2:
+        return analyse(G, compteurs)
+
+    if taille_lot is None:
+        taille_lot = max(1, G.nombre_sommets() // (4 * processus))
+    lots = lots_composantes(composantes, taille_lot)
+
+    with pool_partage(G, processus) as executeur:
+        taches = [executeur.submit(composantes_lot, (analyse, lot, compteurs is not None)) for lot in lots]
+        resultats = []
+        for tache in taches:
+            resultats_lot, compteurs_lot = tache.result()
+            resultats += resultats_lot
+            if compteurs is not None:
+                compteurs.fusionner([compteurs_lot])
+
+    return fusionner(resultats)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from heapq import heappush, heappop
+from math import inf
+from os import getpid, makedirs, replace
+from os.path import isfile, join
+import json
+import mmap
+
+DOSSIER_CACHE = "./cache/"
+
+# Les temps entiers plus petits que cette valeur sont stockés sur 16 bits, elle-même représentant l'infini
+INFINI_16_BITS = 65535
+
+######################################################################################################
+
+def dijkstra(adjacence, source, cibles=None):
+    """Renvoie le dictionnaire des distances depuis 'source' vers tous les sommets accessibles,
+    'adjacence' étant de la forme {u: {v: poids}} (cf. Graphe.adjacence). Si 'cibles' est donné, on
+    s'arrête dès que toutes les cibles ont leur distance définitive (les autres distances du
+    dictionnaire ne sont alors que des majorants)."""
+    distance = { source: 0 }
+    tas = [(0, 0, source)]
+    vus = set()
+    compteur = 0 # Pour ne jamais comparer deux sommets entre eux dans le tas
+    restantes = None if cibles is None else set(cibles)
+
+    while tas:
+        d, _, u = heappop(tas)
+        if u in vus:
+            continue
+        vus.add(u)
+
+        if restantes is not None:
+            restantes.discard(u)
+            if not restantes:
+                break
+
+        for v, poids in adjacence[u].items():
+            if d + poids < distance.get(v, inf):
+                distance[v] = d + poids
+                compteur += 1
+                heappush(tas, (distance[v], compteur, v))
+
+    return distance
+
+def dijkstra_sources(adjacence, sources):
+    """Dijkstra depuis plusieurs sources à la fois. Renvoie le dictionnaire des distances de chaque sommet
+    accessible à la source la plus proche, et celui qui associe à chaque sommet cette source."""
+    distance = dict()
+    origine = dict()
+    tas = []
+    compteur = 0
+
+    for source in sources:
+        distance[source] = 0
+        origine[source] = source
+        compteur += 1
+        heappush(tas, (0, compteur, source))
+
+    vus = set()
+    while tas:
+        d, _, u = heappop(tas)
+        if u in vus:
+            continue
+        vus.add(u)
+
+        for v, poids in adjacence[u].items():
+            if d + poids < distance.get(v, inf):
+                distance[v] = d + poids
+                origine[v] = origine[u]
+                compteur += 1
+                heappush(tas, (distance[v], compteur, v))
+
+    return distance, origine
+
+######################################################################################################
+
+def lignes_dijkstra(adjacence, stations, sources):
+    """Renvoie les lignes de la matrice des temps de trajet correspondant aux sources données."""
+    lignes = []
+    for source in sources:
+        distance = dijkstra(adjacence, source)
+        lignes.append([distance.get(s, inf) for s in stations])
+    return lignes
+
+def lignes_dijkstra_lot(arguments):
+    return lignes_dijkstra(*arguments)
+
+def floyd_warshall(adjacence, stations):
+    """Renvoie la matrice des temps de trajet (liste de lignes) calculée par Floyd-Warshall. Chaque étape
+    met à jour une ligne entière d'un coup, ce qui convient aux petits graphes denses."""
+    indices = { s: i for i, s in enumerate(stations) }
+    D = [[inf] * len(stations) for _ in stations]
+
+    for u in stations:
+        D[indices[u]][indices[u]] = 0
+        for v, poids in adjacence[u].items():
+            D[indices[u]][indices[v]] = min(D[indices[u]][indices[v]], poids)
+
+    for k in range(len(stations)):
+        ligne_k = D[k]
+        for i in range(len(stations)):
+            d_ik = D[i][k]
+            if d_ik < inf:
+                D[i] = [min(d_ij, d_ik + d_kj) for d_ij, d_kj in zip(D[i], ligne_k)]
+
+    return D
+
+def calculer_temps_trajets(G, processus=None):
+    """Renvoie la liste des stations de G et la matrice de leurs temps de trajet (liste de lignes). On
+    utilise Floyd-Warshall sur les petits graphes denses, et un Dijkstra par station sinon, les sources
+    étant alors réparties sur 'processus' processus."""
+    adjacence = G.adjacence(ponderee=True)
+    stations = sorted(adjacence)
+    n = len(stations)
+    m = sum(len(adjacence[u]) for u in adjacence) // 2
+
+    if n <= 300 and m >= n * n / 10:
+        return stations, floyd_warshall(adjacence, stations)
+
+    if processus is None or processus <= 1:
+        return stations, lignes_dijkstra(adjacence, stations, stations)
+
+    # Chaque processus traite un bloc contigu de sources pour pouvoir recoller les lignes dans l'ordre
+    taille = (n + processus - 1) // processus
+    lots = [(adjacence, stations, stations[i:i + taille]) for i in range(0, n, taille)]
+    with ProcessPoolExecutor(max_workers=processus) as executeur:
+        return stations, [ligne for lignes in executeur.map(lignes_dijkstra_lot, lots) for ligne in lignes]
+
+######################################################################################################
+
+def temps_groupes(adjacence, groupes):
+    """Renvoie, pour chaque groupe (origine, destinations), la liste des temps de trajet de l'origine
+    vers ses destinations, calculés par un seul Dijkstra arrêté dès qu'elles sont toutes atteintes."""
+    resultats = []
+    for origine, destinations in groupes:
+        if origine not in adjacence:
+            resultats.append([inf] * len(destinations))
+            continue
+
+        distance = dijkstra(adjacence, origine, [d for d in destinations if d in adjacence])
+        resultats.append([distance.get(d, inf) for d in destinations])
+    return resultats
+
+def temps_groupes_lot(arguments):
+    return temps_groupes(*arguments)
+
+def temps_trajets_par_lots(G, origines, destinations, processus=None):
+    """Renvoie le tableau (array de flottants 'd', aligné sur les entrées) des temps de trajet entre
+    origines[i] et destinations[i]. Les paires sont regroupées par origine pour ne lancer qu'une
+    recherche par origine distincte, et les groupes sont répartis sur 'processus' processus."""
+    if len(origines) != len(destinations):
+        raise ValueError("origines et destinations doivent avoir la même longueur")
+
+    adjacence = G.adjacence(ponderee=True)
+    positions = dict()
+    for i, origine in enumerate(origines):
+        positions.setdefault(origine, []).append(i)
+
+    groupes = [(origine, [destinations[i] for i in indices]) for origine, indices in positions.items()]
+
+    if processus is None or processus <= 1:
+        resultats = temps_groupes(adjacence, groupes)
+    else:
+        # Les groupes les plus gros sont distribués en premier, à tour de rôle, pour équilibrer les processus
+        ordre = sorted(range(len(groupes)), key=lambda k: -len(groupes[k][1]))
+        lots = [ordre[i::processus] for i in range(processus)]
+        with ProcessPoolExecutor(max_workers=processus) as executeur:
+            parties = executeur.map(temps_groupes_lot, [(adjacence, [groupes[k] for k in lot]) for lot in lots])
+            resultats = [None] * len(groupes)
+            for lot, partie in zip(lots, parties):
+                for k, temps in zip(lot, partie):
+                    resultats[k] = temps
+
+    tableau = array('d', bytes(8 * len(origines)))
+    for (origine, _), temps in zip(groupes, resultats):
+        for i, t in zip(positions[origine], temps):
+            tableau[i] = t
+
+    return tableau
+
+######################################################################################################
+
+class MatriceTemps(object):
+    """Matrice des temps de trajet entre toutes les stations, stockée dans un tableau plat de flottants
+    32 bits ('f'), ou d'entiers 16 bits ('H') quand tous les temps sont des entiers assez petits. Quand
+    les valeurs sont projetées depuis le cache (cf. lire_matrice), 'projection' est le mmap à fermer."""
+    def __init__(self, stations, valeurs, type_valeurs, projection=None):
+        self.stations = stations
+        self.indices = { s: i for i, s in enumerate(stations) }
+        self.valeurs = valeurs
+        self.type_valeurs = type_valeurs
+        self.infini = INFINI_16_BITS if type_valeurs == 'H' else inf
+        self.projection = projection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.fermer()
+
+    def fermer(self):
+        """Ferme la projection en mémoire du cache (la matrice n'est alors plus utilisable)."""
+        if self.projection is not None:
+            self.valeurs.release()
+            self.projection.close()
+            self.projection = None
+
+    def temps(self, u, v):
+        """Renvoie le temps de trajet minimal entre u et v (inf s'ils ne sont pas reliés)."""
+        valeur = self.valeurs[self.indices[u] * len(self.stations) + self.indices[v]]
+        return inf if valeur == self.infini else valeur
+
+    def temps_depuis(self, u):
+        """Renvoie le dictionnaire des temps de trajet de u vers toutes les stations."""
+        return { v: self.temps(u, v) for v in self.stations }
+
+######################################################################################################
+
+def cle_cache(G):
+    """Renvoie la clé identifiant le contenu de G : ses connexions (avec leur ligne) et leurs temps de
+    trajet, pour qu'une modification des fichiers de données ne resserve pas une matrice périmée."""
+    aretes = sorted(repr(arete) for arete in G.aretes())
+    temps = sorted(repr(element) for element in getattr(G, "temps_trajets", {}).items())
+    description = "\n".join(aretes) + "\n/\n" + "\n".join(temps) + "\n/" + str(G.nombre_sommets())
+    return sha1(description.encode()).hexdigest()[:16]
+
+def ecrire_matrice(chemin, stations, lignes):
+    """Écrit la matrice sur le disque (un fichier .bin pour les valeurs, un fichier .json pour les stations)
+    et renvoie le type de valeurs choisi."""
+    valeurs = [t for ligne in lignes for t in ligne]
+    finies = [t for t in valeurs if t < inf]
+
+    if all(t == int(t) for t in finies) and max(finies, default=0) < INFINI_16_BITS:
+        type_valeurs = 'H'
+        valeurs = array('H', (int(t) if t < inf else INFINI_16_BITS for t in valeurs))
+    else:
+        type_valeurs = 'f'
+        valeurs = array('f', valeurs)
+
+    # Chaque fichier est écrit à côté puis renommé d'un coup : un autre processus qui lit le cache en même
+    # temps ne voit jamais un fichier à moitié écrit, et le .json (écrit en dernier) garantit le .bin
+    temporaire = chemin + "." + str(getpid()) + ".tmp"
+
+    with open(temporaire, "wb") as fichier:
+        valeurs.tofile(fichier)
+    replace(temporaire, chemin + ".bin")
+
+    with open(temporaire, "w") as fichier:
+        json.dump({ "stations": stations, "type": type_valeurs }, fichier)
+    replace(temporaire, chemin + ".json")
+
+    return type_valeurs
+
+def lire_matrice(chemin):
+    """Projette en mémoire (mmap) une matrice écrite par ecrire_matrice, sans la recopier. La projection
+    est fermée par MatriceTemps.fermer (ou en sortie d'un bloc with)."""
+    with open(chemin + ".json", "r") as fichier:
+        description = json.load(fichier)
+
+    if len(description["stations"]) == 0:
+        return MatriceTemps([], array(description["type"]), description["type"])
+
+    with open(chemin + ".bin", "rb") as fichier:
+        projection = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return MatriceTemps(description["stations"], memoryview(projection).cast(description["type"]), description["type"], projection)
+
+def matrice_temps_trajets(G, processus=None, dossier=DOSSIER_CACHE):
+    """Renvoie la MatriceTemps de G. Elle est mise en cache dans 'dossier' selon le contenu de G (cf.
+    cle_cache), et n'est recalculée que si ce cache n'existe pas encore (dossier=None désactive le cache)."""
+    if dossier is None:
+        stations, lignes = calculer_temps_trajets(G, processus)
+        return MatriceTemps(stations, array('f', (t for ligne in lignes for t in ligne)), 'f')
+
+    chemin = join(dossier, "temps_" + cle_cache(G))
+
+    if not (isfile(chemin + ".json") and isfile(chemin + ".bin")):
+        makedirs(dossier, exist_ok=True)
+        stations, lignes = calculer_temps_trajets(G, processus)
+        ecrire_matrice(chemin, stations, lignes)
+
+    return lire_matrice(chemin)
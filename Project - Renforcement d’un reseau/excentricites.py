@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from distances import dijkstra
+from collections import deque
+from math import inf
+
+######################################################################################################
+
+def distances_depuis(adjacence, source, ponderee=False):
+    """Renvoie le dictionnaire des distances depuis 'source' vers tous les sommets accessibles, en nombre
+    de connexions (parcours en largeur), ou en temps de trajet (Dijkstra) si ponderee est vrai."""
+    if ponderee:
+        return dijkstra(adjacence, source)
+
+    distance = { source: 0 }
+    file = deque([source])
+
+    while file:
+        u = file.popleft()
+        for v in adjacence[u]:
+            if v not in distance:
+                distance[v] = distance[u] + 1
+                file.append(v)
+
+    return distance
+
+######################################################################################################
+
+def excentricites_extremes(G, ponderee=False, compteurs=None):
+    """Renvoie le diamètre et le rayon exacts de G (connexe), en nombre de connexions ou en temps de trajet
+    si ponderee est vrai, sous forme d'un dictionnaire : "diametre", "rayon", "centre" (stations
+    d'excentricité minimale), "peripherie" (stations d'excentricité maximale), "extremites" (deux stations
+    à distance "diametre") et "parcours" (nombre de parcours effectués).
+
+    Chaque parcours depuis une station v donne son excentricité e(v), et encadre celle de toute autre
+    station w : max(d(v, w), e(v) - d(v, w)) <= e(w) <= e(v) + d(v, w). Après un double balayage (depuis
+    la station de plus haut degré, puis depuis la plus éloignée d'elle), les parcours partent
+    alternativement de la station de plus grand majorant et de celle de plus petit minorant, parmi celles
+    dont l'excentricité n'est pas connue et peut encore être celle du diamètre ou du rayon. Sur les réseaux
+    réels, quelques parcours suffisent au lieu d'un par station."""
+    adjacence = G.adjacence(ponderee)
+    sommets = list(adjacence)
+    if not sommets:
+        raise ValueError("graphe vide")
+
+    minorant = dict.fromkeys(sommets, 0)
+    majorant = dict.fromkeys(sommets, inf)
+    candidats = sommets
+    extremites, longueur = None, -1
+    parcours = 0
+    plus_grand_majorant = True
+
+    source = max(sommets, key=lambda s: len(adjacence[s]))
+
+    while True:
+        distance = distances_depuis(adjacence, source, ponderee)
+        parcours += 1
+        if len(distance) < len(sommets):
+            raise ValueError("graphe non connexe : " + str(len(sommets) - len(distance)) + " stations inaccessibles depuis " + str(source))
+
+        plus_loin = max(distance, key=distance.get)
+        excentricite = distance[plus_loin]
+        if excentricite > longueur:
+            extremites, longueur = (source, plus_loin), excentricite
+
+        for w, d in distance.items():
+            minorant[w] = max(minorant[w], d, excentricite - d)
+            majorant[w] = min(majorant[w], excentricite + d)
+
+        # Une station reste candidate tant que son excentricité peut encore être le diamètre ou le rayon
+        diametre, rayon = max(minorant.values()), min(majorant.values())
+        candidats = [w for w in candidats if minorant[w] < majorant[w] and (majorant[w] >= diametre or minorant[w] <= rayon)]
+        if not candidats:
+            break
+
+        if parcours == 1 and minorant[plus_loin] < majorant[plus_loin]:
+            source = plus_loin
+        elif plus_grand_majorant:
+            source = max(candidats, key=lambda w: (majorant[w], len(adjacence[w])))
+        else:
+            source = min(candidats, key=lambda w: (minorant[w], -len(adjacence[w])))
+        plus_grand_majorant = not plus_grand_majorant
+
+    if compteurs is not None:
+        compteurs.incrementer("excentricites.parcours", parcours)
+
+    # Les stations du centre et de la périphérie ont toutes une excentricité exacte (minorant = majorant)
+    return {
+        "diametre": diametre,
+        "rayon": rayon,
+        "centre": sorted(w for w in sommets if majorant[w] == rayon),
+        "peripherie": sorted(w for w in sommets if minorant[w] == diametre),
+        "extremites": extremites,
+        "parcours": parcours,
+    }
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+
+######################################################################################################
+
+class GrapheResiduel(object):
+    """Graphe résiduel orienté stocké dans des tableaux (module array) : les arcs sont numérotés, l'arc
+    e et son arc inverse e ^ 1 sont créés ensemble, et les arcs sortant d'un sommet u forment une liste
+    chaînée qui commence en tete[u] et se poursuit par suivant[e] (-1 marque la fin)."""
+    def __init__(self, nombre_sommets):
+        """Initialise un graphe résiduel sans arc, de sommets 0, ..., nombre_sommets - 1."""
+        self.nombre_sommets = nombre_sommets
+        self.tete = array('l', [-1]) * nombre_sommets
+        self.suivant = array('l')
+        self.cible = array('l')
+        self.capacite = array('d')
+        self.capacite_initiale = array('d')
+
+    def ajouter_arc(self, u, v, capacite, capacite_inverse=0):
+        """Ajoute l'arc u -> v et son inverse v -> u (de capacités données) et renvoie le numéro du 1er."""
+        e = len(self.cible)
+        for origine, extremite, c in ((u, v, capacite), (v, u, capacite_inverse)):
+            self.suivant.append(self.tete[origine])
+            self.tete[origine] = len(self.cible)
+            self.cible.append(extremite)
+            self.capacite.append(c)
+            self.capacite_initiale.append(c)
+        return e
+
+    def retirer_arcs_depuis(self, e):
+        """Retire tous les arcs de numéro au moins e (les derniers ajoutés)."""
+        for f in range(len(self.cible) - 1, e - 1, -1):
+            self.tete[self.cible[f ^ 1]] = self.suivant[f]
+        del self.suivant[e:], self.cible[e:], self.capacite[e:], self.capacite_initiale[e:]
+
+    def reinitialiser(self):
+        """Remet toutes les capacités à leur valeur initiale (flot nul)."""
+        self.capacite = array('d', self.capacite_initiale)
+
+    def niveaux(self, source):
+        """Renvoie le tableau des distances (en nombre d'arcs de capacité résiduelle non nulle) depuis
+        'source', -1 pour les sommets non atteignables."""
+        tete, suivant, cible, capacite = self.tete, self.suivant, self.cible, self.capacite
+        niveau = array('l', [-1]) * self.nombre_sommets
+        niveau[source] = 0
+        file = [source]
+
+        for u in file:
+            e = tete[u]
+            while e != -1:
+                v = cible[e]
+                if capacite[e] > 0 and niveau[v] < 0:
+                    niveau[v] = niveau[u] + 1
+                    file.append(v)
+                e = suivant[e]
+
+        return niveau
+
+######################################################################################################
+
+def dinic(residuel, source, puits, compteurs=None):
+    """Calcule un flot maximal de 'source' à 'puits' dans le graphe résiduel (modifié en place) avec
+    l'algorithme de Dinic, et renvoie sa valeur. Chaque phase calcule les niveaux des sommets par un
+    parcours en largeur puis sature tous les plus courts chemins augmentants (flot bloquant)."""
+    suivant, cible, capacite = residuel.suivant, residuel.cible, residuel.capacite
+    valeur = 0
+    phases = chemins = 0
+
+    while True:
+        niveau = residuel.niveaux(source)
+        if niveau[puits] < 0:
+            break
+        phases += 1
+
+        # courant[u] : prochain arc sortant de u à essayer, les précédents ne menant plus au puits
+        courant = array('l', residuel.tete)
+        chemin = []
+        u = source
+
+        while True:
+            if u == puits:
+                delta = min(capacite[e] for e in chemin)
+                for e in chemin:
+                    capacite[e] -= delta
+                    capacite[e ^ 1] += delta
+                valeur += delta
+                chemins += 1
+                chemin = []
+                u = source
+                continue
+
+            e = courant[u]
+            while e != -1 and not (capacite[e] > 0 and niveau[cible[e]] == niveau[u] + 1):
+                e = suivant[e]
+            courant[u] = e
+
+            if e != -1:
+                chemin.append(e)
+                u = cible[e]
+
+            elif u == source:
+                break
+
+            else:
+                # Impasse : on revient au sommet précédent, qui passera à son arc suivant
+                niveau[u] = -1
+                u = cible[chemin.pop() ^ 1]
+
+    if compteurs is not None:
+        compteurs.incrementer("flot.phases", phases)
+        compteurs.incrementer("flot.chemins_augmentants", chemins)
+
+    return valeur
+
+######################################################################################################
+
+class FlotsReseau(object):
+    """Réseau de flot d'un graphe, construit une seule fois pour répondre à plusieurs requêtes. Chaque
+    connexion (les connexions parallèles de plusieurs lignes étant fusionnées) peut être empruntée dans
+    les deux sens, avec une capacité de 1 si capacites vaut "unite", ou son temps de trajet s'il vaut
+    "temps".
+
+    Si sommets est vrai, chaque station s est dédoublée en une entrée 2i et une sortie 2i + 1 reliées par
+    un arc de capacité 1 (les connexions sont alors de capacité infinie) : le flot maximal est le nombre
+    de chemins sans station intermédiaire commune, et la coupe minimale est un ensemble de stations."""
+    def __init__(self, G, capacites="unite", sommets=False):
+        if capacites not in ("unite", "temps"):
+            raise ValueError("capacités inconnues : " + str(capacites))
+
+        adjacence = G.adjacence(ponderee=(capacites == "temps"))
+        self.sommets = sommets
+        self.stations = list(adjacence)
+        self.indices = { s: i for i, s in enumerate(self.stations) }
+
+        # Deux sommets de plus : la super-source et le super-puits, reliés aux stations à chaque requête
+        n = 2 * len(self.stations) if sommets else len(self.stations)
+        self.super_source, self.super_puits = n, n + 1
+        self.residuel = GrapheResiduel(n + 2)
+        self.arcs = [] # (numéro de l'arc, station ou arête correspondante) des arcs pouvant faire partie de la coupe
+
+        for u in adjacence:
+            i = self.indices[u]
+            if sommets:
+                self.arcs.append((self.residuel.ajouter_arc(2 * i, 2 * i + 1, 1), u))
+
+            for v, capacite in adjacence[u].items():
+                j = self.indices[v]
+                if sommets:
+                    self.residuel.ajouter_arc(2 * i + 1, 2 * j, inf)
+                elif i < j:
+                    # Une connexion non orientée : deux arcs opposés de même capacité, chacun inverse de l'autre
+                    self.arcs.append((self.residuel.ajouter_arc(i, j, capacite, capacite), (u, v) if u <= v else (v, u)))
+
+        self.nombre_arcs = len(self.residuel.cible)
+
+    def zone(self, stations):
+        """Renvoie la liste des stations d'une zone donnée par une station ou un itérable de stations."""
+        try:
+            if stations in self.indices:
+                return [stations]
+        except TypeError: # une liste ou un ensemble de stations
+            pass
+        return list(stations)
+
+    def flot_maximal(self, sources, puits, compteurs=None):
+        """Renvoie la valeur du flot maximal entre les stations 'sources' et 'puits' (une station ou un
+        itérable de stations chacune) et une coupe minimale : la liste triée des connexions (u, v) avec u <= v, ou des
+        stations si le réseau dédouble les stations, dont la fermeture sépare les sources des puits.
+        La valeur est infinie si les zones se touchent (même station, ou stations voisines en dédoublant
+        les stations)."""
+        sources, puits = self.zone(sources), self.zone(puits)
+        if set(sources) & set(puits):
+            return inf, []
+
+        residuel = self.residuel
+        residuel.reinitialiser()
+        for s in sources:
+            i = self.indices[s]
+            residuel.ajouter_arc(self.super_source, 2 * i + 1 if self.sommets else i, inf)
+        for t in puits:
+            i = self.indices[t]
+            residuel.ajouter_arc(2 * i if self.sommets else i, self.super_puits, inf)
+
+        valeur = dinic(residuel, self.super_source, self.super_puits, compteurs)
+
+        # La coupe est formée des arcs saturés qui partent des sommets encore atteignables depuis la source
+        niveau = residuel.niveaux(self.super_source)
+        coupe = []
+        if valeur != inf:
+            for e, element in self.arcs:
+                origine, extremite = residuel.cible[e ^ 1], residuel.cible[e]
+                # Une connexion peut être coupée dans un sens ou dans l'autre, une station de l'entrée vers la sortie
+                if niveau[origine] >= 0 and niveau[extremite] < 0 or not self.sommets and niveau[extremite] >= 0 and niveau[origine] < 0:
+                    coupe.append(element)
+
+        residuel.retirer_arcs_depuis(self.nombre_arcs)
+
+        # Les capacités sont entières : le flot aussi
+        return (int(valeur) if valeur != inf else valeur), sorted(coupe)
+
+######################################################################################################
+
+def flot_maximal(G, sources, puits, capacites="unite", sommets=False, compteurs=None):
+    """Renvoie la valeur du flot maximal entre deux stations (ou deux zones) de G et une coupe minimale,
+    cf. FlotsReseau. Avec les valeurs par défaut, c'est le nombre de chemins sans connexion commune."""
+    return FlotsReseau(G, capacites, sommets).flot_maximal(sources, puits, compteurs)
+
+def flots_lot(arguments):
+    G, paires, capacites, sommets = arguments
+    reseau = FlotsReseau(G, capacites, sommets)
+    return [reseau.flot_maximal(sources, puits) for sources, puits in paires]
+
+def flots_par_paires(G, paires, capacites="unite", sommets=False, processus=None):
+    """Renvoie la liste des (valeur, coupe) des flots maximaux entre les paires (sources, puits) données,
+    dans le même ordre. Le réseau de flot n'est construit qu'une fois par processus ; les paires sont
+    réparties sur 'processus' processus."""
+    paires = list(paires)
+    if not processus or processus <= 1 or len(paires) < 2:
+        return flots_lot((G, paires, capacites, sommets))
+
+    taille = -(-len(paires) // processus)
+    lots = [(G, paires[k:k + taille], capacites, sommets) for k in range(0, len(paires), taille)]
+
+    with ProcessPoolExecutor(processus) as executeur:
+        return [resultat for lot in executeur.map(flots_lot, lots) for resultat in lot]
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from os import makedirs
+from os.path import join
+import argparse
+import random
+
+######################################################################################################
+
+def lignes_synthetiques(nombre_lignes, stations_par_ligne, densite_correspondances=0.1, branches=0.2,
+                        boucles=0.1, ponts=0, articulations=0, graine=0):
+    """Génère un réseau synthétique ligne par ligne. Pour chaque ligne, renvoie (via yield) un triplet
+    (nom, stations, connexions) où stations est la liste des couples (identifiant, nom) propres à la
+    ligne et connexions la liste des triplets (u, v, temps de trajet).
+
+    - chaque ligne est un chemin de 'stations_par_ligne' stations ; la 1ère ligne est refermée en boucle,
+      et chacune des suivantes commence par une correspondance avec une station déjà existante, chacune de
+      ses autres stations l'étant aussi avec la probabilité 'densite_correspondances' ; une ligne sur
+      1 / 'boucles' est refermée en boucle sur sa 1ère station, et une ligne qui ne finit pas sur une
+      correspondance (ou une boucle sans autre correspondance) est prolongée jusqu'à une autre ligne ;
+    - une ligne sur 1 / 'branches' (en moyenne) a une branche d'un tiers de sa longueur, qui se termine
+      elle aussi par une correspondance ;
+    - chaque ligne (et chaque branche) relie ainsi deux stations distinctes du réseau déjà construit : le
+      réseau de base est 2-connexe (sans pont ni point d'articulation) dès que les lignes ont au moins 3
+      stations ;
+    - on ajoute enfin, sur une ligne "ANTENNES", 'ponts' antennes d'une station (une arête pendante
+      chacune) réparties sur 'articulations' stations d'accroche, et un triangle sur chaque station
+      d'accroche restante. Le réseau a alors exactement 'ponts' ponts et 'articulations' points
+      d'articulation (une antenne fait forcément de sa station d'accroche un point d'articulation : il en
+      faut au moins un s'il y a des ponts).
+
+    Les identifiants de stations sont consécutifs à partir de 1, et les noms en sont déduits : le
+    générateur ne garde en mémoire que la ligne en cours, ce qui permet de générer des millions de stations."""
+    if ponts > 0 and articulations == 0:
+        raise ValueError("des ponts sans point d'articulation sont impossibles dans un réseau connexe")
+
+    alea = random.Random(graine)
+    prochain = 1 # prochain identifiant de station libre
+
+    def nouvelle_station():
+        nonlocal prochain
+        prochain += 1
+        return prochain - 1
+
+    def temps():
+        return alea.randrange(60, 181, 30)
+
+    def correspondance(exclues, limite):
+        """Renvoie une station existante (d'identifiant au plus 'limite') qui n'est pas dans 'exclues'."""
+        for _ in range(10):
+            s = alea.randrange(1, limite + 1)
+            if s not in exclues:
+                return s
+        return next(s for s in range(1, limite + 1) if s not in exclues)
+
+    for k in range(1, nombre_lignes + 1):
+        existantes = prochain - 1 # stations des lignes précédentes
+        stations = []
+        arrets = []
+
+        for i in range(stations_par_ligne):
+            # Correspondance avec une station déjà existante (jamais deux fois la même sur une ligne)
+            if prochain > 1 and (i == 0 or alea.random() < densite_correspondances):
+                s = alea.randrange(1, prochain)
+                if s not in arrets:
+                    arrets.append(s)
+                    continue
+
+            s = nouvelle_station()
+            stations.append((s, "Station " + str(s)))
+            arrets.append(s)
+
+        connexions = [(arrets[i], arrets[i + 1], temps()) for i in range(len(arrets) - 1)]
+
+        # Une ligne qui ne finit pas déjà sur une correspondance se termine sur une autre ligne, sauf si c'est
+        # une boucle qui a une correspondance ailleurs qu'à sa 1ère station : elle relie ainsi toujours deux
+        # stations distinctes du réseau déjà construit
+        boucle = len(arrets) > 2 and (existantes == 0 or alea.random() < boucles)
+        milieu = any(s <= existantes for s in arrets[1:])
+        if arrets[-1] > existantes and (not boucle or not milieu) and sum(1 for s in arrets if s <= existantes) < existantes:
+            connexions.append((arrets[-1], correspondance(arrets, existantes), temps()))
+        if boucle:
+            connexions.append((arrets[-1], arrets[0], temps()))
+
+        if len(arrets) > 2 and alea.random() < branches:
+            depart = precedent = arrets[alea.randrange(1, len(arrets) - 1)]
+            limite = prochain - 1
+            for _ in range(max(1, stations_par_ligne // 3)):
+                s = nouvelle_station()
+                stations.append((s, "Station " + str(s)))
+                connexions.append((precedent, s, temps()))
+                precedent = s
+            connexions.append((precedent, correspondance([depart], limite), temps()))
+
+        yield "METRO_" + str(k), stations, connexions
+
+    if prochain > 1 and ponts + articulations > 0:
+        stations = []
+        connexions = []
+        dernier = prochain - 1
+        if articulations > dernier:
+            raise ValueError("plus de points d'articulation demandés que de stations : " + str(articulations))
+        accroches = alea.sample(range(1, dernier + 1), articulations)
+
+        for i in range(ponts):
+            s = nouvelle_station()
+            stations.append((s, "Station " + str(s)))
+            connexions.append((accroches[i % articulations], s, temps()))
+
+        for accroche in accroches[ponts:]:
+            a, b = nouvelle_station(), nouvelle_station()
+            stations += [(a, "Station " + str(a)), (b, "Station " + str(b))]
+            connexions += [(accroche, a, temps()), (a, b, temps()), (b, accroche, temps())]
+
+        yield "METRO_ANTENNES", stations, connexions
+
+######################################################################################################
+
+def ecrire_reseau(dossier, *arguments, **parametres):
+    """Écrit le réseau synthétique (cf. lignes_synthetiques pour les paramètres) dans 'dossier', avec un
+    fichier au format de ./donnees/ par ligne, au fur et à mesure de la génération. Renvoie le nombre de
+    stations et de connexions écrites."""
+    makedirs(dossier, exist_ok=True)
+    nombre_stations = nombre_connexions = 0
+
+    for nom, stations, connexions in lignes_synthetiques(*arguments, **parametres):
+        with open(join(dossier, nom + ".txt"), "w") as fichier:
+            fichier.write("# stations\n")
+            fichier.writelines(str(s) + ":" + nom_station + "\n" for s, nom_station in stations)
+            fichier.write("# connexions\n")
+            fichier.writelines(str(u) + "/" + str(v) + "/" + str(t) + "\n" for u, v, t in connexions)
+
+        nombre_stations += len(stations)
+        nombre_connexions += len(connexions)
+
+    return nombre_stations, nombre_connexions
+
+def generer_graphe(*arguments, **parametres):
+    """Renvoie directement le Graphe du réseau synthétique (cf. lignes_synthetiques pour les paramètres),
+    identique à celui qu'on obtiendrait en chargeant les fichiers écrits par ecrire_reseau."""
+    G = Graphe()
+
+    for nom, stations, connexions in lignes_synthetiques(*arguments, **parametres):
+        for s, nom_station in stations:
+            G.ajouter_sommet(s)
+            G.ajouter_nom(s, nom_station)
+        for u, v, t in connexions:
+            G.ajouter_arete(u, v, nom)
+            G.ajouter_temps(u, v, t)
+
+    return G
+
+######################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Génère un réseau de transport synthétique au format des fichiers de ./donnees/, pour tester les algorithmes sur de grands réseaux.')
+
+    parser.add_argument('dossier', help = "dossier dans lequel écrire les fichiers des lignes")
+    parser.add_argument('--lignes', type = int, default = 16, help = "nombre de lignes (16 par défaut)")
+    parser.add_argument('--stations', type = int, default = 25, help = "nombre de stations par ligne (25 par défaut)")
+    parser.add_argument('--correspondances', type = float, default = 0.1, help = "probabilité qu'une station soit une correspondance (0.1 par défaut)")
+    parser.add_argument('--branches', type = float, default = 0.2, help = "proportion de lignes avec une branche (0.2 par défaut)")
+    parser.add_argument('--boucles', type = float, default = 0.1, help = "proportion de lignes refermées en boucle sur leur 1ère station (0.1 par défaut)")
+    parser.add_argument('--ponts', type = int, default = 0, help = "nombre exact de ponts du réseau (antennes ajoutées au réseau de base, qui n'en a pas)")
+    parser.add_argument('--articulations', type = int, default = 0, help = "nombre exact de points d'articulation du réseau (stations d'accroche des antennes et de triangles ajoutés), au moins 1 s'il y a des ponts")
+    parser.add_argument('--graine', type = int, default = 0, help = "graine du générateur aléatoire")
+
+    args = parser.parse_args()
+    stations, connexions = ecrire_reseau(args.dossier, args.lignes, args.stations, args.correspondances, args.branches,
+                                         args.boucles, args.ponts, args.articulations, args.graine)
+    print("Réseau de " + str(stations) + " stations et " + str(connexions) + " connexions écrit dans " + args.dossier)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from array import array
+from collections import ChainMap
+
 class Graphe(object):
     def __init__(self):
         """
@@ -8,6 +11,14 @@ class Graphe(object):
         """
         self.dictionnaire = dict()
         self.noms_sommets = dict()
+        self.temps_trajets = dict()
+        # Incrémenté à chaque modification, pour savoir si un résultat calculé sur le graphe est encore valable
+        self.version = 0
+        # Partition des arêtes par ligne (le poids d'une arête est le nom de sa ligne) : chaque ligne a un
+        # numéro, et masques[u][v] a le bit de chaque ligne qui relie u et v (cf. vue_lignes)
+        self.numeros_lignes = dict()
+        self.aretes_lignes = dict()
+        self.masques = dict()
 
     def ajouter_arete(self, u, v, poids):
         """Ajoute une arête entre les sommmets u et v, en créant les sommets
@@ -15,12 +26,24 @@ class Graphe(object):
         # vérification de l'existence de u et v, et création(s) sinon
         if u not in self.dictionnaire:
             self.dictionnaire[u] = set()
+            self.masques[u] = dict()
         if v not in self.dictionnaire:
             self.dictionnaire[v] = set()
+            self.masques[v] = dict()
         # ajout de u (resp. v) parmi les voisins de v (resp. u)
         self.dictionnaire[u].add((v, poids))
         self.dictionnaire[v].add((u, poids))
 
+        if poids not in self.numeros_lignes:
+            self.numeros_lignes[poids] = len(self.numeros_lignes)
+            self.aretes_lignes[poids] = set()
+        if (v, u) not in self.aretes_lignes[poids]:
+            self.aretes_lignes[poids].add((u, v))
+        bit = 1 << self.numeros_lignes[poids]
+        self.masques[u][v] = self.masques[u].get(v, 0) | bit
+        self.masques[v][u] = self.masques[v].get(u, 0) | bit
+        self.version += 1
+
     def ajouter_aretes(self, iterable):
         """Ajoute toutes les arêtes de l'itérable donné au graphe. N'importe
         quel type d'itérable est acceptable, mais il faut qu'il ne contienne
@@ -32,6 +55,8 @@ class Graphe(object):
         """Ajoute un sommet (de n'importe quel type hashable) au graphe."""
         if sommet not in self.dictionnaire:
             self.dictionnaire[sommet] = set()
+            self.masques[sommet] = dict()
+            self.version += 1
 
     def ajouter_sommets(self, iterable):
         """Ajoute tous les sommets de l'itérable donné au graphe. N'importe
@@ -61,7 +86,8 @@ class Graphe(object):
     def contient_arete(self, u, v):
         """Renvoie True si l'arête {u, v} existe, False sinon."""
         if self.contient_sommet(u) and self.contient_sommet(v):
-            return u in self.dictionnaire[v]  # ou v in self.dictionnaire[u]
+            # les voisins sont des couples (sommet, ligne) : on passe par les masques des lignes
+            return v in self.masques[u]
         return False
 
     def contient_sommet(self, u):
@@ -86,9 +112,19 @@ class Graphe(object):
         return len(self.dictionnaire)
 
     def retirer_arete(self, u, v):
-        """Retire l'arête {u, v} si elle existe; provoque une erreur sinon."""
-        self.dictionnaire[u].remove(v)  # plante si u ou v n'existe pas
-        self.dictionnaire[v].remove(u)  # plante si u ou v n'existe pas
+        """Retire l'arête {u, v} (quelle que soit sa ligne) si elle existe;
+        provoque une erreur sinon."""
+        aretes_uv = {(x, poids) for x, poids in self.dictionnaire[u] if x == v}  # plante si u n'existe pas
+        if len(aretes_uv) == 0:
+            raise KeyError((u, v))
+        self.dictionnaire[u] -= aretes_uv
+        self.dictionnaire[v] -= {(u, poids) for _, poids in aretes_uv}
+        for _, poids in aretes_uv:
+            self.aretes_lignes[poids].discard((u, v))
+            self.aretes_lignes[poids].discard((v, u))
+        self.masques[u].pop(v, None)
+        self.masques[v].pop(u, None)
+        self.version += 1
 
     def retirer_aretes(self, iterable):
         """Retire toutes les arêtes de l'itérable donné du graphe. N'importe
@@ -100,10 +136,15 @@ class Graphe(object):
     def retirer_sommet(self, sommet):
         """Efface le sommet du graphe, et retire toutes les arêtes qui lui
         sont incidentes."""
+        # retirer le sommet des ensembles de ses voisins
+        for u, poids in list(self.dictionnaire[sommet]):
+            self.dictionnaire[u].discard((sommet, poids))
+            self.aretes_lignes[poids].discard((u, sommet))
+            self.aretes_lignes[poids].discard((sommet, u))
+            self.masques[u].pop(sommet, None)
         del self.dictionnaire[sommet]
-        # retirer le sommet des ensembles de voisins
-        for u in self.dictionnaire:
-            self.dictionnaire[u].discard(sommet)
+        del self.masques[sommet]
+        self.version += 1
 
     def retirer_sommets(self, iterable):
         """Efface les sommets de l'itérable donné du graphe, et retire toutes
@@ -137,9 +178,430 @@ class Graphe(object):
 
     def ajouter_nom(self, sommet, nom):
         self.noms_sommets[sommet] = nom
+        self.version += 1
 
     def nom_sommet(self, n):
         return self.noms_sommets[n]
     
     def nom_sommet_et_num(self, n):
         return self.noms_sommets[n] + ' (' + str(n) + ')'
+
+    def ajouter_temps(self, u, v, temps):
+        """Enregistre le temps de trajet entre u et v. Si plusieurs lignes
+        relient u et v, on garde le plus court."""
+        if (u, v) not in self.temps_trajets or temps < self.temps_trajets[(u, v)]:
+            self.temps_trajets[(u, v)] = temps
+            self.temps_trajets[(v, u)] = temps
+            self.version += 1
+
+    def temps_trajet(self, u, v):
+        """Renvoie le temps de trajet entre u et v, ou 1 s'il n'est pas connu."""
+        return self.temps_trajets.get((u, v), 1)
+
+    def adjacence(self, ponderee=False):
+        """Renvoie le graphe simple sous-jacent sous forme d'un dictionnaire
+        {u: {v: poids}}, où les arêtes parallèles (une par ligne) sont
+        fusionnées. Le poids vaut le temps de trajet si ponderee est vrai, 1
+        sinon."""
+        return {
+            u: {v: (self.temps_trajet(u, v) if ponderee else 1) for v, _ in self.dictionnaire[u]}
+            for u in self.dictionnaire
+        }
+
+    def masque_lignes(self, lignes):
+        """Renvoie le masque des lignes données (un bit par ligne) ; provoque
+        une erreur si une des lignes n'existe pas."""
+        masque = 0
+        for ligne in lignes:
+            masque |= 1 << self.numeros_lignes[ligne]
+        return masque
+
+    def vue_lignes(self, lignes):
+        """Renvoie une vue du graphe restreinte aux arêtes des lignes données
+        (cf. VueLignes), sans copie."""
+        return VueLignes(self, lignes)
+
+    def superposition(self):
+        """Renvoie une superposition vide du graphe (cf. Superposition), pour
+        le modifier sans le changer."""
+        return Superposition(self)
+
+    def vers_csr(self, ponderee=True):
+        """Renvoie (sommets, debut, voisins, poids) : le graphe simple
+        sous-jacent au format CSR, cf. csr_depuis_graphe."""
+        return csr_depuis_graphe(self, ponderee)
+
+    def vers_tableaux(self, ponderee=True):
+        """Renvoie (sommets, origines, extremites, poids) : chaque arête du
+        graphe simple sous-jacent une fois, cf. tableaux_depuis_csr."""
+        return tableaux_depuis_csr(*self.vers_csr(ponderee))
+
+    def vers_dense(self, ponderee=True):
+        """Renvoie (sommets, matrice) : la matrice d'adjacence pondérée, cf.
+        dense_depuis_csr."""
+        return dense_depuis_csr(*self.vers_csr(ponderee))
+
+######################################################################################################
+
+class VueLignes(object):
+    """Vue d'un Graphe restreinte aux arêtes de certaines lignes et aux stations
+    qu'elles desservent. La vue ne copie rien : elle suit les modifications du
+    graphe, et ses sommets se calculent en un temps proportionnel au nombre
+    d'arêtes des lignes choisies. Elle peut remplacer le graphe dans les
+    fonctions qui ne font que le lire (ponts, points_articulation, etc.)."""
+    def __init__(self, G, lignes):
+        self.G = G
+        self.lignes = set(lignes)
+        self.masque = G.masque_lignes(self.lignes)
+        self.noms_sommets = G.noms_sommets
+        self.cache_sommets = None
+
+    @property
+    def version(self):
+        return self.G.version
+
+    def sommets(self):
+        """Renvoie l'ensemble des stations desservies par les lignes de la vue."""
+        if self.cache_sommets is None or self.cache_sommets[0] != self.G.version:
+            sommets = set()
+            for ligne in self.lignes:
+                for u, v in self.G.aretes_lignes[ligne]:
+                    sommets.add(u)
+                    sommets.add(v)
+            self.cache_sommets = (self.G.version, sommets)
+        return set(self.cache_sommets[1])
+
+    def voisins(self, sommet):
+        """Renvoie l'ensemble des couples (voisin, ligne) du sommet donné pour
+        les lignes de la vue."""
+        return {(v, ligne) for v, ligne in self.G.dictionnaire[sommet] if ligne in self.lignes}
+
+    def aretes(self):
+        return {
+            (u, v, ligne) if u <= v else (v, u, ligne)
+            for ligne in self.lignes
+                for u, v in self.G.aretes_lignes[ligne]
+        }
+
+    def contient_sommet(self, u):
+        if self.cache_sommets is not None and self.cache_sommets[0] == self.G.version:
+            return u in self.cache_sommets[1]
+        return u in self.G.masques and any(m & self.masque for m in self.G.masques[u].values())
+
+    def contient_arete(self, u, v):
+        return u in self.G.masques and bool(self.G.masques[u].get(v, 0) & self.masque)
+
+    def degre(self, sommet):
+        return len(self.voisins(sommet))
+
+    def nombre_sommets(self):
+        return len(self.sommets())
+
+    def nombre_aretes(self):
+        return sum(len(self.G.aretes_lignes[ligne]) for ligne in self.lignes)
+
+    def nom_sommet(self, n):
+        return self.G.nom_sommet(n)
+
+    def nom_sommet_et_num(self, n):
+        return self.G.nom_sommet_et_num(n)
+
+    def temps_trajet(self, u, v):
+        return self.G.temps_trajet(u, v)
+
+    def adjacence(self, ponderee=False):
+        """Cf. Graphe.adjacence, pour les arêtes des lignes de la vue."""
+        masques = self.G.masques
+        return {
+            u: {v: (self.G.temps_trajet(u, v) if ponderee else 1) for v, m in masques[u].items() if m & self.masque}
+            for u in self.sommets()
+        }
+
+    def superposition(self):
+        return Superposition(self)
+
+    def vers_csr(self, ponderee=True):
+        return csr_depuis_graphe(self, ponderee)
+
+    def vers_tableaux(self, ponderee=True):
+        return tableaux_depuis_csr(*self.vers_csr(ponderee))
+
+    def vers_dense(self, ponderee=True):
+        return dense_depuis_csr(*self.vers_csr(ponderee))
+
+######################################################################################################
+
+class Superposition(object):
+    """Graphe défini par un graphe de base (Graphe, VueLignes ou autre
+    Superposition) et des modifications : seules les modifications sont
+    stockées (sommets ajoutés ou retirés, arêtes ajoutées, paires de sommets
+    dont les arêtes sont retirées, noms et temps de trajet), et la base n'est
+    jamais modifiée. Une superposition se crée en temps constant et occupe
+    une mémoire proportionnelle à ses modifications ; ses méthodes de lecture
+    sont celles d'un Graphe, appliquées à la base modifiée. Les modifications
+    ultérieures de la base restent visibles."""
+    def __init__(self, base):
+        self.base = base
+        self.sommets_ajoutes = set()
+        self.sommets_retires = set()
+        self.ajouts = dict()   # {u: {(v, ligne)}} arêtes ajoutées
+        self.retraits = dict() # {u: {v}} arêtes de la base (toutes lignes) retirées
+        self.noms_sommets = ChainMap(dict(), base.noms_sommets)
+        self.temps_trajets = dict()
+        self.modifications = 0
+
+    @property
+    def version(self):
+        # Les deux termes ne font que croître : la somme change à chaque modification de l'un ou de l'autre
+        return self.base.version + self.modifications
+
+    def dans_base(self, u):
+        """Renvoie True si u est un sommet de la base qui n'a pas été retiré."""
+        return u not in self.sommets_retires and self.base.contient_sommet(u)
+
+    def ajouter_arete(self, u, v, poids):
+        """Ajoute une arête entre les sommmets u et v, en créant les sommets
+        manquants le cas échéant."""
+        self.ajouter_sommet(u)
+        self.ajouter_sommet(v)
+        self.ajouts.setdefault(u, set()).add((v, poids))
+        self.ajouts.setdefault(v, set()).add((u, poids))
+        self.modifications += 1
+
+    def ajouter_aretes(self, iterable):
+        for u, v, poids in iterable:
+            self.ajouter_arete(u, v, poids)
+
+    def ajouter_sommet(self, sommet):
+        if not self.contient_sommet(sommet):
+            self.sommets_ajoutes.add(sommet)
+            self.modifications += 1
+
+    def ajouter_sommets(self, iterable):
+        # Cf. Graphe.ajouter_sommets : les éléments sont des couples (sommet, _)
+        for sommet, _ in iterable:
+            self.ajouter_sommet(sommet)
+
+    def ajouter_nom(self, sommet, nom):
+        self.noms_sommets[sommet] = nom
+        self.modifications += 1
+
+    def ajouter_temps(self, u, v, temps):
+        """Enregistre le temps de trajet entre u et v, qui remplace celui de
+        la base ; si la superposition en a déjà un, on garde le plus court."""
+        if (u, v) not in self.temps_trajets or temps < self.temps_trajets[(u, v)]:
+            self.temps_trajets[(u, v)] = temps
+            self.temps_trajets[(v, u)] = temps
+            self.modifications += 1
+
+    def retirer_arete(self, u, v):
+        """Retire l'arête {u, v} (quelle que soit sa ligne) si elle existe;
+        provoque une erreur sinon."""
+        if not self.contient_arete(u, v):
+            raise KeyError((u, v))
+        for x, y in ((u, v), (v, u)):
+            if x in self.ajouts:
+                self.ajouts[x] = {(z, poids) for z, poids in self.ajouts[x] if z != y}
+            if self.dans_base(x) and self.dans_base(y) and self.base.contient_arete(x, y):
+                self.retraits.setdefault(x, set()).add(y)
+        self.modifications += 1
+
+    def retirer_aretes(self, iterable):
+        for u, v in iterable:
+            self.retirer_arete(u, v)
+
+    def retirer_sommet(self, sommet):
+        """Efface le sommet, et retire toutes les arêtes qui lui sont
+        incidentes."""
+        if not self.contient_sommet(sommet):
+            raise KeyError(sommet)
+        for v, _ in self.ajouts.pop(sommet, ()):
+            if v in self.ajouts: # sinon, une boucle
+                self.ajouts[v] = {(x, poids) for x, poids in self.ajouts[v] if x != sommet}
+        self.sommets_ajoutes.discard(sommet)
+        if self.base.contient_sommet(sommet):
+            self.sommets_retires.add(sommet)
+        self.modifications += 1
+
+    def retirer_sommets(self, iterable):
+        for sommet in iterable:
+            self.retirer_sommet(sommet)
+
+    def sommets(self):
+        """Renvoie l'ensemble des sommets du graphe."""
+        return (self.base.sommets() - self.sommets_retires) | self.sommets_ajoutes
+
+    def voisins(self, sommet):
+        """Renvoie l'ensemble des couples (voisin, ligne) du sommet donné ;
+        s'il n'existe pas, provoque une erreur."""
+        if not self.contient_sommet(sommet):
+            raise KeyError(sommet)
+        voisins = set(self.ajouts.get(sommet, ()))
+        if self.dans_base(sommet):
+            retires = self.retraits.get(sommet, ())
+            voisins |= {
+                (v, ligne) for v, ligne in self.base.voisins(sommet)
+                if v not in retires and v not in self.sommets_retires
+            }
+        return voisins
+
+    def aretes(self):
+        return {
+            (u, v, poids)
+            for u in self.sommets()
+                for (v, poids) in self.voisins(u)
+                    if u <= v
+        }
+
+    def boucles(self):
+        return {(u, u) for u in self.sommets() if any(v == u for v, _ in self.voisins(u))}
+
+    def contient_arete(self, u, v):
+        if self.contient_sommet(u) and self.contient_sommet(v):
+            return any(x == v for x, _ in self.ajouts.get(u, ())) or (
+                self.dans_base(u) and self.dans_base(v) and v not in self.retraits.get(u, ())
+                and self.base.contient_arete(u, v))
+        return False
+
+    def contient_sommet(self, u):
+        return u in self.sommets_ajoutes or self.dans_base(u)
+
+    def degre(self, sommet):
+        return len(self.voisins(sommet))
+
+    def nombre_aretes(self):
+        return len(self.aretes())
+
+    def nombre_boucles(self):
+        return len(self.boucles())
+
+    def nombre_sommets(self):
+        return len(self.sommets())
+
+    def poids_arete(self, u, v):
+        if self.contient_sommet(u):
+            for x, poids in self.voisins(u):
+                if x == v:
+                    return poids
+        return 0
+
+    def nom_sommet(self, n):
+        return self.noms_sommets[n]
+
+    def nom_sommet_et_num(self, n):
+        return self.noms_sommets[n] + ' (' + str(n) + ')'
+
+    def temps_trajet(self, u, v):
+        if (u, v) in self.temps_trajets:
+            return self.temps_trajets[(u, v)]
+        return self.base.temps_trajet(u, v)
+
+    def adjacence(self, ponderee=False):
+        """Cf. Graphe.adjacence."""
+        return {
+            u: {v: (self.temps_trajet(u, v) if ponderee else 1) for v, _ in self.voisins(u)}
+            for u in self.sommets()
+        }
+
+    def superposition(self):
+        """Renvoie une superposition vide de celle-ci."""
+        return Superposition(self)
+
+    def vers_csr(self, ponderee=True):
+        return csr_depuis_graphe(self, ponderee)
+
+    def vers_tableaux(self, ponderee=True):
+        return tableaux_depuis_csr(*self.vers_csr(ponderee))
+
+    def vers_dense(self, ponderee=True):
+        return dense_depuis_csr(*self.vers_csr(ponderee))
+
+######################################################################################################
+
+# Échanges avec des tableaux (module array) : numpy.frombuffer, numpy.asarray et scipy.sparse les lisent
+# sans copie, et les fonctions depuis_* acceptent aussi bien des listes que des tableaux numpy
+
+def csr_depuis_graphe(G, ponderee=True):
+    """Renvoie (sommets, debut, voisins, poids) : le graphe simple sous-jacent
+    à G (les arêtes parallèles sont fusionnées, cf. Graphe.adjacence) au
+    format CSR, en un seul parcours. Les voisins de sommets[i] sont les
+    voisins[debut[i]:debut[i + 1]] (indices dans 'sommets', croissants), et
+    poids[k] est le temps de trajet de l'arc k (1 si ponderee est faux). Les
+    sommets sont triés s'ils sont comparables."""
+    sommets = list(G.sommets())
+    try:
+        sommets.sort()
+    except TypeError:
+        pass
+    indices = { s: i for i, s in enumerate(sommets) }
+    debut, voisins, poids = array('q', [0]), array('q'), array('d')
+
+    for u in sommets:
+        for j in sorted({ indices[v] for v, _ in G.voisins(u) }):
+            voisins.append(j)
+            poids.append(G.temps_trajet(u, sommets[j]) if ponderee else 1)
+        debut.append(len(voisins))
+
+    return sommets, debut, voisins, poids
+
+def tableaux_depuis_csr(sommets, debut, voisins, poids):
+    """Renvoie (sommets, origines, extremites, poids) : chaque arête du
+    graphe au format CSR une fois, de sommets[origines[k]] à
+    sommets[extremites[k]] avec origines[k] <= extremites[k]."""
+    origines, extremites, poids_aretes = array('q'), array('q'), array('d')
+    for i in range(len(sommets)):
+        for k in range(debut[i], debut[i + 1]):
+            if i <= voisins[k]:
+                origines.append(i)
+                extremites.append(voisins[k])
+                poids_aretes.append(poids[k])
+    return sommets, origines, extremites, poids_aretes
+
+def dense_depuis_csr(sommets, debut, voisins, poids):
+    """Renvoie (sommets, matrice) : la matrice d'adjacence du graphe au
+    format CSR, de taille n * n rangée ligne par ligne (le poids de l'arête
+    entre sommets[i] et sommets[j] est matrice[i * n + j], 0 sans arête)."""
+    n = len(sommets)
+    matrice = array('d', [0]) * (n * n)
+    for i in range(n):
+        for k in range(debut[i], debut[i + 1]):
+            matrice[i * n + voisins[k]] = poids[k]
+    return sommets, matrice
+
+def depuis_tableaux(sommets, origines, extremites, poids=None, ligne=None):
+    """Renvoie le Graphe des sommets donnés dont les arêtes, toutes sur la
+    ligne 'ligne', relient sommets[origines[k]] et sommets[extremites[k]],
+    avec le temps de trajet poids[k] si les poids sont donnés."""
+    G = Graphe()
+    for s in sommets:
+        G.ajouter_sommet(s)
+    for k in range(len(origines)):
+        u, v = sommets[origines[k]], sommets[extremites[k]]
+        G.ajouter_arete(u, v, ligne)
+        if poids is not None:
+            G.ajouter_temps(u, v, poids[k])
+    return G
+
+def depuis_csr(sommets, debut, voisins, poids=None, ligne=None):
+    """Renvoie le Graphe donné au format CSR (cf. csr_depuis_graphe), dont
+    les arêtes sont toutes sur la ligne 'ligne'."""
+    origines = [i for i in range(len(sommets)) for _ in range(debut[i], debut[i + 1])]
+    return depuis_tableaux(sommets, origines, voisins, poids, ligne)
+
+def depuis_dense(sommets, matrice, ligne=None):
+    """Renvoie le Graphe de matrice d'adjacence 'matrice' (rangée ligne par
+    ligne, ou liste de lignes) : chaque valeur non nulle est une arête,
+    dont elle est le temps de trajet. 0 signifie « pas d'arête » : une
+    arête de temps de trajet nul doit passer par depuis_tableaux."""
+    n = len(sommets)
+    par_lignes = n > 0 and len(matrice) == n and hasattr(matrice[0], '__len__')
+    G = Graphe()
+    for s in sommets:
+        G.ajouter_sommet(s)
+    for i in range(n):
+        for j in range(n):
+            valeur = matrice[i][j] if par_lignes else matrice[i * n + j]
+            if valeur:
+                G.ajouter_arete(sommets[i], sommets[j], ligne)
+                G.ajouter_temps(sommets[i], sommets[j], valeur)
+    return G
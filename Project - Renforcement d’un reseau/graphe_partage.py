@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import dense_depuis_csr, tableaux_depuis_csr
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import parent_process, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import json
+
+######################################################################################################
+
+# Entête du segment : nombre de sommets, nombre d'arcs (deux par arête), taille en octets de la table JSON,
+# et 1 si les poids sont entiers (stockés comme tels), 0 sinon
+TAILLE_ENTETE = 4
+
+# Segments créés par ce processus, et graphes déjà attachés par ce processus : {(nom, etiquettes): graphe}
+CREES = set()
+ATTACHES = dict()
+
+def partager(G, nom=None):
+    """Copie G (un graphe du projet ou des DM) dans un nouveau segment de mémoire partagée, et renvoie le
+    GraphePartage correspondant, propriétaire du segment : c'est lui qui le détruit (cf. liberer).
+
+    Les sommets doivent être des entiers ou des chaînes, et les étiquettes des arêtes (nom de ligne ou
+    poids) être sérialisables en JSON. Le poids d'une arête est G.temps_trajet(u, v) si G connaît les
+    temps de trajet, son étiquette sinon."""
+    ids = list(G.sommets())
+    try:
+        ids.sort()
+    except TypeError:
+        pass
+    indices = { s: i for i, s in enumerate(ids) }
+    noms = getattr(G, "noms_sommets", {})
+    etiquettes = []
+    numeros = dict()
+
+    debut = [0]
+    cibles, numeros_arcs, poids = [], [], []
+    for u in ids:
+        for v, etiquette in sorted(G.voisins(u), key=lambda voisin: indices[voisin[0]]):
+            if etiquette not in numeros:
+                numeros[etiquette] = len(etiquettes)
+                etiquettes.append(etiquette)
+            cibles.append(indices[v])
+            numeros_arcs.append(numeros[etiquette])
+            poids.append(G.temps_trajet(u, v) if hasattr(G, "temps_trajet") else etiquette)
+        debut.append(len(cibles))
+
+    table = json.dumps({ "sommets": ids, "noms": [noms.get(s) for s in ids], "etiquettes": etiquettes }).encode()
+    n, arcs = len(ids), len(cibles)
+    taille = 8 * (TAILLE_ENTETE + n + 1 + 3 * arcs) + len(table)
+
+    segment = SharedMemory(nom, create=True, size=max(taille, 1))
+    entete = segment.buf[:8 * TAILLE_ENTETE].cast('q')
+    entiers = all(isinstance(p, int) for p in poids)
+    entete[0], entete[1], entete[2], entete[3] = n, arcs, len(table), entiers
+    entete.release()
+
+    position = 8 * TAILLE_ENTETE
+    for valeurs, format in ((debut, 'q'), (cibles, 'q'), (numeros_arcs, 'q'), (poids, 'q' if entiers else 'd')):
+        octets = array(format, valeurs).tobytes()
+        segment.buf[position:position + len(octets)] = octets
+        position += len(octets)
+    segment.buf[position:position + len(table)] = table
+
+    CREES.add(segment.name)
+    return GraphePartage(segment.name, segment=segment)
+
+def attacher(nom, etiquettes="lignes"):
+    """Renvoie le GraphePartage du segment 'nom', en ne s'y attachant qu'une fois par processus."""
+    if (nom, etiquettes) not in ATTACHES:
+        ATTACHES[(nom, etiquettes)] = GraphePartage(nom, etiquettes)
+    return ATTACHES[(nom, etiquettes)]
+
+# Graphe des processus d'un pool (cf. pool_partage) : chacun s'attache au segment une seule fois, à sa création,
+# et les tâches ne contiennent que leurs propres arguments
+GRAPHE_PROCESSUS = None
+
+def initialiser_processus(nom, etiquettes="lignes"):
+    global GRAPHE_PROCESSUS
+    GRAPHE_PROCESSUS = attacher(nom, etiquettes)
+
+def graphe_processus():
+    """Renvoie le graphe partagé auquel le processus s'est attaché à sa création (cf. pool_partage)."""
+    return GRAPHE_PROCESSUS
+
+@contextmanager
+def pool_partage(G, processus):
+    """Copie G en mémoire partagée (cf. partager) et renvoie un ProcessPoolExecutor de 'processus' processus
+    qui s'y attachent à leur création (cf. graphe_processus) au lieu de recevoir une copie de G (pickle).
+    Le segment est détruit une fois le pool fermé."""
+    with partager(G) as partage:
+        with ProcessPoolExecutor(processus, initializer=initialiser_processus, initargs=(partage.nom,)) as executeur:
+            yield executeur
+
+######################################################################################################
+
+class GraphePartage(object):
+    """Graphe en lecture seule stocké à plat dans un segment de mémoire partagée (cf. partager) : les
+    voisins du sommet d'indice i sont cibles[debut[i]:debut[i + 1]], avec le numéro d'étiquette et le
+    poids de chaque arc. Les identifiants et noms des sommets et les étiquettes sont dans une table JSON
+    à la fin du segment.
+
+    Un processus s'y attache par le nom du segment, sans copier les arcs ; un GraphePartage transmis à un
+    autre processus (pickle) n'envoie que ce nom. Il peut remplacer un Graphe du projet (les voisins sont
+    des couples (sommet, ligne)), ou avec etiquettes="poids" un Graphe des DM (couples (sommet, poids))."""
+    def __init__(self, nom, etiquettes="lignes", segment=None):
+        """S'attache au segment 'nom' (ou utilise 'segment' quand il vient d'être créé par partager)."""
+        if etiquettes not in ("lignes", "poids"):
+            raise ValueError("étiquettes inconnues : " + str(etiquettes))
+
+        self.nom = nom
+        self.etiquettes = etiquettes
+        self.proprietaire = segment is not None
+        self.vues = []
+        self.segment = None
+        self.segment = segment if segment is not None else SharedMemory(nom)
+        # Hors des processus créés par multiprocessing (qui partagent le suivi des ressources du processus
+        # principal), le suivi détruirait le segment à la fin du processus qui s'y attache
+        if segment is None and parent_process() is None and nom not in CREES:
+            resource_tracker.unregister(self.segment._name, "shared_memory")
+
+        # Lecture seule : le graphe ne change jamais de version
+        self.version = 0
+
+        entete = self.segment.buf[:8 * TAILLE_ENTETE].cast('q')
+        n, arcs, taille_table, entiers = entete[0], entete[1], entete[2], entete[3]
+        entete.release()
+
+        position = 8 * TAILLE_ENTETE
+        for attribut, taille, format in (("debut", n + 1, 'q'), ("cibles", arcs, 'q'), ("numeros_arcs", arcs, 'q'), ("poids", arcs, 'q' if entiers else 'd')):
+            vue = self.segment.buf[position:position + 8 * taille].cast(format)
+            setattr(self, attribut, vue)
+            self.vues.append(vue)
+            position += 8 * taille
+
+        table = json.loads(bytes(self.segment.buf[position:position + taille_table]))
+        self.ids = table["sommets"]
+        self.indices = { s: i for i, s in enumerate(self.ids) }
+        self.noms_sommets = { s: nom for s, nom in zip(self.ids, table["noms"]) if nom is not None }
+        self.table_etiquettes = table["etiquettes"]
+        self.numeros_lignes = { etiquette: k for k, etiquette in enumerate(self.table_etiquettes) }
+
+    def __reduce__(self):
+        return (attacher, (self.nom, self.etiquettes))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.liberer()
+
+    def __del__(self):
+        self.detacher()
+
+    def detacher(self):
+        """Détache le graphe du segment (il n'est plus utilisable)."""
+        for vue in self.vues:
+            vue.release()
+        self.vues = []
+        if self.segment is not None:
+            self.segment.close()
+
+    def liberer(self):
+        """Détache le graphe du segment, et détruit le segment si le graphe en est propriétaire."""
+        self.detacher()
+        if self.proprietaire:
+            self.proprietaire = False
+            self.segment.unlink()
+            CREES.discard(self.nom)
+
+    def avec_poids(self):
+        """Renvoie le même graphe (même segment) dont les voisins sont des couples (sommet, poids)."""
+        return attacher(self.nom, "poids")
+
+    def arcs(self, i):
+        return range(self.debut[i], self.debut[i + 1])
+
+    def etiquette(self, k):
+        return self.poids[k] if self.etiquettes == "poids" else self.table_etiquettes[self.numeros_arcs[k]]
+
+    def sommets(self):
+        """Renvoie l'ensemble des sommets du graphe."""
+        return set(self.ids)
+
+    def voisins(self, sommet):
+        """Renvoie l'ensemble des couples (voisin, étiquette) du sommet donné."""
+        ids, cibles = self.ids, self.cibles
+        return { (ids[cibles[k]], self.etiquette(k)) for k in self.arcs(self.indices[sommet]) }
+
+    def aretes(self):
+        """Renvoie l'ensemble des arêtes (u, v, étiquette) du graphe, avec u <= v."""
+        return {
+            (u, v, etiquette)
+            for u in self.ids
+                for v, etiquette in self.voisins(u)
+                    if u <= v
+        }
+
+    def contient_sommet(self, u):
+        return u in self.indices
+
+    def contient_arete(self, u, v):
+        if self.contient_sommet(u) and self.contient_sommet(v):
+            j = self.indices[v]
+            return any(self.cibles[k] == j for k in self.arcs(self.indices[u]))
+        return False
+
+    def degre(self, sommet):
+        return len(self.voisins(sommet))
+
+    def nombre_sommets(self):
+        return len(self.ids)
+
+    def nombre_aretes(self):
+        return len(self.aretes())
+
+    def poids_arete(self, u, v):
+        """Renvoie l'étiquette d'une arête entre u et v, ou 0 s'il n'y en a pas (cf. Graphe des DM)."""
+        if self.contient_sommet(u) and self.contient_sommet(v):
+            j = self.indices[v]
+            for k in self.arcs(self.indices[u]):
+                if self.cibles[k] == j:
+                    return self.etiquette(k)
+        return 0
+
+    def nom_sommet(self, n):
+        return self.noms_sommets[n]
+
+    def nom_sommet_et_num(self, n):
+        return self.noms_sommets[n] + ' (' + str(n) + ')'
+
+    def temps_trajet(self, u, v):
+        """Renvoie le temps de trajet (le poids) entre u et v, ou 1 s'il n'est pas connu."""
+        if self.contient_sommet(u) and self.contient_sommet(v):
+            j = self.indices[v]
+            for k in self.arcs(self.indices[u]):
+                if self.cibles[k] == j:
+                    return self.poids[k]
+        return 1
+
+    def adjacence(self, ponderee=False):
+        """Cf. Graphe.adjacence : le poids vaut le temps de trajet si ponderee est vrai, 1 sinon."""
+        ids, cibles, poids = self.ids, self.cibles, self.poids
+        return {
+            u: {ids[cibles[k]]: (poids[k] if ponderee else 1) for k in self.arcs(i)}
+            for i, u in enumerate(ids)
+        }
+
+    def vue_lignes(self, lignes):
+        """Renvoie une vue du graphe restreinte aux arêtes des lignes données (cf. VueLignesPartage), sans
+        copie ; provoque une erreur si une des lignes n'existe pas."""
+        return VueLignesPartage(self, lignes)
+
+    def vers_csr(self, ponderee=True):
+        """Renvoie (sommets, debut, voisins, poids) au format CSR, cf. graphe.csr_depuis_graphe, sans copie :
+        les tableaux sont des vues (memoryview) sur le segment, que numpy.frombuffer lit directement. Les
+        arcs parallèles (un par ligne) sont conservés, contrairement à vers_csr_simple, vers_tableaux et
+        vers_dense. Si ponderee est faux, les poids valent 1 (copie).
+        Les vues doivent être libérées (ou supprimées) avant d'appeler liberer."""
+        poids = self.poids if ponderee else array('d', [1]) * len(self.cibles)
+        return self.ids, self.debut, self.cibles, poids
+
+    def vers_csr_simple(self, ponderee=True):
+        """Renvoie le graphe simple sous-jacent au format CSR, comme graphe.csr_depuis_graphe : les arcs
+        parallèles (consécutifs, les cibles étant triées) sont fusionnés, ce qui impose une copie. Ils ont
+        tous le même poids, le temps de trajet entre leurs extrémités."""
+        cibles, poids = self.cibles, self.poids
+        debut, voisins, poids_voisins = array('q', [0]), array('q'), array('d')
+        for i in range(len(self.ids)):
+            for k in self.arcs(i):
+                if k == self.debut[i] or cibles[k] != cibles[k - 1]:
+                    voisins.append(cibles[k])
+                    poids_voisins.append(poids[k] if ponderee else 1)
+            debut.append(len(voisins))
+        return self.ids, debut, voisins, poids_voisins
+
+    def vers_tableaux(self, ponderee=True):
+        """Cf. graphe.tableaux_depuis_csr : chaque arête une fois, même si plusieurs lignes la desservent."""
+        return tableaux_depuis_csr(*self.vers_csr_simple(ponderee))
+
+    def vers_dense(self, ponderee=True):
+        """Cf. graphe.dense_depuis_csr, sur le graphe simple sous-jacent."""
+        return dense_depuis_csr(*self.vers_csr_simple(ponderee))
+
+######################################################################################################
+
+class VueLignesPartage(object):
+    """Vue d'un GraphePartage restreinte aux arcs de certaines lignes et aux stations qu'elles desservent
+    (cf. graphe.VueLignes) : les arcs sont filtrés par leur numéro d'étiquette, sans rien copier. Elle
+    peut remplacer le graphe dans les fonctions qui ne font que le lire (ponts, points_articulation, etc.)."""
+    def __init__(self, G, lignes):
+        self.G = G
+        self.lignes = set(lignes)
+        self.numeros = { G.numeros_lignes[ligne] for ligne in self.lignes }
+        self.noms_sommets = G.noms_sommets
+        self.version = G.version
+        self.ensemble_sommets = {
+            u for i, u in enumerate(G.ids)
+                if any(G.numeros_arcs[k] in self.numeros for k in G.arcs(i))
+        }
+
+    def arcs(self, sommet):
+        G = self.G
+        return [k for k in G.arcs(G.indices[sommet]) if G.numeros_arcs[k] in self.numeros]
+
+    def sommets(self):
+        return set(self.ensemble_sommets)
+
+    def voisins(self, sommet):
+        """Renvoie l'ensemble des couples (voisin, ligne) du sommet donné pour les lignes de la vue."""
+        G = self.G
+        return { (G.ids[G.cibles[k]], G.table_etiquettes[G.numeros_arcs[k]]) for k in self.arcs(sommet) }
+
+    def aretes(self):
+        return {
+            (u, v, ligne)
+            for u in self.ensemble_sommets
+                for v, ligne in self.voisins(u)
+                    if u <= v
+        }
+
+    def contient_sommet(self, u):
+        return u in self.ensemble_sommets
+
+    def contient_arete(self, u, v):
+        return self.contient_sommet(u) and any(self.G.ids[self.G.cibles[k]] == v for k in self.arcs(u))
+
+    def degre(self, sommet):
+        return len(self.voisins(sommet))
+
+    def nombre_sommets(self):
+        return len(self.ensemble_sommets)
+
+    def nombre_aretes(self):
+        return len(self.aretes())
+
+    def nom_sommet(self, n):
+        return self.G.nom_sommet(n)
+
+    def nom_sommet_et_num(self, n):
+        return self.G.nom_sommet_et_num(n)
+
+    def temps_trajet(self, u, v):
+        return self.G.temps_trajet(u, v)
+
+    def adjacence(self, ponderee=False):
+        """Cf. Graphe.adjacence, pour les arêtes des lignes de la vue."""
+        G = self.G
+        return {
+            u: {G.ids[G.cibles[k]]: (G.poids[k] if ponderee else 1) for k in self.arcs(u)}
+            for u in self.ensemble_sommets
+        }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from heapq import heappush, heappop, heapify
+from math import inf
+import pickle
+
+######################################################################################################
+
+class HierarchieContraction(object):
+    """Hiérarchie de contraction construite à partir des temps de trajet d'un Graphe. Les stations sont
+    contractées une à une ; quand une station v est contractée, on ajoute un raccourci u -- w (de milieu
+    v) entre deux de ses voisins restants si aucun chemin témoin ne les relie aussi vite sans passer par v.
+    Une requête n'emprunte ensuite que des arêtes montantes (vers des stations de rang plus élevé)."""
+    def __init__(self, G=None, limite_temoins=200):
+        """Construit la hiérarchie de G ; 'limite_temoins' borne le nombre de stations visitées par chaque
+        recherche de chemin témoin."""
+        self.rang = dict()
+        self.haut = dict() # haut[v][w] = (poids, milieu) pour chaque arête montante de v vers w
+        self.limite_temoins = limite_temoins
+
+        if G is not None:
+            self.construire(G.adjacence(ponderee=True))
+
+    def temoin(self, restant, source, exclu, cible, maximum):
+        """Renvoie True s'il existe un chemin de 'source' à 'cible' de longueur au plus 'maximum' qui ne
+        passe pas par 'exclu' (recherche limitée à self.limite_temoins stations)."""
+        distance = { source: 0 }
+        tas = [(0, 0, source)]
+        compteur = 0
+        visites = 0
+
+        while tas and visites < self.limite_temoins:
+            d, _, u = heappop(tas)
+            if d > distance[u]:
+                continue
+            if d > maximum:
+                return False
+            if u == cible:
+                return True
+            visites += 1
+
+            for v, poids in restant[u].items():
+                if v != exclu and d + poids < distance.get(v, inf):
+                    distance[v] = d + poids
+                    compteur += 1
+                    heappush(tas, (distance[v], compteur, v))
+
+        return distance.get(cible, inf) <= maximum
+
+    def raccourcis(self, restant, v):
+        """Renvoie la liste des raccourcis (u, w, poids) nécessaires si on contracte v."""
+        voisins = [u for u in restant[v] if u != v]
+        resultat = []
+
+        for i in range(len(voisins)):
+            for j in range(i + 1, len(voisins)):
+                u, w = voisins[i], voisins[j]
+                poids = restant[v][u] + restant[v][w]
+                if not self.temoin(restant, u, v, w, poids):
+                    resultat.append((u, w, poids))
+
+        return resultat
+
+    def priorite(self, restant, v, contractes_voisins):
+        """Différence d'arêtes de v (raccourcis ajoutés moins arêtes retirées), à laquelle on ajoute le
+        nombre de voisins déjà contractés pour répartir les contractions dans tout le graphe."""
+        return len(self.raccourcis(restant, v)) - len(restant[v]) + contractes_voisins[v]
+
+    def construire(self, adjacence):
+        """Contracte toutes les stations de 'adjacence' ({u: {v: poids}}) par priorité croissante."""
+        restant = { u: { v: p for v, p in adjacence[u].items() if v != u } for u in adjacence }
+        milieux = dict()
+        contractes_voisins = { u: 0 for u in adjacence }
+
+        tas = [(self.priorite(restant, v, contractes_voisins), i, v) for i, v in enumerate(adjacence)]
+        heapify(tas)
+        compteur = len(tas)
+
+        while tas:
+            p, _, v = heappop(tas)
+
+            # Mise à jour paresseuse : si la priorité de v a augmenté depuis son insertion, on le réinsère
+            nouvelle = self.priorite(restant, v, contractes_voisins)
+            if tas and nouvelle > tas[0][0]:
+                compteur += 1
+                heappush(tas, (nouvelle, compteur, v))
+                continue
+
+            for u, w, poids in self.raccourcis(restant, v):
+                if poids < restant[u].get(w, inf):
+                    restant[u][w] = restant[w][u] = poids
+                    milieux[(u, w)] = milieux[(w, u)] = v
+
+            self.rang[v] = len(self.rang)
+            self.haut[v] = { u: (poids, milieux.get((v, u))) for u, poids in restant[v].items() }
+
+            for u in restant[v]:
+                del restant[u][v]
+                contractes_voisins[u] += 1
+            del restant[v]
+
+    ##################################################################################################
+
+    def sauvegarder(self, chemin):
+        """Enregistre la hiérarchie (rangs et arêtes montantes) dans un fichier."""
+        with open(chemin, "wb") as fichier:
+            pickle.dump((self.rang, self.haut), fichier)
+
+    @staticmethod
+    def charger(chemin):
+        """Renvoie la hiérarchie enregistrée dans le fichier par sauvegarder."""
+        hierarchie = HierarchieContraction()
+        with open(chemin, "rb") as fichier:
+            hierarchie.rang, hierarchie.haut = pickle.load(fichier)
+        return hierarchie
+
+    ##################################################################################################
+
+    def requete(self, depart, arrivee):
+        """Renvoie (temps, station de rencontre, parents avant, parents arrière) pour la recherche
+        bidirectionnelle montante entre 'depart' et 'arrivee'."""
+        distances = ({ depart: 0 }, { arrivee: 0 })
+        parents = ({ depart: None }, { arrivee: None })
+        tas = ([(0, self.rang[depart], depart)], [(0, self.rang[arrivee], arrivee)])
+        meilleur, rencontre = inf, None
+
+        while tas[0] or tas[1]:
+            # On avance le sens dont le sommet de tas est le plus petit ; on s'arrête quand les deux dépassent le meilleur
+            sens = 0 if tas[0] and (not tas[1] or tas[0][0][0] <= tas[1][0][0]) else 1
+            d, _, u = heappop(tas[sens])
+            if d >= meilleur:
+                break
+            if d > distances[sens][u]:
+                continue
+
+            if u in distances[1 - sens] and d + distances[1 - sens][u] < meilleur:
+                meilleur, rencontre = d + distances[1 - sens][u], u
+
+            for v, (poids, _) in self.haut[u].items():
+                if d + poids < distances[sens].get(v, inf):
+                    distances[sens][v] = d + poids
+                    parents[sens][v] = u
+                    heappush(tas[sens], (d + poids, self.rang[v], v))
+
+        return meilleur, rencontre, parents[0], parents[1]
+
+    def temps(self, depart, arrivee):
+        """Renvoie le temps de trajet minimal entre 'depart' et 'arrivee' (inf s'ils ne sont pas reliés)."""
+        return self.requete(depart, arrivee)[0]
+
+    def deplier(self, u, v):
+        """Renvoie la liste des stations de l'arête (éventuellement raccourci) u -- v, sans u."""
+        bas, haut = (u, v) if self.rang[u] < self.rang[v] else (v, u)
+        milieu = self.haut[bas][haut][1]
+        if milieu is None:
+            return [v]
+        return self.deplier(u, milieu) + self.deplier(milieu, v)
+
+    def chemin(self, depart, arrivee):
+        """Renvoie (temps, stations) pour le plus court chemin entre 'depart' et 'arrivee', les raccourcis
+        étant dépliés en les stations qu'ils représentent. Renvoie (inf, []) s'ils ne sont pas reliés."""
+        temps, rencontre, parents_avant, parents_arriere = self.requete(depart, arrivee)
+        if rencontre is None:
+            return inf, []
+
+        montee = [rencontre]
+        while parents_avant[montee[-1]] is not None:
+            montee.append(parents_avant[montee[-1]])
+        descente = [rencontre]
+        while parents_arriere[descente[-1]] is not None:
+            descente.append(parents_arriere[descente[-1]])
+
+        sommets = montee[::-1] + descente[1:]
+        stations = [depart]
+        for i in range(len(sommets) - 1):
+            stations += self.deplier(sommets[i], sommets[i + 1])
+
+        return temps, stations
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from bisect import bisect_left
+import unicodedata
+
+######################################################################################################
+
+def normaliser(nom):
+    """Renvoie le nom sans accents, en minuscules, où tout ce qui n'est ni lettre ni chiffre devient un
+    espace, et sans espaces superflus."""
+    decompose = unicodedata.normalize("NFKD", nom)
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c)).casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in sans_accents).split())
+
+def trigrammes(cle):
+    """Renvoie l'ensemble des trigrammes de la clé, bordée d'espaces pour que les débuts et fins de mots comptent."""
+    cle = "  " + cle + " "
+    return { cle[i:i + 3] for i in range(len(cle) - 2) }
+
+######################################################################################################
+
+class IndexNoms(object):
+    """Index des noms de stations d'un graphe, construit une seule fois. Les clés sont les noms normalisés
+    (cf. normaliser) et chacun de leurs suffixes commençant par un mot, rangés dans un tableau trié : une
+    recherche par préfixe est une recherche dichotomique, quel que soit le nombre de stations. Un index
+    des trigrammes permet de retrouver une station malgré des fautes de frappe.
+
+    L'index n'est pas mis à jour quand le graphe change : il faut le reconstruire."""
+    def __init__(self, G):
+        """Construit l'index des noms des stations de G."""
+        self.noms = dict(G.noms_sommets)
+        self.par_nom = dict()
+        self.trigrammes = dict()
+        self.nombre_trigrammes = dict()
+
+        cles = []
+        for s, nom in self.noms.items():
+            cle = normaliser(nom)
+            self.par_nom.setdefault(cle, []).append(s)
+
+            mots = cle.split(" ")
+            for i in range(len(mots)):
+                cles.append((" ".join(mots[i:]), s))
+
+            grammes = trigrammes(cle)
+            self.nombre_trigrammes[s] = len(grammes)
+            for gramme in grammes:
+                self.trigrammes.setdefault(gramme, []).append(s)
+
+        cles.sort()
+        self.cles = [cle for cle, _ in cles]
+        self.stations = [s for _, s in cles]
+
+    def cle_tri(self, s):
+        return self.noms[s], s
+
+    def exacte(self, nom):
+        """Renvoie la liste des stations dont le nom normalisé est celui de 'nom'."""
+        return sorted(self.par_nom.get(normaliser(nom), []), key=self.cle_tri)
+
+    def prefixe(self, texte, limite=None):
+        """Renvoie les stations (triées par nom) dont le nom, ou un de ses mots et les suivants, commence
+        par 'texte' (une fois normalisé), au plus 'limite' si elle est donnée."""
+        texte = normaliser(texte)
+        trouvees = set()
+
+        i = bisect_left(self.cles, texte)
+        while i < len(self.cles) and self.cles[i].startswith(texte):
+            trouvees.add(self.stations[i])
+            i += 1
+
+        return sorted(trouvees, key=self.cle_tri)[:limite]
+
+    def approchee(self, texte, limite=5, seuil=0.3):
+        """Renvoie les couples (station, similarité) des stations dont le nom ressemble le plus à 'texte',
+        au plus 'limite', par similarité décroissante. La similarité est l'indice de Jaccard des ensembles
+        de trigrammes ; les stations en dessous de 'seuil' sont ignorées."""
+        grammes = trigrammes(normaliser(texte))
+        communs = dict()
+
+        # Seules les stations qui partagent au moins un trigramme avec le texte sont examinées
+        for gramme in grammes:
+            for s in self.trigrammes.get(gramme, ()):
+                communs[s] = communs.get(s, 0) + 1
+
+        resultats = []
+        for s, nombre in communs.items():
+            similarite = nombre / (len(grammes) + self.nombre_trigrammes[s] - nombre)
+            if similarite >= seuil:
+                resultats.append((s, similarite))
+
+        resultats.sort(key=lambda resultat: (-resultat[1], self.cle_tri(resultat[0])))
+        return resultats[:limite]
+
+    def rechercher(self, texte, limite=10):
+        """Renvoie les stations correspondant à 'texte' : celles qui portent exactement ce nom s'il y en a,
+        sinon celles dont le nom commence par ce texte, et sinon les plus ressemblantes ; au plus 'limite'.
+        Un texte sans lettre ni chiffre ne correspond à aucune station (tous les noms commencent par la clé vide)."""
+        if not normaliser(texte):
+            return []
+        return self.exacte(texte)[:limite] or self.prefixe(texte, limite) or [s for s, _ in self.approchee(texte, limite)]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+######################################################################################################
+
+class Compteurs(object):
+    """Compteurs d'opérations mis à jour par les algorithmes qui les reçoivent en paramètre (compteurs=None
+    par défaut, auquel cas rien n'est compté). Les algorithmes comptent dans des variables locales et ne
+    mettent à jour les compteurs qu'à la fin, pour que l'instrumentation ne ralentisse pas leurs boucles.
+    Des crochets (fonctions appelées avec le nom du compteur et l'incrément) peuvent être ajoutés pour
+    suivre les mises à jour : ils sont appelés à chaque appel d'incrementer, donc quand un algorithme
+    publie ses totaux à la fin de son exécution, et non à chaque opération comptée."""
+    def __init__(self, etiquettes=None):
+        """Initialise des compteurs vides ; 'etiquettes' ({nom: valeur}) est ajouté à l'export Prometheus."""
+        self.valeurs = dict()
+        self.crochets = []
+        self.etiquettes = dict(etiquettes or {})
+
+    def incrementer(self, nom, valeur=1):
+        """Ajoute 'valeur' au compteur 'nom' et prévient les crochets."""
+        self.valeurs[nom] = self.valeurs.get(nom, 0) + valeur
+        for crochet in self.crochets:
+            crochet(nom, valeur)
+
+    def ajouter_crochet(self, crochet):
+        """Ajoute une fonction crochet(nom, valeur) appelée à chaque incrément."""
+        self.crochets.append(crochet)
+
+    def valeur(self, nom):
+        """Renvoie la valeur du compteur 'nom' (0 s'il n'a jamais été incrémenté)."""
+        return self.valeurs.get(nom, 0)
+
+    def fusionner(self, autres):
+        """Ajoute aux compteurs les valeurs de chacun des Compteurs de l'itérable 'autres' (par exemple ceux
+        de plusieurs exécutions), sans appeler les crochets."""
+        for autre in autres:
+            for nom, valeur in autre.valeurs.items():
+                self.valeurs[nom] = self.valeurs.get(nom, 0) + valeur
+
+    def reinitialiser(self):
+        """Remet tous les compteurs à zéro."""
+        self.valeurs.clear()
+
+    def en_json(self):
+        """Renvoie les compteurs au format JSON."""
+        return json.dumps({ "etiquettes": self.etiquettes, "compteurs": dict(sorted(self.valeurs.items())) }, indent=4)
+
+    def en_prometheus(self, prefixe="reseau_"):
+        """Renvoie les compteurs au format texte de Prometheus (les '.' des noms deviennent des '_')."""
+        etiquettes = ",".join(cle + '="' + str(valeur).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                              for cle, valeur in sorted(self.etiquettes.items()))
+        etiquettes = "{" + etiquettes + "}" if etiquettes else ""
+
+        lignes = []
+        for nom, valeur in sorted(self.valeurs.items()):
+            nom = prefixe + nom.replace(".", "_") + "_total"
+            lignes.append("# TYPE " + nom + " counter")
+            lignes.append(nom + etiquettes + " " + str(valeur))
+        return "".join(ligne + "\n" for ligne in lignes)
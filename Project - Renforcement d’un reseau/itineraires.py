@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from distances import dijkstra
+from heapq import heappush, heappop
+from math import inf
+
+######################################################################################################
+
+class Planificateur(object):
+    """Calcul d'itinéraires tenant compte des changements de ligne. Un état est un couple (station, ligne) :
+    on passe de (u, L) à (v, L) en empruntant une connexion de la ligne L, et de (u, L) à (u, L') en
+    changeant de ligne, ce qui coûte 'penalite' secondes. Les états ne sont jamais tous construits : leurs
+    successeurs sont calculés à la volée à partir des voisins de G."""
+    def __init__(self, G, penalite=300, nombre_reperes=8):
+        """Initialise le planificateur et précalcule une seule fois les distances depuis les repères (ALT).
+        La pénalité doit être positive ou nulle : sinon, changer de ligne dans les deux sens à une même
+        station serait un cycle de coût négatif."""
+        if penalite < 0:
+            raise ValueError("pénalité de correspondance négative : " + str(penalite))
+
+        self.G = G
+        self.penalite = penalite
+        self.reperes = []
+        self.distances_reperes = []
+
+        adjacence = G.adjacence(ponderee=True)
+        if len(adjacence) == 0:
+            return
+
+        # Les repères sont choisis un par un, chacun étant la station la plus éloignée des repères précédents
+        plus_proche = { s: inf for s in adjacence }
+        repere = next(iter(adjacence))
+
+        for _ in range(min(nombre_reperes, len(adjacence))):
+            distance = dijkstra(adjacence, repere)
+            self.reperes.append(repere)
+            self.distances_reperes.append(distance)
+
+            for s in adjacence:
+                plus_proche[s] = min(plus_proche[s], distance.get(s, inf))
+
+            # Une station non reliée aux repères précédents est prioritaire
+            repere = max(adjacence, key=lambda s: plus_proche[s])
+            if plus_proche[repere] == 0:
+                break
+
+    def minorant(self, station, arrivee):
+        """Renvoie un minorant du temps de trajet de 'station' à 'arrivee', par l'inégalité triangulaire
+        sur les distances aux repères."""
+        meilleur = 0
+        for distance in self.distances_reperes:
+            if station in distance and arrivee in distance:
+                meilleur = max(meilleur, abs(distance[arrivee] - distance[station]))
+        return meilleur
+
+    def lignes(self, station):
+        """Renvoie l'ensemble des lignes qui desservent la station."""
+        return { ligne for _, ligne in self.G.voisins(station) }
+
+    def successeurs(self, etat):
+        """Renvoie les états atteignables depuis 'etat', avec le temps de trajet et le nombre de
+        correspondances que coûte chaque transition."""
+        station, ligne = etat
+        for v, ligne_v in self.G.voisins(station):
+            if ligne_v == ligne:
+                yield (v, ligne), self.G.temps_trajet(station, v), 0
+
+        for autre in self.lignes(station):
+            if autre != ligne:
+                yield (station, autre), self.penalite, 1
+
+    def itineraire(self, depart, arrivee, moins_de_correspondances=False):
+        """Renvoie (durée, nombre de correspondances, étapes) pour le meilleur itinéraire de 'depart' à
+        'arrivee', où les étapes sont les états (station, ligne) traversés et où la durée inclut les
+        pénalités de correspondance. Par défaut on minimise la durée ; si moins_de_correspondances est
+        vrai, on minimise d'abord le nombre de correspondances, puis la durée. Renvoie None si les deux
+        stations ne sont pas reliées."""
+        if depart == arrivee:
+            return 0, 0, [(depart, None)]
+
+        # Le coût est un couple comparé dans l'ordre lexicographique, selon l'objectif choisi
+        def cout(duree, correspondances):
+            return (correspondances, duree) if moins_de_correspondances else (duree, correspondances)
+
+        def estimation(etat, couts):
+            h = self.minorant(etat[0], arrivee)
+            return (couts[0], couts[1] + h) if moins_de_correspondances else (couts[0] + h, couts[1])
+
+        meilleurs = dict()
+        precedent = dict()
+        tas = []
+        compteur = 0 # Pour ne jamais comparer deux états entre eux dans le tas
+
+        for ligne in self.lignes(depart):
+            meilleurs[(depart, ligne)] = (0, 0)
+            precedent[(depart, ligne)] = None
+            compteur += 1
+            heappush(tas, (estimation((depart, ligne), cout(0, 0)), compteur, (depart, ligne)))
+
+        fermes = set()
+        while tas:
+            _, _, etat = heappop(tas)
+            if etat in fermes:
+                continue
+            fermes.add(etat)
+
+            duree, correspondances = meilleurs[etat]
+            if etat[0] == arrivee:
+                etapes = []
+                while etat is not None:
+                    etapes.append(etat)
+                    etat = precedent[etat]
+                return duree, correspondances, etapes[::-1]
+
+            for suivant, temps, changement in self.successeurs(etat):
+                candidat = (duree + temps, correspondances + changement)
+                if suivant not in meilleurs or cout(*candidat) < cout(*meilleurs[suivant]):
+                    meilleurs[suivant] = candidat
+                    precedent[suivant] = etat
+                    compteur += 1
+                    heappush(tas, (estimation(suivant, cout(*candidat)), compteur, suivant))
+
+        return None
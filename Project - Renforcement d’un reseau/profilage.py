@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from contextlib import contextmanager, nullcontext
+import cProfile
+import time
+import tracemalloc
+
+######################################################################################################
+
+class Profileur(object):
+    """Mesure le temps réel, le temps CPU et la mémoire allouée (tracemalloc) de chaque phase d'une
+    exécution. Les phases de même nom (par exemple la construction du graphe pour chaque fichier) sont
+    cumulées. Si cprofile est vrai, chaque phase est aussi passée sous cProfile, et on garde le profil
+    détaillé de la plus lente : les temps mesurés sont alors gonflés par cProfile, ce que le rapport
+    indique ("sous_cprofile")."""
+    def __init__(self, cprofile=False):
+        """Initialise un profileur sans phase et démarre le suivi de la mémoire."""
+        self.phases = dict()
+        self.cprofile = cprofile
+        self.profil_plus_lent = None
+        self.phase_plus_lente = None
+        self.duree_plus_lente = -1.0
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(self, nom):
+        """Contexte dont on mesure l'exécution sous le nom 'nom'."""
+        profil = cProfile.Profile() if self.cprofile else None
+        memoire_debut, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        reel_debut, cpu_debut = time.perf_counter(), time.process_time()
+
+        if profil:
+            profil.enable()
+        try:
+            yield
+        finally:
+            if profil:
+                profil.disable()
+
+            reel, cpu = time.perf_counter() - reel_debut, time.process_time() - cpu_debut
+            memoire_fin, pic = tracemalloc.get_traced_memory()
+
+            mesure = self.phases.setdefault(nom, { "appels": 0, "temps_reel": 0.0, "temps_cpu": 0.0, "memoire_allouee": 0, "memoire_pic": 0 })
+            mesure["appels"] += 1
+            mesure["temps_reel"] += reel
+            mesure["temps_cpu"] += cpu
+            mesure["memoire_allouee"] += memoire_fin - memoire_debut
+            mesure["memoire_pic"] = max(mesure["memoire_pic"], pic - memoire_debut)
+
+            if profil and reel > self.duree_plus_lente:
+                self.profil_plus_lent, self.phase_plus_lente, self.duree_plus_lente = profil, nom, reel
+
+    def arreter(self):
+        """Arrête le suivi de la mémoire."""
+        tracemalloc.stop()
+
+    def rapport(self):
+        """Renvoie le rapport des phases (dans l'ordre où elles ont commencé), sérialisable en JSON."""
+        return {
+            "phases": [dict(nom=nom, **mesure) for nom, mesure in self.phases.items()],
+            "temps_reel_total": sum(mesure["temps_reel"] for mesure in self.phases.values()),
+            "temps_cpu_total": sum(mesure["temps_cpu"] for mesure in self.phases.values()),
+            "phase_plus_lente": max(self.phases, key=lambda nom: self.phases[nom]["temps_reel"], default=None),
+            "sous_cprofile": self.cprofile,
+        }
+
+    def ecrire_cprofile(self, chemin):
+        """Écrit le profil cProfile de la phase la plus lente (lisible avec le module pstats) et renvoie
+        le nom de cette phase."""
+        if self.profil_plus_lent is not None:
+            self.profil_plus_lent.dump_stats(chemin)
+        return self.phase_plus_lente
+
+######################################################################################################
+
+def phase(profileur, nom):
+    """Renvoie le contexte de mesure de la phase 'nom', ou un contexte qui ne fait rien si profileur est None."""
+    return profileur.phase(nom) if profileur is not None else nullcontext()
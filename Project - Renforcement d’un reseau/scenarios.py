@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from ameliorations import *
+from graphe_partage import graphe_processus, pool_partage
+from collections import deque
+import argparse
+import json
+import random
+import sys
+
+######################################################################################################
+
+class VueScenario(object):
+    """Vue d'un graphe modifié par un scénario, sans copie : seules les lignes 'lignes' sont gardées (toutes
+    si None), les stations 'fermetures' sont retirées avec leurs connexions, et les connexions 'ajouts'
+    (couples de stations, sur la ligne "AJOUT") sont ajoutées. Elle peut remplacer le graphe dans les
+    fonctions qui ne font que le lire (ponts, points_articulation, etc.)."""
+    def __init__(self, G, lignes=None, ajouts=(), fermetures=()):
+        self.G = G.vue_lignes(lignes) if lignes is not None else G
+        self.noms_sommets = G.noms_sommets
+        self.fermees = set(fermetures)
+        self.ajouts = dict()
+        for u, v in ajouts:
+            if u not in self.fermees and v not in self.fermees:
+                self.ajouts.setdefault(u, set()).add((v, "AJOUT"))
+                self.ajouts.setdefault(v, set()).add((u, "AJOUT"))
+
+    def sommets(self):
+        return (self.G.sommets() - self.fermees) | set(self.ajouts)
+
+    def voisins(self, sommet):
+        voisins = { (v, ligne) for v, ligne in self.G.voisins(sommet) if v not in self.fermees } if self.G.contient_sommet(sommet) else set()
+        return voisins | self.ajouts.get(sommet, set())
+
+    def nombre_sommets(self):
+        return len(self.sommets())
+
+    def nom_sommet(self, n):
+        return self.G.nom_sommet(n)
+
+######################################################################################################
+
+def analyser(G, scenario, details=False):
+    """Renvoie le résultat (dictionnaire sérialisable en JSON) de l'analyse de biconnexité du scénario
+    appliqué à G. Un scénario est un dictionnaire avec un "nom" et éventuellement des "lignes" à garder,
+    des "sans_lignes" à retirer, des "ajouts" de connexions [u, v] et des "fermetures" de stations. Si
+    details est vrai, les ponts et points d'articulation sont donnés en plus de leur nombre."""
+    # Une ligne ou une station inconnue est une erreur, et non un scénario identique au réseau de base
+    for ligne in scenario.get("sans_lignes", ()):
+        if ligne not in G.numeros_lignes:
+            raise KeyError(ligne)
+    for station in scenario.get("fermetures", ()):
+        if not G.contient_sommet(station):
+            raise KeyError(station)
+
+    lignes = scenario.get("lignes")
+    if "sans_lignes" in scenario:
+        lignes = set(G.numeros_lignes if lignes is None else lignes) - set(scenario["sans_lignes"])
+
+    vue = VueScenario(G, lignes, scenario.get("ajouts", ()), scenario.get("fermetures", ()))
+    ponts_vue = ponts(vue)
+    articulations = points_articulation(vue)
+
+    resultat = {
+        "nom": scenario.get("nom"),
+        "sommets": vue.nombre_sommets(),
+        "ponts": len(ponts_vue),
+        "points_articulation": len(articulations),
+    }
+    if details:
+        resultat["liste_ponts"] = sorted(sorted(pont) for pont in ponts_vue)
+        resultat["liste_points_articulation"] = sorted(articulations)
+    return resultat
+
+def analyser_scenario(G, scenario, details=False):
+    try:
+        return analyser(G, scenario, details)
+    except (KeyError, ValueError, TypeError) as e:
+        # Un scénario invalide (ligne ou station inconnue, etc.) n'interrompt pas les autres
+        return { "nom": scenario.get("nom"), "erreur": repr(e) }
+
+# Chaque tâche ne contient que la description de son scénario : le graphe de base est lu dans la mémoire
+# partagée à laquelle le processus s'est attaché à sa création (cf. pool_partage)
+def analyser_lot(arguments):
+    scenario, details = arguments
+    return analyser_scenario(graphe_processus(), scenario, details)
+
+def executer_scenarios(G, scenarios, processus=None, details=False, en_vol=None):
+    """Renvoie (via yield), dans l'ordre, le résultat de chaque scénario de l'itérable 'scenarios' (cf.
+    analyser), calculés sur 'processus' processus. Au plus 'en_vol' scénarios (4 par processus par
+    défaut) sont en cours à la fois, pour que la mémoire ne dépende pas du nombre de scénarios. Les
+    processus lisent G dans un segment de mémoire partagée (cf. pool_partage)."""
+    if not processus or processus <= 1:
+        for scenario in scenarios:
+            yield analyser_scenario(G, scenario, details)
+        return
+
+    en_vol = en_vol or 4 * processus
+    with pool_partage(G, processus) as executeur:
+        attente = deque()
+        for scenario in scenarios:
+            attente.append(executeur.submit(analyser_lot, (scenario, details)))
+            if len(attente) >= en_vol:
+                yield attente.popleft().result()
+
+        while attente:
+            yield attente.popleft().result()
+
+def ecrire_ndjson(resultats, sortie=None):
+    """Écrit chaque résultat sur une ligne JSON de 'sortie' (sys.stdout par défaut) dès qu'il est
+    disponible, et renvoie le nombre de résultats écrits."""
+    sortie = sys.stdout if sortie is None else sortie
+    nombre = 0
+    for resultat in resultats:
+        sortie.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+        sortie.flush()
+        nombre += 1
+    return nombre
+
+######################################################################################################
+
+def scenarios_sans_chaque_ligne(G):
+    """Renvoie (via yield) un scénario "réseau sans la ligne X" pour chaque ligne de G."""
+    for ligne in sorted(G.numeros_lignes, key=str):
+        yield { "nom": "sans " + str(ligne), "sans_lignes": [ligne] }
+
+def scenarios_ajouts(aretes):
+    """Renvoie (via yield) un scénario "réseau plus la connexion u -- v" pour chaque couple (u, v)."""
+    for u, v in aretes:
+        yield { "nom": "ajout " + str(u) + " -- " + str(v), "ajouts": [[u, v]] }
+
+def scenarios_fermetures_aleatoires(G, k, nombre, graine=0):
+    """Renvoie (via yield) 'nombre' scénarios de fermeture de k stations tirées au hasard."""
+    alea = random.Random(graine)
+    stations = sorted(G.sommets())
+    for i in range(nombre):
+        yield { "nom": "fermetures " + str(i + 1), "fermetures": alea.sample(stations, min(k, len(stations))) }
+
+######################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Calcule le nombre de ponts et de points d\'articulation du réseau pour une série de scénarios (réseau sans une ligne, avec une connexion en plus, avec des stations fermées...), répartis sur plusieurs processus, et écrit un résultat JSON par ligne au fur et à mesure.')
+
+    parser.add_argument('--metro',
+                        nargs = '*',
+                        help = "--metro [lignes] : lignes de métro du réseau de base (toutes si aucune n'est donnée), cf. ameliorations.py"
+                        )
+
+    parser.add_argument('--rer',
+                        nargs = '*',
+                        help = "--rer [lignes] : cf. --metro, mais pour les lignes de RER"
+                        )
+
+    parser.add_argument('--scenarios',
+                        metavar = 'FICHIER',
+                        help = "--scenarios fichier : fichier NDJSON de scénarios, un par ligne (\"nom\", et éventuellement \"lignes\", \"sans_lignes\", \"ajouts\", \"fermetures\")"
+                        )
+
+    parser.add_argument('--sans-chaque-ligne',
+                        action = 'store_true',
+                        help = "--sans-chaque-ligne : ajoute un scénario \"réseau sans la ligne X\" par ligne"
+                        )
+
+    parser.add_argument('--ajouts-economiques',
+                        action = 'store_true',
+                        help = "--ajouts-economiques : ajoute un scénario par connexion proposée par amelioration_ponts_economique"
+                        )
+
+    parser.add_argument('--fermetures-aleatoires',
+                        nargs = 2,
+                        type = int,
+                        metavar = ('K', 'NOMBRE'),
+                        help = "--fermetures-aleatoires k nombre : ajoute 'nombre' scénarios de fermeture de k stations tirées au hasard"
+                        )
+
+    parser.add_argument('--graine',
+                        type = int,
+                        default = 0,
+                        help = "--graine n : graine des tirages aléatoires"
+                        )
+
+    parser.add_argument('--details',
+                        action = 'store_true',
+                        help = "--details : donne aussi la liste des ponts et des points d'articulation de chaque scénario"
+                        )
+
+    parser.add_argument('--processus',
+                        type = int,
+                        help = "--processus n : répartit les scénarios sur n processus"
+                        )
+
+    args = parser.parse_args()
+
+    reseau = Graphe()
+    with redirect_stdout(sys.stderr):
+        charger_ligne(reseau, "METRO", args.metro)
+        charger_ligne(reseau, "RER", args.rer)
+
+    # Les scénarios sont générés au fur et à mesure de leur envoi aux processus
+    def scenarios():
+        if args.scenarios:
+            with open(args.scenarios, "r") as fichier:
+                for ligne in fichier:
+                    if ligne.strip():
+                        yield json.loads(ligne)
+        if args.sans_chaque_ligne:
+            yield from scenarios_sans_chaque_ligne(reseau)
+        if args.ajouts_economiques:
+            yield from scenarios_ajouts(amelioration_ponts_economique(reseau)[0])
+        if args.fermetures_aleatoires:
+            yield from scenarios_fermetures_aleatoires(reseau, args.fermetures_aleatoires[0], args.fermetures_aleatoires[1], args.graine)
+
+    nombre = ecrire_ndjson(executer_scenarios(reseau, scenarios(), args.processus, args.details))
+    print(str(nombre) + " scénarios analysés.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from graphe import *
+from ameliorations import *
+from cache_requetes import CacheRequetes
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import json
+import signal
+import sys
+
+# Pour chaque analyse : la fonction qui la calcule et celle qui en fait les enregistrements (cf. ameliorations)
+ANALYSES = {
+    "ponts": (ponts, enregistrements_ponts),
+    "points_articulation": (points_articulation, enregistrements_articulations),
+    "impact_fermetures": (impact_fermetures, enregistrements_impact_fermetures),
+    "amelioration_points_articulation": (amelioration_points_articulation, enregistrements_ameliorer_articulations),
+    "amelioration_ponts": (amelioration_ponts, enregistrements_ameliorer_ponts),
+}
+
+# Analyses calculées dès le chargement du réseau, les autres le sont à la 1ère requête
+PRECALCULEES = ["ponts", "points_articulation"]
+
+STATUTS = { 200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error" }
+
+######################################################################################################
+
+def construire_reseau(metro, rer, dossier="./donnees/"):
+    """Charge les lignes demandées (cf. charger_ligne) et renvoie le Graphe obtenu avec l'index des noms
+    de ses stations, les résultats des analyses précalculées et les lignes demandées qui n'ont pas été
+    trouvées ({"metro": [...], "rer": [...]}). Exécutée dans un processus du pool, sans rien afficher."""
+    G = Graphe()
+    inconnues = dict()
+    with redirect_stdout(StringIO()):
+        for type, demandees in (("METRO", metro), ("RER", rer)):
+            # charger_ligne retire de la liste les lignes qu'il ne trouve pas
+            chargees = None if demandees is None else list(demandees)
+            charger_ligne(G, type, chargees, dossier)
+            inconnues[type.lower()] = [] if demandees is None else [ligne for ligne in demandees if ligne not in chargees]
+    return G, IndexNoms(G), { nom: ANALYSES[nom][0](G) for nom in PRECALCULEES }, inconnues
+
+def verifier_lignes(lignes):
+    """Vérifie le corps JSON d'une requête /recharger : un objet dont les valeurs "metro" et "rer", si
+    elles sont données, sont des listes de noms de lignes ou null (ValueError sinon)."""
+    if not isinstance(lignes, dict):
+        raise ValueError("le corps doit être un objet JSON {\"metro\": [...], \"rer\": [...]}")
+    for type in ("metro", "rer"):
+        valeur = lignes.get(type)
+        if valeur is not None and not (isinstance(valeur, list) and all(isinstance(ligne, str) for ligne in valeur)):
+            raise ValueError("\"" + type + "\" doit être une liste de noms de lignes ou null")
+
+######################################################################################################
+
+class ServeurAnalyses(object):
+    """Serveur qui charge le réseau une seule fois et répond aux requêtes HTTP (sur un port TCP ou une
+    socket Unix) en JSON. Les calculs lourds (chargement, analyses, centralité, repères des itinéraires)
+    sont faits dans un pool de processus pour que la boucle asyncio reste disponible. Les analyses
+    précalculées sont gardées jusqu'au prochain rechargement du réseau ; les autres résultats, qui
+    dépendent des paramètres des requêtes, passent par un CacheRequetes d'au plus 'taille_cache' entrées
+    valables 'duree_vie_cache' secondes, vidé à chaque rechargement.
+
+    Requêtes GET : /resume, /stations, /rechercher?nom=..[&limite=..], /<analyse>[?lignes=METRO_7,RER_A] (cf. ANALYSES), /temps_trajet?depart=..&arrivee=..,
+    /itineraire?depart=..&arrivee=..[&penalite=..][&moins_de_correspondances=1], /centralite[?echantillon=..][&nombre=..].
+    Requête POST : /recharger, avec éventuellement un corps JSON {"metro": [...], "rer": [...]} (cf. --metro
+    et --rer) pour changer les lignes chargées."""
+    def __init__(self, metro=None, rer=None, dossier="./donnees/", processus=None, taille_cache=32, duree_vie_cache=None):
+        """Initialise le serveur ; le réseau n'est chargé qu'au 1er appel de recharger."""
+        self.metro = metro
+        self.rer = rer
+        self.dossier = dossier
+        self.executeur = ProcessPoolExecutor(processus)
+        self.reseau = None
+        self.index = None
+        self.adjacence = None
+        self.resultats = dict()
+        self.lignes_inconnues = { "metro": [], "rer": [] }
+        self.taille_cache = taille_cache
+        self.duree_vie_cache = duree_vie_cache
+        self.cache = CacheRequetes(taille_cache, duree_vie_cache)
+        self.generation = 0 # nombre de chargements du réseau
+        self.requetes = 0
+        self.verrou = asyncio.Lock()
+
+    async def executer(self, fonction, *arguments):
+        """Renvoie fonction(*arguments), calculé dans un processus du pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executeur, fonction, *arguments)
+
+    async def recharger(self, lignes=None):
+        """Charge (ou recharge) le réseau, avec les lignes de 'lignes' ({"metro": [...], "rer": [...]}) pour
+        les types qui y figurent et les lignes actuelles pour les autres. Les requêtes en cours finissent sur
+        l'ancien réseau, les suivantes utilisent le nouveau dès qu'il est prêt. Les lignes introuvables sont
+        données par le résumé ("lignes_inconnues")."""
+        async with self.verrou:
+            lignes = {} if lignes is None else lignes
+            verifier_lignes(lignes)
+            metro = lignes.get("metro", self.metro)
+            rer = lignes.get("rer", self.rer)
+
+            reseau, index, precalculs, inconnues = await self.executer(construire_reseau, metro, rer, self.dossier)
+
+            resultats = dict()
+            for nom, resultat in precalculs.items():
+                resultats[nom] = asyncio.get_running_loop().create_future()
+                resultats[nom].set_result(resultat)
+
+            # Tout l'état est remplacé d'un coup, entre deux requêtes
+            self.metro, self.rer, self.lignes_inconnues = metro, rer, inconnues
+            self.reseau, self.index, self.adjacence, self.resultats = reseau, index, reseau.adjacence(ponderee=True), resultats
+            self.cache = CacheRequetes(self.taille_cache, self.duree_vie_cache)
+            self.generation += 1
+
+        return self.resume()
+
+    def resultat(self, cle, fonction, *arguments):
+        """Renvoie la tâche calculant fonction(*arguments) dans le pool : celle d'une analyse précalculée, ou
+        celle du cache, partagée par toutes les requêtes de même clé tant qu'elle n'en est pas évincée (une
+        tâche en échec n'est pas gardée)."""
+        if cle in self.resultats:
+            return self.resultats[cle]
+
+        cache = self.cache
+        trouve, tache = cache.chercher(cle)
+        if not trouve:
+            tache = asyncio.ensure_future(self.executer(fonction, *arguments))
+
+            def oublier_echec(tache):
+                if tache.cancelled() or tache.exception() is not None:
+                    cache.retirer(cle, tache)
+
+            tache.add_done_callback(oublier_echec)
+            cache.ranger(cle, tache)
+        return tache
+
+    def resume(self):
+        return {
+            "sommets": self.reseau.nombre_sommets(),
+            "aretes": self.reseau.nombre_aretes(),
+            "metro": self.metro,
+            "rer": self.rer,
+            "lignes_inconnues": self.lignes_inconnues,
+            "generation": self.generation,
+            "requetes": self.requetes,
+            "resultats_en_memoire": sorted(str(cle) for cle in list(self.resultats) + list(self.cache.entrees)),
+            "cache": self.cache.statistiques(),
+        }
+
+    def station(self, parametres, nom):
+        """Renvoie l'identifiant de station du paramètre 'nom' de la requête (KeyError s'il n'existe pas)."""
+        s = int(parametres[nom][0])
+        if s not in self.adjacence:
+            raise KeyError("station inconnue : " + str(s))
+        return s
+
+    async def repondre(self, methode, cible, corps=b""):
+        """Renvoie le code de statut HTTP et le document JSON (sous forme de dictionnaire) de la réponse à
+        la requête donnée."""
+        self.requetes += 1
+        chemin = urlsplit(cible).path.rstrip("/") or "/"
+        parametres = parse_qs(urlsplit(cible).query)
+
+        if chemin == "/recharger":
+            if methode != "POST":
+                return 405, { "erreur": "utilisez POST pour recharger le réseau" }
+            return 200, await self.recharger(json.loads(corps) if corps else None)
+
+        if methode != "GET":
+            return 405, { "erreur": "méthode non prise en charge : " + methode }
+
+        # Les requêtes en cours gardent le réseau avec lequel elles ont commencé
+        reseau, index = self.reseau, self.index
+
+        if chemin == "/resume":
+            return 200, self.resume()
+
+        if chemin == "/rechercher":
+            limite = int(parametres.get("limite", ["10"])[0])
+            stations = index.rechercher(parametres["nom"][0], limite)
+            return 200, document_json("rechercher", [{ "id": s, "station": reseau.nom_sommet(s) } for s in stations])
+
+        if chemin == "/stations":
+            return 200, document_json("stations", enregistrements_lignes_stations(reseau))
+
+        if chemin[1:] in ANALYSES:
+            nom = chemin[1:]
+            analyse, enregistrements = ANALYSES[nom]
+            if "lignes" not in parametres:
+                return 200, document_json(nom, enregistrements(reseau, await self.resultat(nom, analyse, reseau)))
+
+            # Analyse d'une partie des lignes chargées, sur une vue du réseau (sans rechargement)
+            lignes = tuple(sorted(set(",".join(parametres["lignes"]).split(","))))
+            for ligne in lignes:
+                if ligne not in reseau.numeros_lignes:
+                    raise KeyError("ligne inconnue : " + ligne)
+            vue = reseau.vue_lignes(lignes)
+            return 200, document_json(nom, enregistrements(vue, await self.resultat((nom, lignes), analyse, vue)))
+
+        if chemin == "/temps_trajet":
+            depart, arrivee = self.station(parametres, "depart"), self.station(parametres, "arrivee")
+            # Un Dijkstra arrêté à l'arrivée est assez rapide pour ne pas passer par le pool
+            distance = await asyncio.get_running_loop().run_in_executor(None, dijkstra, self.adjacence, depart, [arrivee])
+            return 200, { "depart": depart, "arrivee": arrivee, "temps": distance.get(arrivee) }
+
+        if chemin == "/itineraire":
+            depart, arrivee = self.station(parametres, "depart"), self.station(parametres, "arrivee")
+            penalite = int(parametres.get("penalite", ["300"])[0])
+            # Vérifiée avant de passer par le cache : une pénalité négative ne doit y laisser aucune entrée
+            if penalite < 0:
+                raise ValueError("pénalité de correspondance négative : " + str(penalite))
+            moins_de_correspondances = parametres.get("moins_de_correspondances", ["0"])[0] not in ("0", "false", "")
+
+            # Les repères du planificateur sont calculés une fois par pénalité, les requêtes sont rapides
+            planificateur = await self.resultat(("planificateur", penalite), Planificateur, reseau, penalite)
+            resultat = await asyncio.get_running_loop().run_in_executor(None, planificateur.itineraire, depart, arrivee, moins_de_correspondances)
+
+            if resultat is None:
+                return 200, { "depart": depart, "arrivee": arrivee, "duree": None }
+            duree, correspondances, etapes = resultat
+            return 200, { "depart": depart, "arrivee": arrivee, "duree": duree, "correspondances": correspondances,
+                          "etapes": [{ "id": s, "station": reseau.nom_sommet(s), "ligne": ligne } for s, ligne in etapes] }
+
+        if chemin == "/centralite":
+            echantillon = int(parametres["echantillon"][0]) if "echantillon" in parametres else None
+            nombre = int(parametres.get("nombre", ["10"])[0])
+            return 200, await self.resultat(("centralite", echantillon, nombre), centralites_principales, reseau, echantillon, nombre)
+
+        return 404, { "erreur": "requête inconnue : " + chemin }
+
+    async def traiter_connexion(self, lecteur, ecrivain):
+        """Lit les requêtes HTTP/1.1 d'une connexion et y répond, jusqu'à ce que le client la ferme."""
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                methode, cible, version = ligne.decode("latin-1").split()
+
+                entetes = dict()
+                while True:
+                    ligne = await lecteur.readline()
+                    if ligne in (b"\r\n", b"\n", b""):
+                        break
+                    cle, _, valeur = ligne.decode("latin-1").partition(":")
+                    entetes[cle.strip().lower()] = valeur.strip()
+
+                corps = await lecteur.readexactly(int(entetes.get("content-length", 0)))
+
+                try:
+                    statut, document = await self.repondre(methode, cible, corps)
+                except KeyError as e:
+                    statut, document = 404, { "erreur": str(e.args[0]) if e.args else "paramètre manquant" }
+                except ValueError as e:
+                    statut, document = 400, { "erreur": str(e) }
+                except Exception as e:
+                    statut, document = 500, { "erreur": repr(e) }
+
+                fermer = version == "HTTP/1.0" or entetes.get("connection", "").lower() == "close"
+                reponse = json.dumps(document, ensure_ascii=False).encode("utf-8")
+                ecrivain.write(("HTTP/1.1 " + str(statut) + " " + STATUTS[statut] + "\r\n"
+                                + "Content-Type: application/json; charset=utf-8\r\n"
+                                + "Content-Length: " + str(len(reponse)) + "\r\n"
+                                + "Connection: " + ("close" if fermer else "keep-alive") + "\r\n\r\n").encode("latin-1") + reponse)
+                await ecrivain.drain()
+
+                if fermer:
+                    break
+
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # Requête mal formée ou client parti : on ferme simplement la connexion
+            pass
+
+        finally:
+            ecrivain.close()
+
+    def fermer(self):
+        """Arrête les processus du pool."""
+        self.executeur.shutdown()
+
+######################################################################################################
+
+async def servir(serveur, socket=None, hote="127.0.0.1", port=8000):
+    """Charge le réseau puis sert les requêtes sur la socket Unix 'socket', ou sur hote:port sinon. Le
+    signal SIGHUP recharge les fichiers des lignes actuelles, SIGTERM arrête le serveur."""
+    await serveur.recharger()
+
+    if socket is not None:
+        ecoute = await asyncio.start_unix_server(serveur.traiter_connexion, path=socket)
+        adresse = socket
+    else:
+        ecoute = await asyncio.start_server(serveur.traiter_connexion, hote, port)
+        adresse = "http://" + hote + ":" + str(port)
+
+    boucle = asyncio.get_running_loop()
+    boucle.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(serveur.recharger()))
+    boucle.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    print("Réseau de " + str(serveur.reseau.nombre_sommets()) + " stations chargé, en écoute sur " + adresse, file=sys.stderr)
+    try:
+        async with ecoute:
+            await ecoute.serve_forever()
+    except asyncio.CancelledError:
+        pass
+
+######################################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description='Serveur qui charge le réseau une seule fois et répond en JSON aux requêtes HTTP (ponts, points d\'articulation, arêtes à rajouter, temps de trajet, itinéraires, centralité), sur un port TCP ou une socket Unix.')
+
+    parser.add_argument('--metro',
+                        nargs = '*',
+                        help = "--metro [lignes] : lignes de métro à charger (toutes si aucune n'est donnée), cf. ameliorations.py"
+                        )
+
+    parser.add_argument('--rer',
+                        nargs = '*',
+                        help = "--rer [lignes] : cf. --metro, mais pour les lignes de RER"
+                        )
+
+    parser.add_argument('--socket',
+                        metavar = 'CHEMIN',
+                        help = "--socket chemin : écoute sur cette socket Unix plutôt que sur un port TCP"
+                        )
+
+    parser.add_argument('--hote',
+                        default = "127.0.0.1",
+                        help = "--hote adresse : adresse d'écoute (127.0.0.1 par défaut)"
+                        )
+
+    parser.add_argument('--port',
+                        type = int,
+                        default = 8000,
+                        help = "--port n : port d'écoute (8000 par défaut)"
+                        )
+
+    parser.add_argument('--processus',
+                        type = int,
+                        help = "--processus n : nombre de processus pour les calculs lourds (nombre de processeurs par défaut)"
+                        )
+
+    parser.add_argument('--taille-cache',
+                        type = int,
+                        default = 32,
+                        help = "--taille-cache n : nombre maximal de résultats gardés en mémoire en plus des analyses précalculées (itinéraires par pénalité, centralités, analyses par lignes...), 32 par défaut"
+                        )
+
+    parser.add_argument('--duree-vie-cache',
+                        type = float,
+                        help = "--duree-vie-cache s : durée en secondes pendant laquelle ces résultats restent valables (sans limite par défaut)"
+                        )
+
+    args = parser.parse_args()
+    serveur = ServeurAnalyses(args.metro, args.rer, processus=args.processus, taille_cache=args.taille_cache, duree_vie_cache=args.duree_vie_cache)
+
+    try:
+        asyncio.run(servir(serveur, args.socket, args.hote, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.fermer()
+
+if __name__ == "__main__":
+    main()